@@ -0,0 +1,127 @@
+"""Scheduler scaling benchmark, from 10 to 1,000,000 definitions.
+
+Each definition is an event that reschedules itself every frequency
+seconds and checks the queue depth, as LogDriver does, against the
+simulated clock so there is no wall-clock waiting.  For each number of
+definitions it measures, for every scheduler backend:
+    usec_per_event   the cost of running and rescheduling one event
+    bytes_per_entry  the memory held by the scheduler for each pending
+                     event, measured with tracemalloc
+
+The backends are the standard library sched.scheduler with its depth read
+through len(queue), as LogDriver used to, and the HeapScheduler and
+TimingWheelScheduler of logger.scheduler.  sched.scheduler copies and
+sorts its queue on every event, so it is only run up to --sched-limit
+definitions.
+
+Run from the src directory:
+    python -m benchmarks.scheduler_scaling [--quick] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import sched
+import sys
+import time
+import tracemalloc
+
+from logger.scheduler import HeapScheduler, TimingWheelScheduler
+from logger.virtual_clock import VirtualClock
+
+COUNTS = (10, 100, 1000, 10000, 100000, 1000000)
+
+
+class StandardScheduler(sched.scheduler):
+    """sched.scheduler with its depth read the way LogDriver used to"""
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue)
+
+
+BACKENDS = (("sched", StandardScheduler),
+            ("heap", HeapScheduler),
+            ("wheel", TimingWheelScheduler))
+
+
+def frequencies(count: int) -> list:
+    """a spread of frequencies from 1 to 60 seconds, like a real
+    definition file"""
+
+    return [1 + (index * 7919) % 60000 / 1000 for index in range(count)]
+
+
+def run_backend(factory, count: int, events: int) -> dict:
+    """schedules count definitions then runs events events"""
+
+    clock = VirtualClock(1600000000.0)
+    tracemalloc.start()
+    scheduler = factory(clock.time, clock.sleep)
+    before = tracemalloc.get_traced_memory()[0]
+    state = {"remaining": events}
+
+    def action(frequency):
+        if state["remaining"] > 0:
+            state["remaining"] -= 1
+            scheduler.enter(frequency, 1, action, (frequency,))
+            if scheduler.depth > count:
+                raise Exception("unexpected queue depth")
+
+    for frequency in frequencies(count):
+        scheduler.enter(frequency, 1, action, (frequency,))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    while state["remaining"] > 0:
+        scheduler.run()
+    elapsed = time.perf_counter() - started
+    return {"usec_per_event": elapsed / events * 1e6,
+            # the memory for the frequency floats is not the scheduler's
+            "bytes_per_entry": (after - before) / count - 24}
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true",
+                        help="up to 10000 definitions, for a smoke test")
+    parser.add_argument("--events", type=int, default=200000,
+                        help="the number of events run for each count "
+                             "(default 200000)")
+    parser.add_argument("--sched-limit", type=int, default=10000,
+                        help="the largest number of definitions run with "
+                             "sched.scheduler (default 10000)")
+    parser.add_argument("--output", help="write the results to this JSON "
+                                         "file as well as to stdout")
+    options = parser.parse_args(arguments)
+
+    counts = [count for count in COUNTS
+              if not options.quick or count <= 10000]
+    results = {}
+    for count in counts:
+        for name, factory in BACKENDS:
+            if name == "sched" and count > options.sched_limit:
+                continue
+            events = options.events
+            if name == "sched":
+                # each event sorts the whole queue
+                events = min(events, max(1000, 10000000 // count))
+            results["definitions_" + str(count) + "/" + name] = \
+                run_backend(factory, count, events)
+            print("definitions_" + str(count) + "/" + name,
+                  results["definitions_" + str(count) + "/" + name],
+                  file=sys.stderr)
+
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if options.output:
+        with open(options.output, "w") as output:
+            output.write(text + "\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
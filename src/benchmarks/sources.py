@@ -0,0 +1,124 @@
+"""Several definition files in one process against a process for each.
+
+Writes --sources definition files, each with --definitions messages, then
+runs them in real time for --duration seconds twice:
+    one_process        python main.py --definitions dir/*, every file a
+                       source sharing one scheduler
+    separate_processes python main.py for each file
+and then sends SIGTERM.  For each it reports the peak resident memory,
+summed over the processes, and the user and system CPU time, both from
+os.wait4, along with the lines written.
+
+Run from the src directory:
+    python -m benchmarks.sources [--sources 20] [--duration 10]
+                                 [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def write_definitions(directory: str, sources: int, definitions: int,
+                      frequency: float) -> list:
+    """writes a definition file for each source"""
+
+    files = []
+    for source in range(sources):
+        path = os.path.join(directory, "app_" + str(source).zfill(3))
+        with open(path, "w") as file:
+            file.write("\n".join(
+                str(index % 2) + ",N,N,Source " + str(source) +
+                " message " + str(index) + "," + str(frequency) + ",0"
+                for index in range(definitions)))
+        files.append(path)
+    return files
+
+
+def run_processes(commands: list, duration: float) -> dict:
+    """runs each command for duration seconds then stops them all with
+    SIGTERM, returning their combined usage"""
+
+    outputs = [tempfile.TemporaryFile() for _ in commands]
+    processes = [subprocess.Popen(command, stderr=output,
+                                  stdout=subprocess.DEVNULL,
+                                  env=environment)
+                 for (command, environment), output in zip(commands,
+                                                           outputs)]
+    time.sleep(duration)
+    for process in processes:
+        process.send_signal(signal.SIGTERM)
+    maxrss = 0
+    cpu = 0.0
+    for process in processes:
+        _, _, usage = os.wait4(process.pid, 0)
+        # the returncode is collected by wait4, not by Popen
+        process.returncode = 0
+        maxrss += usage.ru_maxrss
+        cpu += usage.ru_utime + usage.ru_stime
+    lines = 0
+    for output in outputs:
+        output.seek(0)
+        lines += output.read().count(b"\n")
+        output.close()
+    return {"processes": len(processes),
+            "maxrss_mb": maxrss / 1024,
+            "cpu_seconds": cpu,
+            "lines": lines}
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", type=int, default=20,
+                        help="the number of definition files (default 20)")
+    parser.add_argument("--definitions", type=int, default=10,
+                        help="the definitions in each file (default 10)")
+    parser.add_argument("--frequency", type=float, default=0.5,
+                        help="the seconds between the lines of each "
+                             "definition (default 0.5)")
+    parser.add_argument("--duration", type=float, default=10,
+                        help="the seconds each run lasts (default 10)")
+    parser.add_argument("--output", help="write the results to this JSON "
+                                         "file as well as to stdout")
+    options = parser.parse_args(arguments)
+
+    directory = tempfile.mkdtemp()
+    try:
+        files = write_definitions(directory, options.sources,
+                                  options.definitions, options.frequency)
+        environment = dict(os.environ)
+        combined = [([sys.executable, "main.py", "--definitions",
+                      os.path.join(directory, "*")], environment)]
+        separate = [([sys.executable, "main.py"],
+                     dict(environment, MESSAGE_DEFINITIONS=file))
+                    for file in files]
+        results = {}
+        for name, commands in (("one_process", combined),
+                               ("separate_processes", separate)):
+            results[name] = run_processes(commands, options.duration)
+            print(name, results[name], file=sys.stderr)
+    finally:
+        shutil.rmtree(directory)
+
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "sources": options.sources,
+              "definitions": options.definitions,
+              "duration": options.duration,
+              "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if options.output:
+        with open(options.output, "w") as output:
+            output.write(text + "\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""Benchmark suite for the LogMessage and LogDriver hot paths.
+
+Measures, without any wall-clock waiting (every run uses the backfill
+simulated clock):
+    throughput  lines/sec and bytes/sec for every combination of message
+                type, UNIQUE/SHARED/seed/template mode and output sink
+    scheduler   the cost per line as the number of definitions grows
+    startup     the time to read and validate definition files of
+                increasing size, parsed and from the compiled cache
+
+Results are written as JSON.  Given a baseline file from an earlier run,
+every result that has become slower than the tolerance allows is reported
+and the exit status is 1, so regressions can be caught.
+
+Run from the src directory:
+    python -m benchmarks.suite [--quick] [--output results.json]
+                               [--baseline baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from logger.log_generator import LogDriver
+
+MESSAGE_TYPES = (("connection", "0"), ("unknown", "1"))
+
+TEXT = "Benchmark message text"
+
+TEMPLATE = "{choice:GET|POST|PUT} /api/items {int:200-504} from {ip} " +\
+    "{user_id} on {host} request {counter}"
+
+MODES = (("unique_n", "N", "N", {}, TEXT),
+         ("unique_md5", "Y", "N", {}, TEXT),
+         ("unique_counter", "Y", "N", {"LOG_UNIQUE_TOKENS": "counter"}, TEXT),
+         ("shared_day", "Y", "Y", {}, TEXT),
+         ("shared_seed", "Y:seed1", "Y", {}, TEXT),
+         ("template_n", "N", "N", {}, TEMPLATE),
+         ("template_shared", "Y", "Y", {}, TEMPLATE))
+
+SINKS = (("logging_line", {"LOG_OUTPUT": "line",
+                           "LOG_EMIT_PATH": "logging"}),
+         ("logging_buffered", {"LOG_OUTPUT": "buffered",
+                               "LOG_EMIT_PATH": "logging"}),
+         ("direct_line", {"LOG_OUTPUT": "line",
+                          "LOG_EMIT_PATH": "direct"}),
+         ("direct_buffered", {"LOG_OUTPUT": "buffered",
+                              "LOG_EMIT_PATH": "direct"}))
+
+BACKFILL = {"LOG_BACKFILL_START": "2020-03-01T00:00:00",
+            "LOG_BACKFILL_END": "2020-03-08T00:00:00"}
+
+
+class CountingStream():
+    """a text or binary stream that discards what is written to it and
+    counts the characters or bytes"""
+
+    def __init__(self):
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class Environment():
+    """sets environment variables for the duration of a with block"""
+
+    def __init__(self, values: dict):
+        self.values = values
+        self.saved = {}
+
+    def __enter__(self):
+        for name, value in self.values.items():
+            self.saved[name] = os.environ.get(name)
+            os.environ[name] = value
+
+    def __exit__(self, *exc_info):
+        for name, value in self.saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def write_definitions(directory: str, name: str, lines: list) -> str:
+    """writes a message definition file and returns its path"""
+
+    path = os.path.join(directory, name)
+    with open(path, "w") as definitions:
+        definitions.write("\n".join(lines))
+    return path
+
+
+def run_driver(definitions: str, environment: dict) -> tuple:
+    """runs a LogDriver to completion against the simulated clock with its
+    output going to a CountingStream
+
+    Return
+    ------
+        float, int
+            the elapsed seconds and the number of characters or bytes
+    """
+
+    with Environment(dict(BACKFILL, **environment)):
+        driver = LogDriver(1, "Benchmark")
+    driver.file = definitions
+    stream = CountingStream()
+    if driver.writer is None:
+        driver.fh.setStream(stream)
+    else:
+        driver.writer.stream = stream
+    try:
+        started = time.perf_counter()
+        driver.run()
+        elapsed = time.perf_counter() - started
+    finally:
+        # every LogDriver adds a handler to the shared logger
+        driver.logger.removeHandler(driver.fh)
+    return elapsed, stream.written
+
+
+def throughput(directory: str, lines: int) -> dict:
+    """lines/sec and bytes/sec for every message type, mode and sink"""
+
+    results = {}
+    for type_name, message_type in MESSAGE_TYPES:
+        for mode_name, unique, shared, mode_environment, text in MODES:
+            definitions = write_definitions(
+                directory, "throughput",
+                [",".join((message_type, unique, shared, text, "1000/s",
+                           str(lines)))])
+            for sink_name, sink_environment in SINKS:
+                elapsed, written = run_driver(
+                    definitions, dict(mode_environment, **sink_environment))
+                results["/".join((type_name, mode_name, sink_name))] = {
+                    "lines_per_sec": lines / elapsed,
+                    "bytes_per_sec": written / elapsed}
+    return results
+
+
+def scheduler(directory: str, lines: int, counts: list) -> dict:
+    """the cost per line as the number of definitions grows, for the
+    same total number of lines"""
+
+    results = {}
+    for count in counts:
+        per_definition = max(1, lines // count)
+        definitions = write_definitions(
+            directory, "scheduler",
+            ["0,N,N,Scheduler message " + str(index) + "," +
+             str(1000 / count) + "/s," + str(per_definition)
+             for index in range(count)])
+        for tick in ("0", "0.01"):
+            elapsed, written = run_driver(
+                definitions, {"LOG_OUTPUT": "buffered",
+                              "LOG_EMIT_PATH": "direct",
+                              "LOG_TICK": tick})
+            key = "definitions_" + str(count) + ("/tick" if tick != "0"
+                                                 else "/event")
+            results[key] = {
+                "lines_per_sec": per_definition * count / elapsed,
+                "usec_per_line": elapsed / (per_definition * count) * 1e6}
+    return results
+
+
+def startup(directory: str, sizes: list) -> dict:
+    """the time to read and validate definition files of each size, and
+    to read them again from the compiled definition cache"""
+
+    results = {}
+    for size in sizes:
+        definitions = write_definitions(
+            directory, "startup",
+            [str(index % 2) + ",Y:seed" + str(index) + ",Y,Startup message " +
+             str(index) + "," + str(1 + index % 60) + ",0"
+             for index in range(size)])
+        cache = os.path.join(directory, "cache-" + str(size))
+        for key, cached in (("lines_", False), ("cached_lines_", True)):
+            driver = LogDriver(1, "Benchmark")
+            driver.logger.removeHandler(driver.fh)
+            driver.file = definitions
+            if cached:
+                driver.definitions_cache = cache
+                # the first read fills the cache
+                driver.setup_log_messages()
+            started = time.perf_counter()
+            driver.setup_log_messages()
+            elapsed = time.perf_counter() - started
+            results[key + str(size)] = {
+                "seconds": elapsed,
+                "definitions_per_sec": size / elapsed}
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """compares results with a baseline.
+    Rates (per_sec) must not fall, and times (seconds, usec) must not rise,
+    by more than the tolerance
+
+    Return
+    ------
+        List
+            a description of every regression
+    """
+
+    regressions = []
+    for section, entries in results.items():
+        for key, metrics in entries.items():
+            for metric, value in metrics.items():
+                try:
+                    base = baseline[section][key][metric]
+                except KeyError:
+                    continue
+                if metric.endswith("per_sec"):
+                    regressed = value < base * (1 - tolerance)
+                else:
+                    regressed = value > base * (1 + tolerance)
+                if regressed:
+                    regressions.append(
+                        "%s %s %s: %.6g against a baseline of %.6g" %
+                        (section, key, metric, value, base))
+    return regressions
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true",
+                        help="fewer lines and smaller sizes, for a smoke "
+                             "test")
+    parser.add_argument("--output", help="write the results to this JSON "
+                                         "file as well as to stdout")
+    parser.add_argument("--baseline", help="compare with the results in "
+                                           "this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="the fraction a result may be slower than the "
+                             "baseline (default 0.2)")
+    options = parser.parse_args(arguments)
+
+    if options.quick:
+        lines, counts, sizes = 500, [1, 10, 100], [10, 100]
+    else:
+        lines, counts, sizes = 20000, [1, 10, 100, 1000], \
+            [10, 100, 1000, 10000]
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "throughput": throughput(directory, lines),
+            "scheduler": scheduler(directory, lines, counts),
+            "startup": startup(directory, sizes)}
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if options.output:
+        with open(options.output, "w") as output:
+            output.write(text + "\n")
+
+    if options.baseline:
+        with open(options.baseline) as baseline:
+            regressions = compare(results, json.load(baseline)["results"],
+                                  options.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
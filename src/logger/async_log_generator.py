@@ -0,0 +1,331 @@
+import asyncio
+import concurrent.futures
+import os
+import signal
+import threading
+import time
+
+from logger.graceful_killer import GracefulKiller
+from logger.log_generator import LogDriver
+
+
+class AsyncLogWriter():
+    """AsyncLogWriter gathers formatted log lines on the event loop and
+       writes them on a dedicated writer thread, so writing to a slow stream
+       never blocks the event loop and output overlaps with scheduling
+
+       The buffer is handed to the writer thread when it reaches a size
+       threshold, when it has been held for a time threshold and when the
+       writer is closed
+
+       Attributes
+       ----------
+       stream : stream
+           The stream the lines are written to
+       flush_bytes : int
+           The number of buffered characters, or bytes, that triggers a flush
+       flush_interval : float
+           The maximum number of seconds a line is held in the buffer
+       binary : bool
+           Whether the lines are bytes for a binary stream
+
+       Methods
+       -------
+       start()
+            starts the flush task on the running event loop
+       write_lines(lines: list)
+            adds a list of formatted lines to the buffer
+       flush()
+            hands the buffer to the writer thread and waits for it
+       close()
+            stops the flush task and writes any remaining lines
+    """
+
+    def __init__(self, stream, flush_bytes: int, flush_interval: float,
+                 binary: bool = False):
+        """
+        Parameters
+        ----------
+        stream : stream
+            The stream the lines are written to
+        flush_bytes : int
+            The number of buffered characters, or bytes, that triggers a flush
+        flush_interval : float
+            The maximum number of seconds a line is held in the buffer
+        binary : bool
+            Whether the lines are bytes for a binary stream
+        """
+
+        self.stream = stream
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.empty = b'' if binary else ''
+        self.buffer = []
+        self.buffered = 0
+        self.closing = False
+        self.full = None
+        self.task = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="async-log-writer")
+
+    def start(self):
+        """starts the flush task on the running event loop"""
+
+        self.full = asyncio.Event()
+        self.task = asyncio.ensure_future(self.flush_periodically())
+
+    def write_lines(self, lines: list):
+        """adds a list of formatted lines to the buffer, waking the flush
+        task when it reaches flush_bytes
+
+        Parameters
+        ----------
+        lines : List
+            The formatted lines, each including its line terminator
+        """
+
+        self.buffer.extend(lines)
+        self.buffered += sum(map(len, lines))
+        if self.buffered >= self.flush_bytes:
+            self.full.set()
+
+    async def flush_periodically(self):
+        """flushes the buffer when it is full or every flush_interval"""
+
+        while not self.closing:
+            try:
+                await asyncio.wait_for(self.full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self):
+        """hands the buffer to the writer thread and waits for it to be
+        written, lines added in the meantime gather in a new buffer"""
+
+        self.full.clear()
+        if not self.buffer:
+            return
+        data = self.empty.join(self.buffer)
+        self.buffer = []
+        self.buffered = 0
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.write_out, data)
+
+    def write_out(self, data):
+        """writes and flushes data on the writer thread"""
+
+        self.stream.write(data)
+        self.stream.flush()
+
+    async def close(self):
+        """stops the flush task and writes any remaining lines"""
+
+        self.closing = True
+        if self.task is not None:
+            self.full.set()
+            await self.task
+        await self.flush()
+        self.executor.shutdown()
+
+
+class AsyncLogDriver():
+    """AsyncLogDriver generates the same log messages as LogDriver, but runs
+       each definition, or each group of definitions, as an asyncio task on
+       a single event loop instead of a thread running a sched loop.  It
+       can be run on its own from main.py or embedded in another service's
+       event loop
+
+       The message definitions, formatting and configuration are those of a
+       LogDriver, which it uses for everything other than scheduling and
+       writing.  Each task sleeps until its next message is due, against
+       absolute deadlines, then writes every message that has fallen due
+
+       Attributes
+       ----------
+       driver : LogDriver
+           The LogDriver that loads, formats and counts the messages
+       group_size : int
+           The number of definitions run by each task
+       stream : stream
+           Where the lines are written, defaults to the LogDriver's network
+           sink or stream
+       handle_signals : bool
+           Whether SIGINT and SIGTERM stop the driver, when embedded the
+           owning service may prefer to call stop itself
+
+       Methods
+       -------
+       run()
+            coroutine that generates the messages until every definition
+            reaches its max_count or the driver is stopped
+       stop()
+            stops the driver, must be called on the event loop's thread
+    """
+
+    def __init__(self, name: str = "AsyncLogDriver", group_size: int = None,
+                 stream=None, handle_signals: bool = True):
+        """
+        Parameters
+        ----------
+        name : String
+            the driver name
+        group_size : int
+            the number of definitions run by each task, defaults to the
+            LOG_ASYNC_GROUP environment variable or 1
+        stream : stream
+            where the lines are written, defaults to the LogDriver's network
+            sink or stream
+        handle_signals : bool
+            whether SIGINT and SIGTERM stop the driver
+
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_ASYNC_GROUP
+                Backfilling and recording are not supported
+        """
+
+        self.driver = LogDriver(0, name, GracefulKiller(False))
+        if self.driver.clock is not None:
+            raise Exception("AsyncLogDriver runs against the wall clock, " +
+                            "use LogDriver for backfilling")
+        if os.environ.get("LOG_RECORD", ""):
+            self.driver.writer.close()
+            raise Exception("AsyncLogDriver does not record captures, " +
+                            "use LogDriver with LOG_RECORD")
+        if group_size is None:
+            value = os.environ.get("LOG_ASYNC_GROUP", "1")
+            if not value.isdecimal() or int(value) < 1:
+                raise Exception("Invalid value for LOG_ASYNC_GROUP, " +
+                                "Supplied value is : " + value +
+                                " Expected a positive integer")
+            group_size = int(value)
+        self.group_size = group_size
+        self.handle_signals = handle_signals
+        binary = self.driver.line_formatter is not None
+        if stream is None and self.driver.sink is not None:
+            stream = self.driver.sink
+        if stream is None:
+            stream = self.driver.fh.stream
+            if binary:
+                stream = getattr(stream, "buffer", stream)
+        self.stream = stream
+        # the LogDriver's own writer is not used
+        if self.driver.writer is not None:
+            self.driver.writer.close()
+            self.driver.writer = None
+        self.writer = AsyncLogWriter(stream, *self.driver.get_flush_settings(),
+                                     binary=binary)
+        self.tasks = []
+
+    async def run(self) -> int:
+        """generates the messages until every definition reaches its
+        max_count or the driver is stopped, then writes any remaining lines
+
+        Return
+        ------
+            int
+                the exit status, 99 if the driver was stopped
+        """
+
+        loop = asyncio.get_running_loop()
+        signals = []
+        if self.handle_signals and\
+                threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(signum, self.stop)
+                    signals.append(signum)
+                except NotImplementedError:
+                    pass
+
+        log_messages = self.driver.partition_log_messages(
+            self.driver.setup_log_messages())
+        self.driver.log_messages = log_messages
+        self.writer.start()
+        self.tasks = [
+            asyncio.ensure_future(self.run_group(
+                log_messages[index:index + self.group_size]))
+            for index in range(0, len(log_messages), self.group_size)]
+        try:
+            results = await asyncio.gather(*self.tasks,
+                                           return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        finally:
+            for signum in signals:
+                loop.remove_signal_handler(signum)
+            await self.writer.close()
+            report = self.driver.schedule_report()
+            if report is not None:
+                self.driver.logger.warning(report)
+            if self.driver.sink is not None:
+                await loop.run_in_executor(None, self.driver.sink.close,
+                                           self.driver.shutdown_timeout)
+        return 99 if self.driver.killer.kill_now else 0
+
+    def stop(self):
+        """stops the driver, cancelling every task so that sleeping tasks
+        stop immediately, must be called on the event loop's thread
+        """
+
+        self.driver.killer.kill_now = True
+        for task in self.tasks:
+            task.cancel()
+
+    async def run_group(self, group: list):
+        """generates the messages for a group of definitions.
+        Each LogMessage is first due one frequency after the start, then
+        every frequency after that, or as its load profile gives, each wake
+        writing every message of the group that has fallen due as a single
+        batch, catching up as set by LOG_CATCH_UP
+
+        Parameters
+        ----------
+        group: List
+            the LogMessage instances run by this task
+        """
+
+        driver = self.driver
+        if driver.line_formatter is None:
+            def format_line(type):
+                return driver.format_line(driver.format_message(type))
+        else:
+            format_line = driver.format_direct
+
+        start = time.time()
+        # the time each LogMessage can next be written, which is later than
+        # its next deadline while it is spreading out missed lines
+        active = []
+        for current_message in group:
+            current_message.next_due = current_message.next_time(start)
+            active.append((current_message.next_due, current_message))
+        try:
+            while active and not driver.killer.kill_now:
+                due = min(release for release, _ in active)
+                # always yield so a busy group cannot starve the others
+                await asyncio.sleep(max(due - time.time(), 0))
+
+                now = time.time()
+                batch = []
+                types = []
+                waiting = []
+                for release, current_message in active:
+                    if release <= now:
+                        release = driver.write_due(current_message, now,
+                                                   format_line, batch)
+                    if driver.metrics is not None:
+                        types.extend([current_message] *
+                                     (len(batch) - len(types)))
+                    if not driver.is_exhausted(current_message):
+                        waiting.append((release, current_message))
+                active = waiting
+                if driver.metrics is None:
+                    self.writer.write_lines(batch)
+                else:
+                    driver.metrics.write(self.writer.write_lines, batch,
+                                         types, now - due, formatted=True)
+        except asyncio.CancelledError:
+            pass
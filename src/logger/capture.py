@@ -0,0 +1,448 @@
+import bisect
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+
+from logger.graceful_killer import GracefulKiller
+from logger.log_writer import QueuedLogWriter
+from logger.network_sinks import sink_from_environment
+
+MAGIC = b'LGCAP001'
+# the footer at the end of a capture file: its magic, the number of lines,
+# the end of the line data, the offset of the index and the time of the
+# first line in seconds since the epoch
+FOOTER = struct.Struct('<8sQQQd')
+# each index entry is the offset of a line and its time, in seconds after
+# the first line
+ENTRY = struct.Struct('<Qd')
+# the most bytes of lines written to the stream at once when replaying
+CHUNK_BYTES = 1048576
+
+
+class CaptureFile():
+    """CaptureFile records log lines, each with the time it was written,
+       into an indexed binary capture file that CaptureReader memory maps
+       for replay
+
+       The file holds a header, the lines exactly as they were written, one
+       after the other, then an index of the offset and relative time of
+       every line and a footer locating the index.  The index is written to
+       a temporary file alongside the capture as the lines are recorded,
+       and appended to the capture when it is closed
+
+       Attributes
+       ----------
+       path : String
+           The capture file
+       count : int
+           The number of lines recorded
+       start : float
+           The time of the first line in seconds since the epoch
+
+       Methods
+       -------
+       record(now: float, lines: list)
+            records lines written at a time
+       close()
+            appends the index and footer and closes the file
+    """
+
+    # the number of index entries gathered before they are written
+    INDEX_BLOCK = 65536
+
+    def __init__(self, path: str):
+        """creates the capture file, replacing any existing file
+
+        Parameters
+        ----------
+        path : String
+            The capture file
+        """
+
+        self.path = path
+        self.count = 0
+        self.start = None
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.offset = len(MAGIC)
+        self.index = open(path + '.index', 'wb+')
+        self.entries = []
+
+    def record(self, now: float, lines: list):
+        """records encoded lines written at a time
+
+        Parameters
+        ----------
+        now : float
+            When the lines were written in seconds since the epoch
+        lines : List
+            The encoded lines, each including its line terminator
+        """
+
+        if self.start is None:
+            self.start = now
+        relative = now - self.start
+        offset = self.offset
+        entries = self.entries
+        for line in lines:
+            entries.append(ENTRY.pack(offset, relative))
+            offset += len(line)
+        self.file.write(b''.join(lines))
+        self.offset = offset
+        self.count += len(lines)
+        if len(entries) >= self.INDEX_BLOCK:
+            self.index.write(b''.join(entries))
+            self.entries = []
+
+    def close(self):
+        """appends the index and footer and closes the file"""
+
+        if self.file.closed:
+            return
+        self.index.write(b''.join(self.entries))
+        self.entries = []
+        # the index is aligned so it can be read in place
+        padding = -self.offset % 8
+        self.file.write(b'\0' * padding)
+        self.index.seek(0)
+        shutil.copyfileobj(self.index, self.file)
+        self.file.write(FOOTER.pack(MAGIC, self.count, self.offset,
+                                    self.offset + padding,
+                                    self.start or 0.0))
+        self.file.close()
+        self.index.close()
+        os.remove(self.path + '.index')
+
+
+class RecordingWriter():
+    """RecordingWriter records every line written through a LogDriver's
+       writer in a CaptureFile, with the driver's current time, before
+       passing it on to the writer
+
+       Attributes
+       ----------
+       writer : BufferedLogWriter
+           The writer the lines are passed on to
+       capture : CaptureFile
+           Where the lines are recorded
+       timefunc : function
+           Returns the driver's current time
+
+       Methods
+       -------
+       write(line)
+            records and writes a formatted line
+       write_lines(lines: list)
+            records and writes a list of formatted lines
+       flush()
+            flushes the writer
+       close()
+            closes the writer and the capture file
+       report()
+            the writer's report, for a QueuedLogWriter
+    """
+
+    def __init__(self, writer, capture: CaptureFile, timefunc):
+        """
+        Parameters
+        ----------
+        writer : BufferedLogWriter
+            The writer the lines are passed on to
+        capture : CaptureFile
+            Where the lines are recorded
+        timefunc : function
+            Returns the driver's current time
+        """
+
+        self.writer = writer
+        self.capture = capture
+        self.timefunc = timefunc
+        self.binary = writer.binary
+
+    def write(self, line):
+        """records and writes a formatted line
+
+        Parameters
+        ----------
+        line : bytes or String
+            The formatted line, including its line terminator
+        """
+
+        self.capture.record(self.timefunc(), (
+            line if self.binary else line.encode(),))
+        self.writer.write(line)
+
+    def write_lines(self, lines: list):
+        """records and writes a list of formatted lines
+
+        Parameters
+        ----------
+        lines : List
+            The formatted lines, each including its line terminator
+        """
+
+        self.capture.record(self.timefunc(), lines if self.binary else
+                            [line.encode() for line in lines])
+        self.writer.write_lines(lines)
+
+    def flush(self):
+        """flushes the writer"""
+
+        self.writer.flush()
+
+    def close(self, timeout: float = 5.0):
+        """closes the writer and the capture file
+
+        Parameters
+        ----------
+        timeout : float
+            The number of seconds allowed for the lines queued by a
+            QueuedLogWriter
+        """
+
+        if isinstance(self.writer, QueuedLogWriter):
+            self.writer.close(timeout)
+        else:
+            self.writer.close()
+        self.capture.close()
+
+    def report(self) -> str:
+        """returns the writer's report for a QueuedLogWriter, or None"""
+
+        if isinstance(self.writer, QueuedLogWriter):
+            return self.writer.report()
+        return None
+
+
+class CaptureReader():
+    """CaptureReader memory maps a capture file, so any run of lines can
+       be written out as a single slice of the file, without reading or
+       encoding each line
+
+       Attributes
+       ----------
+       path : String
+           The capture file
+       count : int
+           The number of lines in the capture
+       start : float
+           The time of the first line in seconds since the epoch
+       offsets : memoryview
+           The offset of each line in the file
+       times : memoryview
+           The time of each line, in seconds after the first line
+
+       Methods
+       -------
+       lines(first: int, last: int)
+            returns the lines first to last - 1 as one slice of the file
+       find_time(seconds: float)
+            returns the first line at or after a time
+       close()
+            unmaps and closes the file
+    """
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        path : String
+            The capture file
+
+        Raises
+        ------
+            Exception:
+                Invalid capture file
+        """
+
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        if size < len(MAGIC) + FOOTER.size:
+            self.file.close()
+            raise Exception("Invalid capture file, Supplied value is : " +
+                            path + " Expected a complete capture file")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.data_end, index, self.start =\
+            FOOTER.unpack_from(self.map, size - FOOTER.size)
+        if self.map[:len(MAGIC)] != MAGIC or magic != MAGIC or\
+                index + self.count * ENTRY.size != size - FOOTER.size:
+            self.close()
+            raise Exception("Invalid capture file, Supplied value is : " +
+                            path + " Expected a complete capture file")
+        self.view = memoryview(self.map)
+        entries = self.view[index:size - FOOTER.size]
+        self.offsets = entries.cast('Q')[0::2]
+        self.times = entries.cast('d')[1::2]
+        # every view of the map is released before it is closed
+        self.views = [self.offsets, self.times, entries, self.view]
+
+    def lines(self, first: int, last: int) -> memoryview:
+        """returns lines first to last - 1 as one slice of the mapped file
+
+        Parameters
+        ----------
+        first : int
+            The first line
+        last : int
+            The line after the last line
+        """
+
+        end = self.data_end if last >= self.count else self.offsets[last]
+        return self.view[self.offsets[first]:end]
+
+    def find_time(self, seconds: float) -> int:
+        """returns the first line at or after a time, the count if there
+        is none
+
+        Parameters
+        ----------
+        seconds : float
+            The time in seconds after the first line
+        """
+
+        return bisect.bisect_left(self.times, seconds)
+
+    def close(self):
+        """unmaps and closes the file"""
+
+        for view in getattr(self, 'views', ()):
+            view.release()
+        self.map.close()
+        self.file.close()
+
+
+def replay(reader: CaptureReader, stream, speed: float = 1.0,
+           first: int = 0, killer=None, copy: bool = False) -> int:
+    """writes the lines of a capture to a stream, paced as they were
+    recorded at a speed multiplier, or as fast as possible.  Every line
+    that has fallen due is written as one slice of the capture
+
+    Parameters
+    ----------
+    reader : CaptureReader
+        The capture
+    stream : stream
+        A binary stream the lines are written to
+    speed : float
+        How many times faster than recorded the lines are written, None
+        for as fast as possible
+    first : int
+        The first line written, to seek into the capture
+    killer : GracefulKiller
+        Stops the replay when a termination signal is detected
+    copy : bool
+        Whether to write each slice as bytes, for a stream that holds on
+        to what is written, such as a network sink
+    Return
+    ------
+        int
+            The number of lines written
+    """
+
+    times = reader.times
+    offsets = reader.offsets
+    count = reader.count
+    index = first
+    if index < count:
+        base = times[index]
+    started = time.monotonic()
+    while index < count:
+        if killer is not None and killer.kill_now:
+            break
+        last = count
+        if speed is not None:
+            due = base + (time.monotonic() - started) * speed
+            last = bisect.bisect_right(times, due, index, count)
+            if last == index:
+                if killer is None:
+                    time.sleep((times[index] - due) / speed)
+                # a termination signal ends the wait straight away
+                elif killer.wait((times[index] - due) / speed):
+                    break
+                continue
+        # no more than CHUNK_BYTES in one write, but at least one line
+        last = max(index + 1, bisect.bisect_right(
+            offsets, offsets[index] + CHUNK_BYTES, index, last))
+        data = reader.lines(index, last)
+        stream.write(bytes(data) if copy else data)
+        stream.flush()
+        data.release()
+        index = last
+    return index - first
+
+
+def parse_speed(value: str) -> float:
+    """parses a replay speed, a positive multiplier such as 1 or 10, or
+    max for as fast as possible
+
+    Parameters
+    ----------
+    value : String
+        The speed
+    Return
+    ------
+        float
+            The multiplier, or None for as fast as possible
+
+    Raises
+    ------
+        Exception:
+            Invalid replay speed
+    """
+
+    if value.strip().lower() == 'max':
+        return None
+    try:
+        speed = float(value)
+    except ValueError:
+        speed = 0.0
+    if not 0 < speed < float('inf'):
+        raise Exception("Invalid replay speed, Supplied value is : " +
+                        value + " Expected a positive multiplier or max")
+    return speed
+
+
+def replay_capture(path: str, speed: float = 1.0, seek: float = 0.0,
+                   seek_line: int = 0) -> int:
+    """replays a capture file to the network sink given by LOG_SINK, or to
+    stderr, until every line is written or a termination signal is
+    detected
+
+    Parameters
+    ----------
+    path : String
+        The capture file
+    speed : float
+        How many times faster than recorded the lines are written, None
+        for as fast as possible
+    seek : float
+        Starts with the first line recorded this many seconds after the
+        first line of the capture
+    seek_line : int
+        Starts with this line of the capture, counting from 0, when it is
+        later than seek
+    Return
+    ------
+        int
+            the exit status, 99 if the replay was stopped
+    """
+
+    killer = GracefulKiller()
+    reader = CaptureReader(path)
+    sink = sink_from_environment()
+    try:
+        first = max(reader.find_time(seek), seek_line)
+        if sink is None:
+            stream = getattr(sys.stderr, "buffer", sys.stderr)
+            replay(reader, stream, speed, first, killer)
+        else:
+            replay(reader, sink, speed, first, killer, copy=True)
+    finally:
+        reader.close()
+        if sink is not None:
+            sink.close()
+    return 99 if killer.kill_now else 0
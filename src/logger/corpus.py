@@ -0,0 +1,357 @@
+import datetime
+import gzip
+import hashlib
+import heapq
+import json
+import multiprocessing
+import os
+
+from logger.definitions import split_definition
+from logger.graceful_killer import GracefulKiller
+from logger.line_formatter import LineFormatter
+from logger.load_profiles import LoadProfile
+from logger.log_generator import LogDriver
+from logger.message_template import MessageTemplate
+from logger.unique_tokens import CounterTokenGenerator
+
+# the environment variables that would send a driver's output, or its
+# metrics, anywhere other than the shard file, or leave some of its lines
+# to other replicas
+IGNORED_VARIABLES = ("LOG_SINK", "LOG_OUTPUT", "LOG_METRICS_PORT",
+                     "LOG_BACKFILL_START", "LOG_BACKFILL_END",
+                     "LOG_UNIQUE_VERIFY", "LOG_RECORD",
+                     "LOG_REPLICA_COUNT", "LOG_REPLICA_INDEX")
+# the number of bytes of lines gathered before each write to a shard
+CHUNK_BYTES = 1048576
+
+
+def parse_size(value: str) -> int:
+    """parses a number of lines or bytes, with an optional K, M or G
+    suffix for thousands, millions or billions, e.g. 500M
+
+    Parameters
+    ----------
+    value : String
+        The size
+    Return
+    ------
+        int
+            The size
+
+    Raises
+    ------
+        Exception:
+            Invalid size
+    """
+
+    text = value.strip().upper()
+    scale = {'K': 10 ** 3, 'M': 10 ** 6, 'G': 10 ** 9}.get(text[-1:], 1)
+    if scale != 1:
+        text = text[:-1]
+    if not text.isdecimal() or int(text) < 1:
+        raise Exception("Invalid size, Supplied value is : " + value +
+                        " Expected a positive integer with an optional " +
+                        "K, M or G suffix")
+    return int(text) * scale
+
+
+def parse_integer(value: str, low: int, high: int = None) -> int:
+    """parses a whole number within a range, such as a number of shards
+
+    Parameters
+    ----------
+    value : String
+        The number
+    low : int
+        The smallest number accepted
+    high : int
+        The largest number accepted, None for no limit
+    Return
+    ------
+        int
+            The number
+
+    Raises
+    ------
+        Exception:
+            Invalid value
+    """
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or number < low or\
+            (high is not None and number > high):
+        raise Exception("Invalid value, Supplied value is : " + value +
+                        " Expected a whole number " +
+                        ("from " + str(low) + " to " + str(high)
+                         if high is not None else
+                         "of at least " + str(low)))
+    return number
+
+
+def share(total: int, index: int, count: int) -> int:
+    """returns one shard's share of a budget, the shares differing by no
+    more than one and adding up to the total, or None for no budget"""
+
+    if total is None:
+        return None
+    return total // count + (1 if index < total % count else 0)
+
+
+def derive_seed(seed: str, *parts) -> str:
+    """returns the seed for one part of a shard, so every random sequence
+    in the corpus is different but fixed by the corpus seed"""
+
+    return ':'.join([seed] + [str(part) for part in parts])
+
+
+def create_driver(index: int, count: int, file: str, seed: str,
+                  start: float) -> LogDriver:
+    """creates the LogDriver that formats one shard's lines on the direct
+    emit path against a simulated clock, with every random sequence seeded
+    from the corpus seed
+
+    Parameters
+    ----------
+    index : int
+        The shard's index, 0 to count - 1
+    count : int
+        The number of shards
+    file : String
+        The message definition file
+    seed : String
+        The corpus seed
+    start : float
+        The time of the first line in seconds since the epoch
+    """
+
+    saved = {name: os.environ.pop(name) for name in IGNORED_VARIABLES
+             if name in os.environ}
+    try:
+        driver = LogDriver(index + 1, "Shard-" + str(index + 1),
+                           GracefulKiller(False))
+    finally:
+        os.environ.update(saved)
+    driver.logger.removeHandler(driver.fh)
+    if driver.writer is not None:
+        driver.writer.close()
+        driver.writer = None
+    driver.file = file
+    driver.line_formatter = LineFormatter(driver.FORMAT_DATE)
+    instance_id = hashlib.sha256(
+        derive_seed(seed, 'tokens', index).encode()).digest()[:8]
+    driver.token_generator = CounterTokenGenerator(
+        int.from_bytes(instance_id, 'big'))
+    driver.set_backfill(start, float('inf'))
+    driver.worker_index = index
+    driver.worker_count = count
+    driver.worker_split = 'counter'
+    return driver
+
+
+def export_shard(index: int, count: int, file: str, directory: str,
+                 seed: str, start: float, lines: int = None,
+                 size: int = None, compress_level: int = 6) -> dict:
+    """writes one gzip compressed shard of a corpus.  Every shard has
+    every definition, taking every count'th counter value at count times
+    the interval as a counter split worker does, so the shards together
+    hold the same counter values and SHARED=Y sequences as a single
+    shard.  Definitions without a load profile fall at the same times as
+    in a single shard, while a load profile, which is stepped and seeded
+    for each shard, gives each shard its own times.  The lines are
+    written in time order until the shard's budget is spent or every
+    definition has reached its max_count
+
+    Parameters
+    ----------
+    index : int
+        The shard's index, 0 to count - 1
+    count : int
+        The number of shards
+    file : String
+        The message definition file
+    directory : String
+        Where the shard is written
+    seed : String
+        The corpus seed
+    start : float
+        The time of the first line in seconds since the epoch
+    lines : int
+        The number of lines in the shard, None for no limit
+    size : int
+        The number of uncompressed bytes after which the shard ends,
+        None for no limit
+    compress_level : int
+        The gzip compression level, 1 - 9
+    Return
+    ------
+        Dict
+            The shard's file name, line and byte counts and the SHA-256 of
+            its uncompressed and compressed content
+    """
+
+    driver = create_driver(index, count, file, seed, start)
+    messages = driver.partition_log_messages(driver.setup_log_messages())
+    for position, current_message in enumerate(messages):
+        if current_message.template is not None:
+            current_message.template = MessageTemplate.compile(
+                current_message.message_text,
+                derive_seed(seed, 'template', index, position))
+        if current_message.profile is not None:
+            current_message.profile = LoadProfile.parse(
+                split_definition(current_message.definition)[7],
+                derive_seed(seed, 'profile', index, position))
+    # the next line of each definition in time order, definitions that
+    # are due together are written in the order of the file.  The shard's
+    # first counter value is due index + 1 intervals after the start, so
+    # without a load profile the shards' lines fall at the same times as
+    # a single shard's
+    due = []
+    for position, current_message in enumerate(messages):
+        interval = current_message.frequency / count
+        first = start
+        for _ in range(index + 1):
+            if current_message.profile is None:
+                first += interval
+            else:
+                first = current_message.profile.next_time(first, interval)
+        due.append((first, position))
+    heapq.heapify(due)
+
+    name = "shard-%05d-of-%05d.log.gz" % (index, count)
+    content = hashlib.sha256()
+    written_lines = 0
+    written_bytes = 0
+    lines_left = float('inf') if lines is None else lines
+    bytes_left = float('inf') if size is None else size
+    clock = driver.clock
+    with open(os.path.join(directory, name), 'wb') as raw:
+        # no file name or time in the gzip header, so the output only
+        # depends on the lines
+        with gzip.GzipFile(filename='', mode='wb', fileobj=raw,
+                           compresslevel=compress_level, mtime=0) as output:
+            chunk = []
+            chunk_bytes = 0
+            while due and lines_left > 0 and bytes_left > 0:
+                when, position = due[0]
+                current_message = messages[position]
+                clock.now = when
+                line = driver.format_direct(current_message)
+                chunk.append(line)
+                chunk_bytes += len(line)
+                lines_left -= 1
+                bytes_left -= len(line)
+                if driver.is_exhausted(current_message):
+                    heapq.heappop(due)
+                else:
+                    heapq.heapreplace(
+                        due, (current_message.next_time(when), position))
+                if chunk_bytes >= CHUNK_BYTES or not due or\
+                        lines_left <= 0 or bytes_left <= 0:
+                    data = b''.join(chunk)
+                    output.write(data)
+                    content.update(data)
+                    written_lines += len(chunk)
+                    written_bytes += chunk_bytes
+                    chunk = []
+                    chunk_bytes = 0
+    compressed = hashlib.sha256()
+    with open(os.path.join(directory, name), 'rb') as raw:
+        for block in iter(lambda: raw.read(CHUNK_BYTES), b''):
+            compressed.update(block)
+    return {"file": name, "lines": written_lines, "bytes": written_bytes,
+            "sha256": content.hexdigest(),
+            "gzip_sha256": compressed.hexdigest()}
+
+
+def export_shard_arguments(arguments: tuple) -> dict:
+    """runs export_shard with a tuple of arguments, for a process pool"""
+
+    return export_shard(*arguments)
+
+
+def export_corpus(file: str, directory: str, seed: str = "0",
+                  lines: int = None, size: int = None, shards: int = 1,
+                  start: str = "2020-01-01T00:00:00", processes: int = None,
+                  compress_level: int = 6) -> dict:
+    """exports a corpus of log lines generated from a message definition
+    file, as gzip compressed shard files written in parallel and a
+    manifest.json of their counts and checksums.  The lines are formatted
+    exactly as the generator writes them, against a simulated clock, so
+    nothing waits on the wall clock, and every random sequence is seeded
+    from the seed, so exporting twice with the same arguments, time zone
+    and definitions gives byte for byte the same files
+
+    Parameters
+    ----------
+    file : String
+        The message definition file
+    directory : String
+        Where the shards and manifest are written, created if needed
+    seed : String
+        Seeds every random sequence in the corpus
+    lines : int
+        The number of lines in the corpus, shared between the shards
+    size : int
+        The number of uncompressed bytes, shared between the shards, each
+        shard ending with the line that reaches its share
+    shards : int
+        The number of shard files
+    start : String
+        The ISO 8601 date time of the first line
+    processes : int
+        The number of shards written at once, defaults to the number of
+        CPUs
+    compress_level : int
+        The gzip compression level, 1 - 9
+    Return
+    ------
+        Dict
+            The manifest
+
+    Raises
+    ------
+        Exception:
+            Invalid number of shards, start, budget or compression level
+    """
+
+    if shards < 1:
+        raise Exception("Invalid number of shards, Supplied value is : " +
+                        str(shards) + " Expected a positive integer")
+    if not 1 <= compress_level <= 9:
+        raise Exception("Invalid compression level, Supplied value is : " +
+                        str(compress_level) + " Expected 1 - 9")
+    if lines is None and size is None:
+        raise Exception("Invalid corpus budget, Expected a number of " +
+                        "lines or bytes")
+    try:
+        first = datetime.datetime.fromisoformat(start).timestamp()
+    except ValueError:
+        raise Exception("Invalid start, Supplied value is : " + start +
+                        " Expected an ISO 8601 date time")
+    os.makedirs(directory, exist_ok=True)
+    arguments = [(index, shards, file, directory, seed, first,
+                  share(lines, index, shards), share(size, index, shards),
+                  compress_level) for index in range(shards)]
+    processes = min(shards, processes or os.cpu_count() or 1)
+    if processes == 1:
+        results = [export_shard(*shard) for shard in arguments]
+    else:
+        # the shards are written by fresh processes, a fork of a process
+        # running other threads can deadlock on a lock held by one of them
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            results = pool.map(export_shard_arguments, arguments)
+
+    with open(file, 'rb') as definitions:
+        definitions_sha256 = hashlib.sha256(definitions.read()).hexdigest()
+    manifest = {"definitions": os.path.basename(file),
+                "definitions_sha256": definitions_sha256,
+                "seed": seed, "start": start, "shards": results,
+                "lines": sum(result["lines"] for result in results),
+                "bytes": sum(result["bytes"] for result in results)}
+    with open(os.path.join(directory, "manifest.json"), 'w') as output:
+        json.dump(manifest, output, indent=2, sort_keys=True)
+        output.write('\n')
+    return manifest
@@ -0,0 +1,241 @@
+import csv
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+
+from logger.log_message import LogMessage
+
+# where the files named by MESSAGE_DEFINITIONS are, from the src directory
+DIRECTORY = 'logger/message_definitions'
+# changes whenever the compiled definitions change, so caches written by
+# an earlier version are not used
+CACHE_VERSION = 1
+# the columns of a definition, the last two are optional
+REQUIRED_FIELDS = 6
+MAX_FIELDS = 8
+# the number of invalid lines reported before the rest are only counted
+MAX_ERRORS = 10
+# the number of bytes read at once when hashing a definition file
+CHUNK_BYTES = 1048576
+
+
+def definition_files(value: str) -> list:
+    """returns the definition files named by a MESSAGE_DEFINITIONS value, a
+    comma separated list of file names and glob patterns such as apps/*,
+    relative to DIRECTORY unless they are absolute.  The files matching a
+    pattern are taken in order of name, leaving out directories and names
+    starting with _ or ., such as __init__.py
+
+    Parameters
+    ----------
+    value : String
+        The file names and patterns
+    Return
+    ------
+        List
+            The paths of the definition files
+
+    Raises
+    ------
+        Exception:
+            Invalid value for MESSAGE_DEFINITIONS, nothing is named or a
+            pattern matches no files
+    """
+
+    files = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        path = os.path.join(DIRECTORY, name)
+        if not any(character in name for character in '*?['):
+            files.append(path)
+            continue
+        matches = sorted(match for match in glob.glob(path)
+                         if os.path.isfile(match) and
+                         not os.path.basename(match).startswith('_'))
+        if not matches:
+            raise Exception("Invalid value for MESSAGE_DEFINITIONS, " +
+                            "Supplied value is : " + value + " Expected " +
+                            name + " to match at least one file")
+        files.extend(matches)
+    if not files:
+        raise Exception("Invalid value for MESSAGE_DEFINITIONS, " +
+                        "Supplied value is : " + value +
+                        " Expected a file name, a glob pattern or a " +
+                        "comma separated list of them")
+    return files
+
+
+def split_definition(line: str) -> list:
+    """splits a definition line into its fields.  A field in double quotes
+    may contain commas, with "" for a double quote inside it
+
+    Parameters
+    ----------
+    line : String
+        The definition line, without its line terminator
+    Return
+    ------
+        List
+            The fields
+
+    Raises
+    ------
+        csv.Error:
+            A quoted field is not closed, or is followed by more text
+    """
+
+    if '"' not in line:
+        # most lines have no quotes and need nothing more than a split
+        return line.split(',')
+    return next(csv.reader((line,), strict=True))
+
+
+def parse_definitions(file, path: str, digest=None):
+    """reads a definition file a line at a time, yielding a LogMessage for
+    each definition as it is read.  Blank lines are ignored.  Every invalid
+    line is reported, with its line number, once the whole file is read
+
+    Parameters
+    ----------
+    file : stream
+        The definition file, opened in binary mode
+    path : String
+        The definition file's name, for the errors
+    digest : hashlib hash
+        When supplied, updated with every byte of the file
+    Return
+    ------
+        generator
+            The LogMessage for each definition
+
+    Raises
+    ------
+        Exception:
+            Invalid message definitions, with the line number and problem
+            of each invalid line
+    """
+
+    errors = []
+    invalid = 0
+    for number, raw in enumerate(file, 1):
+        if digest is not None:
+            digest.update(raw)
+        try:
+            line = raw.decode().rstrip('\r\n')
+            if not line.strip():
+                continue
+            fields = split_definition(line)
+            if not REQUIRED_FIELDS <= len(fields) <= MAX_FIELDS:
+                raise Exception(
+                    "Expected " + str(REQUIRED_FIELDS) + " - " +
+                    str(MAX_FIELDS) + " comma separated fields, found " +
+                    str(len(fields)) + ", put a MESSAGE_TEXT that " +
+                    "contains commas in double quotes")
+            message = LogMessage(*fields)
+        except Exception as error:
+            invalid += 1
+            if len(errors) < MAX_ERRORS:
+                errors.append("line " + str(number) + " : " + str(error))
+            continue
+        message.definition = line
+        yield message
+    if invalid:
+        if invalid > len(errors):
+            errors.append("and " + str(invalid - len(errors)) +
+                          " more invalid lines")
+        raise Exception("Invalid message definitions, Supplied value is : " +
+                        path + "\n" + "\n".join(errors))
+
+
+def hash_file(path: str) -> str:
+    """returns the SHA-256 of a file's content, read in chunks"""
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_cache(path: str) -> list:
+    """returns the compiled definitions in a cache file, or None if there
+    is no usable cache"""
+
+    try:
+        with open(path, 'rb') as file:
+            version, compiled = pickle.load(file)
+    except (OSError, EOFError, ValueError, TypeError,
+            pickle.UnpicklingError):
+        return None
+    if version != CACHE_VERSION:
+        return None
+    return compiled
+
+
+def write_cache(path: str, compiled: list):
+    """writes compiled definitions to a cache file, replacing it in one
+    step so a reader never sees part of a file.  A cache that cannot be
+    written, e.g. on a read-only file system, is left out"""
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            pickle.dump((CACHE_VERSION, compiled), file,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def read_definitions(path: str, cache: str = None) -> list:
+    """reads the LogMessages of a definition file.  With a cache
+    directory, the validated definitions are kept in a file named after
+    the SHA-256 of the definition file, and are used instead of parsing
+    the file again for as long as its content is unchanged
+
+    Parameters
+    ----------
+    path : String
+        The definition file
+    cache : String
+        The directory of the compiled definition caches, None for no
+        cache
+    Return
+    ------
+        List
+            The LogMessage for each definition, in the order of the file
+
+    Raises
+    ------
+        Exception:
+            Invalid message definitions
+    """
+
+    if cache is None:
+        with open(path, 'rb') as file:
+            return list(parse_definitions(file, path))
+    compiled = read_cache(os.path.join(
+        cache, 'definitions-' + hash_file(path) + '.cache'))
+    if compiled is not None:
+        return [LogMessage.from_compiled(values) for values in compiled]
+    # the file is hashed as it is parsed, so the cache is named after the
+    # content that was parsed even if the file is replaced meanwhile
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        messages = list(parse_definitions(file, path, digest))
+    write_cache(os.path.join(cache, 'definitions-' + digest.hexdigest() +
+                             '.cache'),
+                [message.compiled() for message in messages])
+    return messages
@@ -0,0 +1,298 @@
+import concurrent.futures
+import math
+import os
+import queue
+import threading
+import time
+
+
+class FileSink():
+    """FileSink is a write-only stream that writes the log lines written to
+       it to a series of segment files, path.000001, path.000002 and so on,
+       for generating large volumes of logs to disk
+
+       Each write is one batch of complete lines.  Batches are queued and
+       written by a writer thread, so the scheduling loop never waits for
+       the disk unless the queue is full.  The writer gathers the lines
+       into chunks and writes whole chunks, so every write is chunk_bytes
+       long and starts at a multiple of chunk_bytes, only the end of a
+       segment being shorter
+
+       A new segment is started, between batches, once the segment holds
+       rotate_bytes or has been open for rotate_seconds.  Each segment can
+       be preallocated to rotate_bytes when it is opened, and is truncated
+       to its length, fsynced and closed on a separate thread once it is
+       complete, the only fsync for each segment
+
+       Attributes
+       ----------
+       path : String
+           The path the segment numbers are appended to
+       rotate_bytes : int
+           The size a segment is rotated at
+       rotate_seconds : float
+           The age a segment is rotated at, 0 to rotate by size only
+       chunk_bytes : int
+           The size of each write
+       preallocate : bool
+           Whether each segment is preallocated to rotate_bytes
+       bytes_written : int
+           The number of bytes written to every segment
+       segments : int
+           The number of segments opened
+       rotation_seconds : List
+           How long each rotation held up writing, opening and
+           preallocating the next segment
+       sync_seconds : List
+           How long each segment took to truncate, fsync and close
+       error : OSError
+           The error that stopped the sink writing, if any, any later
+           lines are dropped
+
+       Methods
+       -------
+       write(data)
+            queues a batch of lines to be written
+       flush()
+            does nothing, lines are written as whole chunks
+       close()
+            writes the queued lines and closes the last segment
+       report()
+            describes the bytes written and the rotation latency
+    """
+
+    QUEUE_SIZE = 64
+
+    def __init__(self, path: str, rotate_bytes: int = 256 * 1024 * 1024,
+                 rotate_seconds: float = 0, chunk_bytes: int = 1024 * 1024,
+                 preallocate: bool = False):
+        """
+        Parameters
+        ----------
+        path : String
+            The path the segment numbers are appended to
+        rotate_bytes : int
+            The size a segment is rotated at
+        rotate_seconds : float
+            The age a segment is rotated at, 0 to rotate by size only
+        chunk_bytes : int
+            The size of each write
+        preallocate : bool
+            Whether each segment is preallocated to rotate_bytes
+        """
+
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.chunk_bytes = chunk_bytes
+        self.preallocate = preallocate and hasattr(os, 'posix_fallocate')
+        self.bytes_written = 0
+        self.segments = 0
+        self.rotation_seconds = []
+        self.sync_seconds = []
+        self.error = None
+        self.chunk = bytearray()
+        self.segment = None
+        self.segment_bytes = 0
+        self.segment_opened = 0.0
+        self.batches = queue.Queue(self.QUEUE_SIZE)
+        self.closer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="log-file-closer")
+        self.writer = threading.Thread(target=self.write_batches,
+                                       name="log-file-writer", daemon=True)
+        self.writer.start()
+
+    def write(self, data):
+        """queues a batch of lines to be written, waiting if the queue is
+        full
+
+        Parameters
+        ----------
+        data : bytes or String
+            one or more complete log lines
+        """
+
+        if isinstance(data, str):
+            data = data.encode()
+        if data:
+            self.batches.put(data)
+
+    def flush(self):
+        """does nothing, lines are written as whole chunks"""
+
+    def close(self, timeout: float = None):
+        """writes the queued lines and closes the last segment
+
+        Parameters
+        ----------
+        timeout : float
+            The number of seconds allowed for the queued lines, None to
+            wait until they are written
+        """
+
+        self.batches.put(None)
+        self.writer.join(timeout)
+        # when the time is up the writer thread is left with the lines it
+        # has not written, and close returns without waiting for the
+        # closer thread to truncate, fsync and close the segments it has
+        # been given
+        self.closer.shutdown(wait=not self.writer.is_alive())
+
+    def write_batches(self):
+        """writes each queued batch in turn, runs on the writer thread until
+        the sink is closed"""
+
+        while True:
+            data = self.batches.get()
+            if data is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                self.write_batch(data)
+            except OSError as error:
+                self.error = error
+                if self.segment is not None:
+                    os.close(self.segment)
+                    self.segment = None
+        if self.segment is not None and self.error is None:
+            self.close_segment()
+
+    def write_batch(self, data: bytes):
+        """adds a batch to the current segment, starting a new segment
+        first when the current one is due to be rotated"""
+
+        if self.segment is None:
+            self.open_segment()
+        elif self.segment_bytes >= self.rotate_bytes or\
+                (self.rotate_seconds and time.monotonic() -
+                 self.segment_opened >= self.rotate_seconds):
+            started = time.perf_counter()
+            self.close_segment()
+            self.open_segment()
+            self.rotation_seconds.append(time.perf_counter() - started)
+        self.chunk += data
+        self.segment_bytes += len(data)
+        self.bytes_written += len(data)
+        if len(self.chunk) >= self.chunk_bytes:
+            self.write_chunks()
+
+    def write_chunks(self):
+        """writes as many whole chunks as have been gathered"""
+
+        size = len(self.chunk) - len(self.chunk) % self.chunk_bytes
+        view = memoryview(self.chunk)
+        for start in range(0, size, self.chunk_bytes):
+            self.write_all(view[start:start + self.chunk_bytes])
+        view.release()
+        del self.chunk[:size]
+
+    def write_all(self, data):
+        """writes all of data to the current segment"""
+
+        while data:
+            data = data[os.write(self.segment, data):]
+
+    def open_segment(self):
+        """opens the next segment, preallocating it when requested"""
+
+        self.segments += 1
+        self.segment = os.open(self.path + '.%06d' % self.segments,
+                               os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        if self.preallocate:
+            try:
+                os.posix_fallocate(self.segment, 0, self.rotate_bytes)
+            except OSError:
+                # not supported by the file system
+                self.preallocate = False
+        self.segment_bytes = 0
+        self.segment_opened = time.monotonic()
+
+    def close_segment(self):
+        """writes the rest of the current segment, then hands it to the
+        closer thread to be truncated, fsynced and closed"""
+
+        if self.chunk:
+            self.write_all(memoryview(self.chunk))
+            self.chunk = bytearray()
+        self.closer.submit(self.sync_segment, self.segment,
+                           self.segment_bytes, self.preallocate)
+        self.segment = None
+
+    def sync_segment(self, segment: int, length: int, truncate: bool):
+        """truncates a complete segment to its length, removing any
+        preallocated space that was not used, fsyncs and closes it, runs
+        on the closer thread"""
+
+        started = time.perf_counter()
+        try:
+            if truncate:
+                os.ftruncate(segment, length)
+            os.fsync(segment)
+        finally:
+            os.close(segment)
+        self.sync_seconds.append(time.perf_counter() - started)
+
+    def report(self) -> str:
+        """describes the bytes written and the rotation latency"""
+
+        rotations = self.rotation_seconds or [0]
+        syncs = self.sync_seconds or [0]
+        if self.error is not None:
+            return "File sink : stopped writing after " +\
+                str(self.bytes_written) + " bytes, " + str(self.error)
+        return ("File sink : " + str(self.bytes_written) +
+                " bytes written to " + str(self.segments) +
+                " segments, rotation latency max " +
+                "%.3f ms" % (max(rotations) * 1000) +
+                ", segment fsync max " + "%.3f ms" % (max(syncs) * 1000))
+
+
+def create_file_sink(path: str) -> FileSink:
+    """creates a FileSink for a path, configured by the environment
+    variables:
+        LOG_FILE_ROTATE_BYTES    - the size a segment is rotated at
+                                   (default 268435456)
+        LOG_FILE_ROTATE_SECONDS  - the age a segment is rotated at, 0 (the
+                                   default) to rotate by size only
+        LOG_FILE_CHUNK_BYTES     - the size of each write (default 1048576)
+        LOG_FILE_PREALLOCATE     - Y to preallocate each segment (default N)
+
+    Parameters
+    ----------
+    path : String
+        The path the segment numbers are appended to
+    Return
+    ------
+        FileSink
+            the sink
+
+    Raises
+    ------
+        Exception:
+            Invalid value for a LOG_FILE_ variable
+    """
+
+    settings = {}
+    for name, default in (("LOG_FILE_ROTATE_BYTES", "268435456"),
+                          ("LOG_FILE_ROTATE_SECONDS", "0"),
+                          ("LOG_FILE_CHUNK_BYTES", "1048576")):
+        value = os.environ.get(name, default)
+        try:
+            number = float(value) if name.endswith("SECONDS") else int(value)
+        except ValueError:
+            number = -1
+        if number < 0 or not math.isfinite(number) or\
+                (number == 0 and name.endswith("BYTES")):
+            raise Exception("Invalid value for " + name + ", " +
+                            "Supplied value is : " + value +
+                            " Expected a positive number")
+        settings[name] = number
+    preallocate = os.environ.get("LOG_FILE_PREALLOCATE", "N").upper()
+    if preallocate not in ("Y", "N"):
+        raise Exception("Invalid value for LOG_FILE_PREALLOCATE, " +
+                        "Supplied value is : " + preallocate +
+                        " Expected Y|N")
+    return FileSink(path, settings["LOG_FILE_ROTATE_BYTES"],
+                    settings["LOG_FILE_ROTATE_SECONDS"],
+                    settings["LOG_FILE_CHUNK_BYTES"], preallocate == "Y")
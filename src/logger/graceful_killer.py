@@ -1,4 +1,5 @@
 import signal
+import threading
 
 
 class GracefulKiller:
@@ -15,19 +16,108 @@ class GracefulKiller:
     -------
     exit_gracefully(signum, frame)
         sets kill_now to true when a termination signal is detected
+    wait(timeout)
+        waits for timeout seconds, returning as soon as kill_now is set
     """
 
-    kill_now = False
-
-    def __init__(self):
+    def __init__(self, handle_signals: bool = True):
         """creates triggers to gracefully shutdown log-generator when a
         termination signal is detected.
+
+        Parameters
+        ----------
+        handle_signals : bool
+            whether to handle SIGINT and SIGTERM, when false kill_now is
+            only set by whatever owns the killer, such as an event loop
         """
 
-        signal.signal(signal.SIGINT, self.exit_gracefully)
-        signal.signal(signal.SIGTERM, self.exit_gracefully)
+        self.killed = False
+        # a reentrant lock, as the signal handler runs on the main thread,
+        # which may be holding it in wait
+        self.condition = threading.Condition(threading.RLock())
+        if handle_signals:
+            signal.signal(signal.SIGINT, self.exit_gracefully)
+            signal.signal(signal.SIGTERM, self.exit_gracefully)
+
+    @property
+    def kill_now(self):
+        """true when a termination signal has been detected."""
+
+        return self.killed
+
+    @kill_now.setter
+    def kill_now(self, value):
+        """wakes every thread waiting in wait when set to true."""
+
+        with self.condition:
+            self.killed = value
+            self.condition.notify_all()
 
     def exit_gracefully(self, signum, frame):
         """sets kill_now to true when a termination signal is detected."""
 
         self.kill_now = True
+
+    def wait(self, timeout: float) -> bool:
+        """waits for timeout seconds, or until kill_now is set, so a
+        termination signal is acted on straight away rather than once the
+        wait is over
+
+        Parameters
+        ----------
+        timeout : float
+            the number of seconds to wait
+        Return
+        ------
+            bool
+                kill_now
+        """
+
+        with self.condition:
+            return self.condition.wait_for(lambda: self.killed, timeout)
+
+
+class EventKiller:
+    """this class implements termination detection for a worker process,
+    where the parent process owns signal handling and requests a graceful
+    shutdown by setting a shared multiprocessing Event.
+
+    Attributes
+    ----------
+    kill_now : bool
+        a bool representing whether the parent process has requested a
+        shutdown, setting it to true requests a shutdown of every worker
+    """
+
+    def __init__(self, event):
+        """ignores termination signals, which are handled by the parent
+        process, and watches the supplied Event instead.
+
+        Parameters
+        ----------
+        event : multiprocessing.Event
+            the Event set by the parent process to request a shutdown
+        """
+
+        self.event = event
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    @property
+    def kill_now(self):
+        """true when a shutdown has been requested."""
+
+        return self.event.is_set()
+
+    @kill_now.setter
+    def kill_now(self, value):
+        """requests a shutdown of every worker when set to true."""
+
+        if value:
+            self.event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """waits for timeout seconds, or until a shutdown is requested,
+        returning kill_now"""
+
+        return self.event.wait(timeout)
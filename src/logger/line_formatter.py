@@ -0,0 +1,88 @@
+import time
+
+
+class LineFormatter():
+    """LineFormatter formats log lines directly to bytes, producing exactly
+       the same output as the logging module's
+       '%(asctime)s.%(msecs)03d %(levelname)s %(message)s' format
+       without creating a LogRecord for each line
+
+       The date and time prefix only changes once a second, so it is
+       rendered once per second and the milliseconds are spliced in from a
+       precomputed table
+
+       Attributes
+       ----------
+       date_format : String
+           The strftime format of the date and time prefix
+       level : bytes
+           The encoded level name and the spaces around it
+
+       Methods
+       -------
+       prefix(created: float)
+            returns the encoded date and time prefix
+       encode_suffix(text: str)
+            returns the encoded level, message text and line terminator
+       format(created: float, text: str)
+            returns the complete encoded log line
+    """
+
+    def __init__(self, date_format: str, level_name: str = 'ERROR'):
+        """
+        Parameters
+        ----------
+        date_format : String
+            The strftime format of the date and time prefix
+        level_name : String
+            The level name written on every line
+        """
+
+        self.date_format = date_format
+        self.level = (' ' + level_name + ' ').encode()
+        self.milliseconds = tuple(('.%03d' % msecs).encode()
+                                  for msecs in range(1000))
+        self.second = None
+        self.second_prefix = b''
+
+    def prefix(self, created: float) -> bytes:
+        """returns the encoded date and time prefix, with milliseconds
+
+        Parameters
+        ----------
+        created : float
+            The time of the line in seconds since the epoch
+        """
+
+        second = int(created)
+        if second != self.second:
+            self.second = second
+            self.second_prefix = time.strftime(
+                self.date_format, time.localtime(created)).encode()
+        return self.second_prefix +\
+            self.milliseconds[int((created - second) * 1000)]
+
+    def encode_suffix(self, text: str) -> bytes:
+        """returns the encoded level, message text and line terminator,
+        which can be encoded once for a message text that never changes
+
+        Parameters
+        ----------
+        text : String
+            The message text
+        """
+
+        return self.level + text.encode() + b'\n'
+
+    def format(self, created: float, text: str) -> bytes:
+        """returns the complete encoded log line
+
+        Parameters
+        ----------
+        created : float
+            The time of the line in seconds since the epoch
+        text : String
+            The message text
+        """
+
+        return self.prefix(created) + self.level + text.encode() + b'\n'
@@ -0,0 +1,260 @@
+import math
+import random
+import re
+import time
+
+
+class LoadProfile():
+    """LoadProfile shapes the rate of a message over time, rather than
+       writing it at a flat frequency
+
+       The shapes are:
+           flat                            the message frequency
+           ramp:seconds:from-to            the rate goes from from times to
+                                           to times the message rate over
+                                           seconds, then holds
+           burst:factor:seconds:every      factor times the rate for the
+                                           first seconds of every every
+                                           seconds
+           sine:period:low-high            the rate rises and falls between
+                                           low and high times the message
+                                           rate every period seconds,
+                                           starting at low
+           diurnal:low-high[:peak hour]    the rate follows the local time
+                                           of day, highest at peak hour
+                                           (default 14) and lowest twelve
+                                           hours later
+       with +poisson (or just poisson for a flat rate) for exponentially
+       distributed intervals with the same mean, as arrivals from many
+       independent clients would be
+
+       The time of each message is found by consuming one frequency of
+       "flat" time, weighted by the rate multiplier, so a burst or peak is
+       never stepped over by a long interval.  Curves are followed in STEPS
+       steps of their period with the multiplier held for each step, so the
+       multiplier is computed once per step rather than once per message
+       and high rates cost no more than flat ones
+
+       Attributes
+       ----------
+       shape : String
+           The name of the shape
+       arguments : Tuple
+           The parsed numbers of the shape
+       poisson : bool
+           Whether the intervals are exponentially distributed
+       origin : float
+           The time the profile started, the first time it is used
+
+       Methods
+       -------
+       parse(text: str)
+            parses a PROFILE value, returning None for a flat rate
+       next_time(when: float, frequency: float)
+            returns the time of the message after one at when
+       multiplier(when: float)
+            returns the rate multiplier at a time
+    """
+
+    NUMBER = r'(\d+(?:\.\d*)?|\.\d+)'
+    ARGUMENTS = {
+        'flat': re.compile(r'$'),
+        'ramp': re.compile(NUMBER + ':' + NUMBER + '-' + NUMBER + '$'),
+        'burst': re.compile(NUMBER + ':' + NUMBER + ':' + NUMBER + '$'),
+        'sine': re.compile(NUMBER + ':' + NUMBER + '-' + NUMBER + '$'),
+        'diurnal': re.compile(NUMBER + '-' + NUMBER + '(?::' + NUMBER +
+                              ')?$')}
+    STEPS = 100
+    DAY = 86400.0
+
+    def __init__(self, shape: str, arguments: tuple = (),
+                 poisson: bool = False, seed: str = None):
+        """
+        Parameters
+        ----------
+        shape : String
+            The name of the shape
+        arguments : Tuple
+            The parsed numbers of the shape
+        poisson : bool
+            Whether the intervals are exponentially distributed
+        seed : String
+            Seeds the poisson intervals, defaults to a random seed
+        """
+
+        self.shape = shape
+        self.arguments = arguments
+        self.poisson = poisson
+        self.random = random.Random(seed)
+        self.origin = None
+        self.step_start = 0.0
+        self.step_end = 0.0
+        self.rate = 1.0
+
+    @classmethod
+    def parse(cls, text: str, seed: str = None):
+        """parses a PROFILE value into a LoadProfile
+
+        Parameters
+        ----------
+        text : String
+            The profile, a shape with optional +poisson
+        seed : String
+            Seeds the poisson intervals, defaults to a random seed
+        Return
+        ------
+            LoadProfile
+                the profile, or None for a flat rate, which is scheduled
+                at the message frequency as it is
+
+        Raises
+        ------
+            Exception:
+                Invalid value for PROFILE
+        """
+
+        value = text.strip().lower()
+        poisson = value == 'poisson' or value.endswith('+poisson')
+        if value == 'poisson':
+            value = 'flat'
+        elif poisson:
+            value = value[:-len('+poisson')]
+        shape, _, arguments = (value or 'flat').partition(':')
+        parsed = cls.parse_arguments(shape, arguments)
+        if parsed is None:
+            raise Exception("Invalid value for PROFILE, " +
+                            "Supplied value is : " + text +
+                            " Expected flat, ramp:seconds:from-to, " +
+                            "burst:factor:seconds:every, " +
+                            "sine:period:low-high or " +
+                            "diurnal:low-high[:peak hour], " +
+                            "with optional +poisson")
+        if shape == 'flat' and not poisson:
+            return None
+        return cls(shape, parsed, poisson, seed)
+
+    @classmethod
+    def parse_arguments(cls, shape: str, arguments: str) -> tuple:
+        """parses the arguments of a shape
+
+        Return
+        ------
+            Tuple
+                the numbers of the shape, or None if they are not valid
+        """
+
+        pattern = cls.ARGUMENTS.get(shape)
+        match = pattern.match(arguments) if pattern is not None else None
+        if match is None:
+            return None
+        numbers = tuple(float(number) for number in match.groups()
+                        if number is not None)
+        if shape == 'diurnal':
+            # the peak hour is the only number that can be 0
+            if len(numbers) == 2:
+                numbers += (14.0,)
+            if not (numbers[0] > 0 and numbers[1] > 0 and numbers[2] < 24):
+                return None
+        elif not all(number > 0 for number in numbers):
+            return None
+        if shape == 'burst' and numbers[1] >= numbers[2]:
+            return None
+        return numbers
+
+    def next_time(self, when: float, frequency: float) -> float:
+        """returns the time of the message after one at when
+
+        Parameters
+        ----------
+        when : float
+            The time of the previous message, or when the message started
+        frequency : float
+            The interval between messages at a multiplier of 1
+        """
+
+        if self.origin is None:
+            self.origin = when
+        if self.poisson:
+            remaining = self.random.expovariate(1.0 / frequency)
+        else:
+            remaining = frequency
+        while True:
+            if not self.step_start <= when < self.step_end:
+                self.find_step(when)
+            available = (self.step_end - when) * self.rate
+            if available >= remaining:
+                return when + remaining / self.rate
+            remaining -= available
+            when = self.step_end
+
+    def multiplier(self, when: float) -> float:
+        """returns the rate multiplier at a time
+
+        Parameters
+        ----------
+        when : float
+            The time in seconds since the epoch
+        """
+
+        if self.origin is None:
+            self.origin = when
+        if not self.step_start <= when < self.step_end:
+            self.find_step(when)
+        return self.rate
+
+    def find_step(self, when: float):
+        """finds the step of the profile a time falls in, and the multiplier
+        held for it"""
+
+        if self.shape == 'flat':
+            self.set_step(-math.inf, math.inf, 1.0)
+        elif self.shape == 'ramp':
+            seconds, start, end = self.arguments
+            if when >= self.origin + seconds:
+                self.set_step(self.origin + seconds, math.inf, end)
+            else:
+                step, first, last = self.grid(when, self.origin,
+                                              seconds / self.STEPS)
+                self.set_step(first, last, start + (end - start) *
+                              (step + 0.5) / self.STEPS)
+        elif self.shape == 'burst':
+            factor, seconds, every = self.arguments
+            period, first, last = self.grid(when, self.origin, every)
+            if when < first + seconds:
+                self.set_step(first, first + seconds, factor)
+            else:
+                self.set_step(first + seconds, last, 1.0)
+        elif self.shape == 'sine':
+            period, low, high = self.arguments
+            step, first, last = self.grid(when, self.origin,
+                                          period / self.STEPS)
+            phase = (step + 0.5) / self.STEPS
+            self.set_step(first, last, low + (high - low) *
+                          (1 - math.cos(2 * math.pi * phase)) / 2)
+        else:
+            low, high, peak = self.arguments
+            # steps are aligned to the local day, whatever the start time
+            offset = time.localtime(when).tm_gmtoff
+            step, first, last = self.grid(when + offset, 0.0,
+                                          self.DAY / self.STEPS)
+            hour = ((step + 0.5) * self.DAY / self.STEPS) % self.DAY / 3600
+            self.set_step(first - offset, last - offset, low + (high - low) *
+                          (1 + math.cos(2 * math.pi * (hour - peak) / 24)) /
+                          2)
+
+    def grid(self, when: float, origin: float, length: float) -> tuple:
+        """returns the number, start and end of the step of length seconds
+        from origin that a time falls in"""
+
+        step = math.floor((when - origin) / length)
+        # allow for rounding at the edges of a step
+        if origin + step * length > when:
+            step -= 1
+        elif origin + (step + 1) * length <= when:
+            step += 1
+        return step, origin + step * length, origin + (step + 1) * length
+
+    def set_step(self, start: float, end: float, rate: float):
+        self.step_start = start
+        self.step_end = end
+        self.rate = rate
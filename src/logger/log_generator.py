@@ -1,13 +1,26 @@
 import logging
+import math
 import time
-import sched
 import threading
 import sys
 import traceback
 import os
+import datetime
+import socket
 
+from logger.capture import CaptureFile, RecordingWriter
+from logger.definitions import read_definitions
 from logger.graceful_killer import GracefulKiller
 from logger.log_message import LogMessage
+from logger.log_writer import BufferedLogWriter, DirectLogWriter,\
+    QueuedLogWriter
+from logger.metrics import DriverMetrics, MetricsServer
+from logger.line_formatter import LineFormatter
+from logger.network_sinks import NetworkSink, sink_from_environment
+from logger.scheduler import HeapScheduler, TimingWheelScheduler
+from logger.stack_traces import StackTraceLibrary
+from logger.virtual_clock import VirtualClock
+from logger.unique_tokens import BloomFilter, CounterTokenGenerator
 
 
 class LogDriver(threading.Thread):
@@ -29,19 +42,53 @@ class LogDriver(threading.Thread):
         log message to generate and determines whether a subsequent
         event it to be raised based on the number of previous
         messages created
+    format_message(self, type)
+        returns the message text for the supplied LogMessage instance
     schedule_next_event(self, type)
         Creates a new timer event from the suplied LogMessage instance
+    emit(self, text)
+        writes a message text to the log
+    format_line(self, text)
+        formats a message text as a complete log line
+    format_direct(self, type)
+        formats the next message as an encoded line on the direct path
+    start_ticks(self, log_messages)
+        Sets up the first tick event for tick batched emission
+    print_tick(self)
+        writes every message that is due in the current tick as a batch
+    write_due(self, type, now, format_line, batch)
+        adds the lines that are due to a batch, catching up as set by
+        LOG_CATCH_UP
+    schedule_report(self)
+        describes the drift and the lines skipped to catch up
+    wait(self, seconds):
+        waits for the next event, stopping as soon as a termination
+        signal is detected
     checkDepth(self):
         Checks the Timer event queue to make sure
         it does not have too many events active
+    schedule_log_messages(self):
+        reads the message definitions and schedules their first events
     setup_log_messages(self):
         using the file name supplied in the MESSAGE_DEFINITIONS
         environment variable.  It reads in the appropriate message definition
         file and creates a List of LogMessage objects
+    set_backfill(self, start, end):
+        runs against a simulated clock from start to end
+    check_definitions(self):
+        reloads the message definitions when the file has changed
+    reload_log_messages(self):
+        applies the changes in the message definition file
+    partition_log_messages(self, log_messages):
+        selects the LogMessages generated by this replica and worker
+    split_counters(self, log_messages, index, count):
+        takes a share of the counter values of the LogMessages
     run(self):
         Calls the setup_log_messages function to craete the LogMessage
             instances.
         Sets up the necessary events for each LogMessage
+    capture_stack_trace(self):
+        raises a real exception once to capture the default stack trace
     level1(self):
         Entry stack trace method
     level2(self):
@@ -51,7 +98,10 @@ class LogDriver(threading.Thread):
 
     """
 
-    def __init__(self, thread_id, name):
+    # the drift, in seconds, above which the driver reports it fell behind
+    REPORT_DRIFT = 1.0
+
+    def __init__(self, thread_id, name, killer=None, source=None):
         """initialise the runtime variables
 
         Parameters
@@ -60,14 +110,22 @@ class LogDriver(threading.Thread):
             unique thread id
         name : str
             the thread name
+        killer : GracefulKiller
+            detects a termination request, defaults to a GracefulKiller
+            handling SIGINT and SIGTERM
+        source : str
+            the name of the logical source when several definition files
+            run in one process, each with its own logger, output prefix
+            and sink, None for a single definition file
         """
 
         threading.Thread.__init__(self)
         self.thread_id = thread_id
         self.name = name
+        self.source = source
 
         self.stop = False
-        self.killer = GracefulKiller()
+        self.killer = killer if killer is not None else GracefulKiller()
         self.FORMAT_STRING =\
             '%(asctime)s.%(msecs)03d %(levelname)s %(message)s'
         self.FORMAT_DATE = '%Y-%m-%d %H:%M:%S'
@@ -78,16 +136,46 @@ class LogDriver(threading.Thread):
         self.UNKNOWN = 1
 
         self.max_queue_depth = 0
-        self.logger = logging.getLogger('main application')
+        self.worker_index = 0
+        self.worker_count = 1
+        self.worker_split = 'definitions'
+        self.replica_index, self.replica_count = self.get_replica()
+        self.tick = self.get_tick()
+        self.next_tick = 0.0
+        self.tick_event = None
+        self.reload_interval = self.get_reload_interval()
+        self.catch_up, self.catch_up_rate = self.get_catch_up()
+        self.shutdown_timeout = self.get_shutdown_timeout()
+        self.definitions_signature = None
+        self.active_messages = []
+        if source is None:
+            self.logger = logging.getLogger('main application')
+        else:
+            # each source writes through its own handler only
+            self.logger = logging.getLogger('main application.' + source)
+            self.logger.propagate = False
         self.logger.setLevel(logging.DEBUG)
         self.fh = logging.StreamHandler()
         self.formatter =\
             logging.Formatter(fmt=self.FORMAT_STRING, datefmt=self.FORMAT_DATE)
         self.fh.setFormatter(self.formatter)
         self.logger.addHandler(self.fh)
-        self.s = sched.scheduler(time.time, time.sleep)
+        self.s = self.get_scheduler(time.time, self.wait)
+        self.clock = None
+        self.end_time = None
         self.log_messages = []
         self.file = self.get_config_file_name()
+        self.prefix = self.get_source_prefix()
+        self.definitions_cache = self.get_definitions_cache()
+        self.line_formatter = self.get_line_formatter()
+        self.sink = self.get_sink()
+        self.writer = self.get_recorder(self.get_writer())
+        self.stack_traces = None
+        self.token_generator = self.get_token_generator()
+        self.metrics = self.get_metrics()
+        backfill = self.get_backfill_range()
+        if backfill is not None:
+            self.set_backfill(*backfill)
 
     def print_log_message(self, type: LogMessage):
         """formats an error unknown message.
@@ -116,28 +204,462 @@ class LogDriver(threading.Thread):
 
         if not self.killer.kill_now:
 
-            if type.message_type == self.UNKNOWN:
-                try:
-                    self.level1()
-                except Exception:
-                    exc_type, exc_value, exc_traceback = sys.exc_info()
-                    self.logger.error(type.output_string() + " " +
-                                      repr(traceback.format_tb(exc_traceback)))
-            elif type.message_type == self.CONNECTION:
-                self.logger.error(type.output_string())
+            now = self.s.timefunc()
+            type.event = None
+            type.drift = now - type.next_due
+            if type.drift > type.max_drift:
+                type.max_drift = type.drift
+            type.released = now
+            if self.metrics is not None:
+                if self.line_formatter is None:
+                    self.metrics.write_line(
+                        self.emit, self.format_message(type), type,
+                        type.drift, self.metrics.LINE_OVERHEAD)
+                else:
+                    self.metrics.write_line(self.writer.write,
+                                            self.format_direct(type), type,
+                                            type.drift)
             else:
-                raise Exception("Invalid message type " +
-                                str(type.message_type))
-            if type.counter < type.max_count or type.max_count == 0:
+                if self.line_formatter is None:
+                    self.emit(self.format_message(type))
+                else:
+                    self.writer.write(self.format_direct(type))
+            if not self.is_exhausted(type):
                 self.schedule_next_event(type)
         else:
             sys.exit(99)
 
+    def format_message(self, type: LogMessage) -> str:
+        """returns the text of the next log message for a LogMessage.
+            CONNECT - the message text
+            UNKNOWN - the message text and a stack trace
+
+        Parameters
+        ----------
+        type: LogMessage
+            Represents a log message instance
+
+        Raises
+        -------
+            Exception
+                this Exception is raised when the message type is invalid
+        """
+
+        if type.message_type == self.UNKNOWN:
+            stack_trace = type.stack_traces[
+                type.counter % len(type.stack_traces)]
+            return self.prefix + type.output_string(self.s.timefunc()) +\
+                " " + stack_trace
+        elif type.message_type == self.CONNECTION:
+            return self.prefix + type.output_string(self.s.timefunc())
+        raise Exception("Invalid message type " +
+                        str(type.message_type))
+
+    def is_exhausted(self, type: LogMessage) -> bool:
+        """checks whether a LogMessage has generated its max_count messages,
+        a max_count of 0 never runs out
+
+        Parameters
+        ----------
+        type: LogMessage
+            Represents a log message instance
+        """
+
+        return type.max_count != 0 and type.counter >= type.max_count
+
+    def start_ticks(self, log_messages: list):
+        """sets up tick batched emission.
+        Rather than one timer event per message, a single timer event fires
+        every LOG_TICK seconds and writes every message that has fallen due
+        since the previous tick.  Each LogMessage is first due one frequency
+        after the start, or as its load profile gives, the same as when it
+        is scheduled on its own
+
+        Parameters
+        ----------
+        log_messages: List
+            the LogMessage instances to generate
+        """
+
+        start = self.s.timefunc()
+        for current_message in log_messages:
+            current_message.next_due = current_message.next_time(start)
+        self.active_messages = list(log_messages)
+        self.next_tick = start + self.tick
+        if self.is_past_end(self.next_tick):
+            self.next_tick = self.end_time
+        self.tick_event = self.s.enterabs(self.next_tick, 1, self.print_tick,
+                                          ())
+        self.checkDepth()
+
+    def print_tick(self):
+        """writes every log message that has fallen due as a single batch.
+        Each LogMessage tracks when its next message is due, so the messages
+        for all of the frequencies that elapsed during the tick are written
+        together and the next tick is scheduled for as long as any
+        LogMessage has messages left to generate
+        """
+
+        if self.killer.kill_now:
+            sys.exit(99)
+
+        self.tick_event = None
+        now = self.s.timefunc()
+        if self.line_formatter is None:
+            format_line = self.format_message
+        else:
+            format_line = self.format_direct
+        if self.is_past_end(now):
+            # a slow write overran the end of the backfill range
+            now = self.end_time
+        batch = []
+        types = []
+        still_active = []
+        for current_message in self.active_messages:
+            if current_message.next_due <= now:
+                self.write_due(current_message, now, format_line, batch)
+                if self.metrics is not None:
+                    types.extend([current_message] *
+                                 (len(batch) - len(types)))
+            if not self.is_exhausted(current_message) and\
+                    not self.is_past_end(current_message.next_due):
+                still_active.append(current_message)
+        self.active_messages = still_active
+        if self.metrics is None:
+            self.write_batch(batch)
+        else:
+            self.metrics.write(self.write_batch, batch, types,
+                               now - self.next_tick)
+
+        if self.active_messages:
+            self.next_tick += self.tick
+            if self.is_past_end(self.next_tick):
+                self.next_tick = self.end_time
+            self.tick_event = self.s.enterabs(self.next_tick, 1,
+                                              self.print_tick, ())
+            self.checkDepth()
+
+    def write_due(self, type: LogMessage, now: float, format_line,
+                  batch: list):
+        """adds the lines of a LogMessage that have fallen due by now to a
+        batch, for tick batched and asyncio emission.  The lines are due at
+        absolute deadlines, so time spent writing never delays the lines
+        that follow, and a LogMessage that has fallen behind catches up
+        following the catch-up policy:
+            burst  - every line that is due is written now
+            skip   - lines more than one interval late (LOG_TICK, or the
+                     frequency without ticks) are skipped
+            spread - the lines that are due are written at no more than
+                     catch_up_rate times the message rate, the first line
+                     that is late now and each after it a 1 / catch_up_rate
+                     of the interval after the one before
+
+        Parameters
+        ----------
+        type: LogMessage
+            Represents a log message instance
+        now: float
+            The current time
+        format_line: function
+            formats the next line of a LogMessage
+        batch: List
+            the lines to write
+        Return
+        ------
+            float
+                the time the next line of the LogMessage can be written
+        """
+
+        if self.catch_up == 'skip':
+            self.skip_missed(type, now - (self.tick or type.frequency))
+        type.drift = now - type.next_due
+        if type.drift > type.max_drift:
+            type.max_drift = type.drift
+        profile = type.profile
+        if self.catch_up == 'spread':
+            gap = type.frequency / self.catch_up_rate
+            while not self.is_exhausted(type):
+                release = max(type.next_due, type.released + gap)
+                if release > now:
+                    return release
+                if release <= now - self.tick:
+                    # late, and not because of the tick it falls in
+                    release = now
+                batch.append(format_line(type))
+                type.released = release
+                type.next_due = type.next_time(type.next_due)
+            return type.next_due
+        while type.next_due <= now and not self.is_exhausted(type):
+            batch.append(format_line(type))
+            if profile is None:
+                type.next_due += type.frequency
+            else:
+                type.next_due = profile.next_time(type.next_due,
+                                                  type.frequency)
+        return type.next_due
+
+    def skip_missed(self, type: LogMessage, before: float):
+        """skips the lines of a LogMessage that were due before a time,
+        counting them in its skipped count.  Skipped lines do not count
+        towards its max count
+
+        Parameters
+        ----------
+        type: LogMessage
+            Represents a log message instance
+        before: float
+            The earliest deadline that is not skipped
+        """
+
+        if type.next_due >= before:
+            return
+        if type.profile is None:
+            missed = math.ceil((before - type.next_due) / type.frequency)
+            type.next_due += missed * type.frequency
+            type.skipped += missed
+        while type.next_due < before:
+            type.next_due = type.next_time(type.next_due)
+            type.skipped += 1
+
+    def write_batch(self, batch: list):
+        """writes a batch of formatted message texts to the log, or a batch
+        of encoded lines on the direct emit path
+
+        Parameters
+        ----------
+        batch: List
+            the message texts or encoded lines to write, in order
+        """
+
+        if self.line_formatter is not None:
+            self.writer.write_lines(batch)
+        elif self.writer is None:
+            for line in batch:
+                self.emit(line)
+        else:
+            self.writer.write_lines([self.format_line(line)
+                                     for line in batch])
+
+    def emit(self, text: str):
+        """writes a message text to the log, either a line at a time through
+        the logging module or through the buffered writer
+
+        Parameters
+        ----------
+        text: String
+            the message text to write
+        """
+
+        if self.writer is None:
+            if self.clock is None:
+                self.logger.error(text)
+            else:
+                self.logger.handle(self.make_record(text))
+        else:
+            self.writer.write(self.format_line(text))
+
+    def format_line(self, text: str) -> str:
+        """formats a message text as a complete log line, exactly as the
+        logging module would write it
+
+        Parameters
+        ----------
+        text: String
+            the message text to format
+        Return
+        ------
+            String
+                the formatted log line including its line terminator
+        """
+
+        return self.formatter.format(self.make_record(text)) +\
+            self.fh.terminator
+
+    def format_direct(self, type: LogMessage) -> bytes:
+        """formats the next log message for a LogMessage as an encoded line
+        on the direct emit path, byte for byte the same as the logging
+        module would write it.  The lines of UNIQUE=N messages are encoded
+        once, so only the timestamp is added to them
+
+        Parameters
+        ----------
+        type: LogMessage
+            Represents a log message instance
+        Return
+        ------
+            bytes
+                the encoded log line including its line terminator
+        """
+
+        if type.encoded_lines:
+            line = type.encoded_lines[type.counter % len(type.encoded_lines)]
+            type.advance()
+            return self.line_formatter.prefix(self.s.timefunc()) + line
+        return self.line_formatter.format(self.s.timefunc(),
+                                          self.format_message(type))
+
+    def encode_lines(self, type: LogMessage) -> tuple:
+        """encodes the lines of a UNIQUE=N message once, one for each of
+        its stack traces, for the direct emit path
+
+        Parameters
+        ----------
+        type: LogMessage
+            Represents a log message instance
+        Return
+        ------
+            Tuple
+                the encoded lines without their timestamps, empty if the
+                message text changes or has placeholders
+        """
+
+        if self.line_formatter is None or type.unique != 'N' or\
+                type.template is not None:
+            return ()
+        if type.message_type == self.UNKNOWN:
+            return tuple(self.line_formatter.encode_suffix(
+                self.prefix + type.message_text + " " + stack_trace)
+                for stack_trace in type.stack_traces)
+        return (self.line_formatter.encode_suffix(
+            self.prefix + type.message_text),)
+
+    def make_record(self, text: str) -> logging.LogRecord:
+        """creates the ERROR LogRecord for a message text, stamped with the
+        simulated time when the driver is backfilling
+
+        Parameters
+        ----------
+        text: String
+            the message text
+        Return
+        ------
+            LogRecord
+                the log record
+        """
+
+        record = self.logger.makeRecord(self.logger.name, logging.ERROR,
+                                        __file__, 0, text, None, None)
+        if self.clock is not None:
+            record.created = self.clock.time()
+            record.msecs = int((record.created - int(record.created)) * 1000)
+        return record
+
+    def set_backfill(self, start: float, end: float):
+        """runs the driver against a simulated clock from start to end.
+        The scheduler sleeps by moving the simulated time forward, so the
+        messages for the whole range are generated as fast as possible,
+        each stamped with its simulated time and using the simulated day of
+        the year for SHARED sequences.  No message is scheduled after end
+
+        Parameters
+        ----------
+        start: float
+            the simulated start time in seconds since the epoch
+        end: float
+            the simulated end time in seconds since the epoch
+
+        Raises
+        ------
+            Exception:
+                Invalid backfill range
+        """
+
+        if not end > start:
+            raise Exception("Invalid backfill range, the end " +
+                            str(end) + " must be after the start " +
+                            str(start))
+        self.clock = VirtualClock(start)
+        self.s = self.get_scheduler(self.clock.time, self.clock.sleep)
+        self.end_time = end
+
+    def is_past_end(self, when: float) -> bool:
+        """checks whether a time is after the end of a backfill range
+
+        Parameters
+        ----------
+        when: float
+            the time in seconds since the epoch
+        """
+
+        return self.end_time is not None and when > self.end_time
+
+    def wait(self, seconds: float):
+        """waits until the next event is due, the scheduler's delayfunc,
+        stopping the driver as soon as a termination signal is detected
+        rather than when the next event is due
+
+        Parameters
+        ----------
+        seconds: float
+            the number of seconds until the next event is due
+        """
+
+        if self.killer.wait(seconds):
+            sys.exit(99)
+
+    def close_output(self):
+        """writes any buffered log lines, called when the driver stops,
+        and reports the result of unique token verification, the sink's
+        and the output queue's statistics and whether the messages fell
+        behind.  The lines still queued for the output or the sink are
+        given shutdown_timeout seconds to be written"""
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        if self.writer is not None:
+            if isinstance(self.writer, (QueuedLogWriter, RecordingWriter)):
+                self.writer.close(self.shutdown_timeout)
+                report = self.writer.report()
+                if report is not None:
+                    self.logger.warning(report)
+            else:
+                self.writer.close()
+        report = self.schedule_report()
+        if report is not None:
+            self.logger.warning(report)
+        if self.sink is not None:
+            self.sink.close(max(deadline - time.monotonic(), 0))
+            report = self.sink.report()
+            if report is not None:
+                self.logger.warning(report)
+        if self.token_generator is not None and\
+                self.token_generator.bloom_filter is not None:
+            self.logger.warning(
+                "Unique token verification : " +
+                str(self.token_generator.counter) + " tokens generated, " +
+                str(self.token_generator.possible_collisions) +
+                " possible collisions")
+
+    def schedule_report(self) -> str:
+        """describes how far the messages fell behind their deadlines, the
+        largest drift, and how many lines were skipped to catch up
+
+        Return
+        ------
+            String
+                the report, or None if no lines were skipped and no line
+                was written more than REPORT_DRIFT seconds late
+        """
+
+        max_drift = max((current_message.max_drift
+                         for current_message in self.log_messages),
+                        default=0.0)
+        skipped = sum(current_message.skipped
+                      for current_message in self.log_messages)
+        if not skipped and max_drift <= self.REPORT_DRIFT:
+            return None
+        return "Schedule : fell behind by up to " +\
+            "%.3f ms" % (max_drift * 1000) + ", " + str(skipped) +\
+            " lines skipped"
+
     def schedule_next_event(self, type: LogMessage):
         """Creates a new timer event.
         This function given a specific LogMessage (type), will generate
         the approprate timer function to re-write a log message after an
-        approriate period of time
+        approriate period of time.  The message is due one frequency, or as
+        its load profile gives, after the deadline of the previous message
+        rather than after the time it was written, so the time spent
+        writing does not add up as drift.  When it has fallen behind it
+        catches up following the catch-up policy, as in write_due
 
         Parameters
         ----------
@@ -153,9 +675,154 @@ class LogDriver(threading.Thread):
             Exception is propagated
         """
 
-        self.s.enter(type.frequency, 1, self.print_log_message, (type,))
+        now = self.s.timefunc()
+        type.next_due = type.next_time(type.next_due)
+        due = type.next_due
+        if due <= now:
+            # fallen behind
+            if self.catch_up == 'skip':
+                self.skip_missed(type, now - type.frequency)
+                due = type.next_due
+            elif self.catch_up == 'spread':
+                due = max(due, type.released +
+                          type.frequency / self.catch_up_rate)
+        if self.is_past_end(due):
+            return
+        type.event = self.s.enterabs(due, 1, self.print_log_message, (type,))
         self.checkDepth()
 
+    def get_definitions_signature(self) -> tuple:
+        """returns the inode, modification time and size of the message
+        definition file, which change whenever the file is rewritten or
+        replaced, without reading it.  Returns None if the file is missing,
+        e.g. while a ConfigMap is being updated
+        """
+
+        try:
+            stat = os.stat(self.file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def schedule_definitions_check(self):
+        """schedules the next check of the message definition file, for as
+        long as there are messages to generate"""
+
+        if self.is_past_end(self.s.timefunc() + self.reload_interval):
+            return
+        self.s.enter(self.reload_interval, 1, self.check_definitions, ())
+
+    def check_definitions(self):
+        """reloads the message definitions when the signature of the file
+        has changed since it was last read, then schedules the next check
+        """
+
+        if self.killer.kill_now:
+            sys.exit(99)
+
+        signature = self.get_definitions_signature()
+        if signature is not None and signature != self.definitions_signature:
+            self.definitions_signature = signature
+            self.reload_log_messages()
+        if not self.s.empty():
+            self.schedule_definitions_check()
+
+    def reload_log_messages(self):
+        """applies the changes in the message definition file to the
+        running messages:
+            unchanged lines - carry on as before
+            changed lines   - lines with the same message type and text,
+                              they restart at their new frequency but keep
+                              their counter, so their SHARED sequence,
+                              stack trace rotation and max_count carry on
+            removed lines   - are cancelled
+            added lines     - start generating, first due one frequency
+                              from now
+        A file that cannot be read or is not valid is reported and the
+        running messages are left as they are
+        """
+
+        try:
+            log_messages = self.partition_log_messages(
+                self.setup_log_messages())
+        except Exception as error:
+            self.logger.warning("Message definitions not reloaded : " +
+                                str(error))
+            return
+
+        unchanged = {}
+        for current_message in self.log_messages:
+            unchanged.setdefault(current_message.definition,
+                                 []).append(current_message)
+        reloaded = []
+        added = []
+        for current_message in log_messages:
+            previous = unchanged.get(current_message.definition)
+            if previous:
+                reloaded.append(previous.pop(0))
+            else:
+                reloaded.append(current_message)
+                added.append(current_message)
+
+        changed = {}
+        for previous in unchanged.values():
+            for current_message in previous:
+                self.cancel_log_message(current_message)
+                changed.setdefault((current_message.message_type,
+                                    current_message.message_text),
+                                   []).append(current_message)
+        for current_message in added:
+            previous = changed.get((current_message.message_type,
+                                    current_message.message_text))
+            if previous:
+                current_message.counter = previous.pop(0).counter
+            if not self.is_exhausted(current_message):
+                self.start_log_message(current_message)
+        self.log_messages = reloaded
+
+    def cancel_log_message(self, type: LogMessage):
+        """stops generating a LogMessage
+
+        Parameters
+        ----------
+        type: LogMessage
+            Represents a log message instance
+        """
+
+        if self.tick > 0:
+            if type in self.active_messages:
+                self.active_messages.remove(type)
+        elif type.event is not None:
+            self.s.cancel(type.event)
+            type.event = None
+
+    def start_log_message(self, type: LogMessage):
+        """starts generating a LogMessage, first due one frequency from now
+
+        Parameters
+        ----------
+        type: LogMessage
+            Represents a log message instance
+        """
+
+        if self.tick == 0:
+            type.next_due = self.s.timefunc()
+            self.schedule_next_event(type)
+            return
+        now = self.s.timefunc()
+        type.next_due = type.next_time(now)
+        if self.is_past_end(type.next_due):
+            return
+        self.active_messages.append(type)
+        if self.tick_event is None:
+            # the ticks stopped when the last message ran out
+            self.next_tick = now + self.tick
+            if self.is_past_end(self.next_tick):
+                self.next_tick = self.end_time
+            self.tick_event = self.s.enterabs(self.next_tick, 1,
+                                              self.print_tick, ())
+            self.checkDepth()
+
     def checkDepth(self):
         """failsafe method for timer events.
         this function checks the current timer queue depth against a Max Queue
@@ -168,10 +835,9 @@ class LogDriver(threading.Thread):
                 depth against a Max Queue Depth.
             Exception is logged, the thread is killed and it is then propagated
         """
-        if len(self.s.queue) > self.max_queue_depth:
-            self.s.cancel
+        if self.s.depth > self.max_queue_depth:
             error_message = "The number of active timer events :" +\
-                            str(len(self.s.queue)) +\
+                            str(self.s.depth) +\
                             " is greater that the expected " +\
                             "maximum number of events :" +\
                             str(self.max_queue_depth) +\
@@ -187,10 +853,98 @@ class LogDriver(threading.Thread):
         message definitions
         Test overrides are in place
         """
-        self.log_messages = self.setup_log_messages()
-        for current_message in self.log_messages:
-            self.schedule_next_event(current_message)
-        self.s.run()
+        self.schedule_log_messages()
+        try:
+            self.s.run()
+        finally:
+            self.close_output()
+
+    def schedule_log_messages(self):
+        """reads this driver's share of the message definitions and
+        schedules their first events, and the checks of the definition
+        file when reloading is enabled, without running the scheduler
+        """
+        self.log_messages = self.partition_log_messages(
+            self.setup_log_messages())
+        if self.tick > 0:
+            self.start_ticks(self.log_messages)
+        else:
+            start = self.s.timefunc()
+            for current_message in self.log_messages:
+                current_message.next_due = start
+                self.schedule_next_event(current_message)
+        if self.reload_interval > 0:
+            self.definitions_signature = self.get_definitions_signature()
+            self.schedule_definitions_check()
+
+    def partition_log_messages(self, log_messages: list) -> list:
+        """selects this driver's share of the LogMessages.  When there are
+        replica_count replicas each takes every replica_count'th counter
+        value of every LogMessage at replica_count times the interval.  The
+        replica's share is then shared between worker_count workers:
+            definitions - each worker generates every worker_count'th
+                          LogMessage
+            counter     - every worker generates every LogMessage, each
+                          one taking every worker_count'th counter value
+                          at worker_count times the interval
+        In every case the messages of all of the replicas and workers
+        together are the same as those of a single driver, including
+        SHARED sequences
+
+        parameters
+        ----------
+            log_messages : List
+                All of the LogMessage instances
+        return
+        ------
+            List
+                The LogMessage instances for this driver
+        Raises
+        ------
+            Exception:
+                Invalid worker split
+        """
+        if self.replica_count > 1:
+            log_messages = self.split_counters(
+                log_messages, self.replica_index, self.replica_count)
+        if self.worker_count == 1:
+            return log_messages
+        if self.worker_split == 'definitions':
+            return log_messages[self.worker_index::self.worker_count]
+        if self.worker_split != 'counter':
+            raise Exception("Invalid worker split, " +
+                            "Supplied value is : " + self.worker_split +
+                            " Expected definitions|counter")
+        return self.split_counters(log_messages, self.worker_index,
+                                   self.worker_count)
+
+    def split_counters(self, log_messages: list, index: int,
+                       count: int) -> list:
+        """takes the index'th of every count counter values a LogMessage
+        would otherwise generate, at count times its interval, leaving out
+        the LogMessages that have none left
+
+        parameters
+        ----------
+            log_messages : List
+                The LogMessage instances
+            index : int
+                The share taken, 0 to count - 1
+            count : int
+                The number of shares
+        return
+        ------
+            List
+                The LogMessage instances with counter values left
+        """
+        partitioned = []
+        for current_message in log_messages:
+            current_message.counter += index * current_message.counter_step
+            current_message.counter_step *= count
+            current_message.frequency *= count
+            if not self.is_exhausted(current_message):
+                partitioned.append(current_message)
+        return partitioned
 
     def get_max_queue_depth(self, list_of_configurations: []):
         """
@@ -202,10 +956,538 @@ class LogDriver(threading.Thread):
             return
             ------
                 int
-                    The length of the list
+                    The length of the list, plus one for the definitions
+                    check when reloading is enabled
         """
+        if self.reload_interval > 0:
+            return len(list_of_configurations) + 1
         return len(list_of_configurations)
 
+    def get_tick(self) -> float:
+        """
+            get the emission tick based on the LOG_TICK environment
+            variable
+        returns
+        -------
+            float
+                The tick interval in seconds, 0 (the default) schedules a
+                timer event for every individual message
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_TICK
+        """
+        try:
+            value = os.environ["LOG_TICK"]
+        except KeyError:
+            return 0
+        try:
+            tick = float(value)
+        except ValueError:
+            tick = -1
+        if not tick >= 0 or tick == float('inf'):
+            raise Exception("Invalid value for LOG_TICK, " +
+                            "Supplied value is : " + value +
+                            " Expected a number of seconds, 0 to disable")
+        return tick
+
+    def get_catch_up(self) -> tuple:
+        """
+            get how a message that has fallen behind its deadlines catches
+            up based on the LOG_CATCH_UP environment variable:
+                burst  - (default) every line that is due is written
+                         straight away
+                skip   - lines more than one interval late are skipped
+                         and counted
+                spread - the lines that are due are written at no more
+                         than LOG_CATCH_UP_RATE times the message rate
+                         (default 2) until the message has caught up
+        returns
+        -------
+            String, float
+                the policy and the catch up rate
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_CATCH_UP or LOG_CATCH_UP_RATE
+        """
+        catch_up = os.environ.get("LOG_CATCH_UP", "burst").lower()
+        if catch_up not in ("burst", "skip", "spread"):
+            raise Exception("Invalid value for LOG_CATCH_UP, " +
+                            "Supplied value is : " + catch_up +
+                            " Expected burst|skip|spread")
+        value = os.environ.get("LOG_CATCH_UP_RATE", "2")
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = 0
+        if not rate > 1 or rate == float('inf'):
+            raise Exception("Invalid value for LOG_CATCH_UP_RATE, " +
+                            "Supplied value is : " + value +
+                            " Expected a number greater than 1")
+        return catch_up, rate
+
+    def get_replica(self) -> tuple:
+        """
+            get this replica's share of the message definitions when
+            several replicas, e.g. the pods of a StatefulSet, together
+            generate them at the rate of a single instance, based on the
+            LOG_REPLICA_COUNT environment variable, the number of replicas
+            (default 1), and LOG_REPLICA_INDEX, this replica's index from
+            0, which defaults to the ordinal at the end of the host name,
+            e.g. 2 for log-generator-2
+        returns
+        -------
+            int, int
+                the replica's index and the number of replicas
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_REPLICA_COUNT or LOG_REPLICA_INDEX
+        """
+        value = os.environ.get("LOG_REPLICA_COUNT", "1")
+        try:
+            count = int(value)
+        except ValueError:
+            count = 0
+        if count < 1:
+            raise Exception("Invalid value for LOG_REPLICA_COUNT, " +
+                            "Supplied value is : " + value +
+                            " Expected a whole number greater than 0")
+        if count == 1:
+            return 0, 1
+        value = os.environ.get("LOG_REPLICA_INDEX") or\
+            socket.gethostname().rsplit("-", 1)[-1]
+        try:
+            index = int(value)
+        except ValueError:
+            index = -1
+        if not 0 <= index < count:
+            raise Exception("Invalid value for LOG_REPLICA_INDEX, " +
+                            "Supplied value is : " + value +
+                            " Expected 0 - " + str(count - 1) +
+                            ", or a host name ending in -0 - -" +
+                            str(count - 1))
+        return index, count
+
+    def get_shutdown_timeout(self) -> float:
+        """
+            get how long the lines still queued when the driver stops are
+            given to be written, to the output queue and the sink, based on
+            the LOG_SHUTDOWN_TIMEOUT environment variable
+        returns
+        -------
+            float
+                The timeout in seconds, default 5
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_SHUTDOWN_TIMEOUT
+        """
+        value = os.environ.get("LOG_SHUTDOWN_TIMEOUT", "5")
+        try:
+            timeout = float(value)
+        except ValueError:
+            timeout = 0
+        if not timeout > 0 or timeout == float('inf'):
+            raise Exception("Invalid value for LOG_SHUTDOWN_TIMEOUT, " +
+                            "Supplied value is : " + value +
+                            " Expected a positive number of seconds")
+        return timeout
+
+    def get_reload_interval(self) -> float:
+        """
+            get the interval between checks of the message definition file
+            for changes based on the LOG_RELOAD_INTERVAL environment
+            variable
+        returns
+        -------
+            float
+                The interval in seconds, 0 (the default) never reloads the
+                message definitions
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_RELOAD_INTERVAL
+        """
+        value = os.environ.get("LOG_RELOAD_INTERVAL", "0")
+        try:
+            interval = float(value)
+        except ValueError:
+            interval = -1
+        if not interval >= 0 or interval == float('inf'):
+            raise Exception("Invalid value for LOG_RELOAD_INTERVAL, " +
+                            "Supplied value is : " + value +
+                            " Expected a number of seconds, 0 to disable")
+        return interval
+
+    def get_scheduler(self, timefunc, delayfunc):
+        """
+            get the event scheduler based on the LOG_SCHEDULER environment
+            variable:
+                heap  - (default) a HeapScheduler, events are kept on a
+                        binary heap
+                wheel - a TimingWheelScheduler, events are kept on a
+                        hierarchical timing wheel with ticks of
+                        LOG_WHEEL_RESOLUTION seconds (default 0.001), for
+                        very large definition files
+        parameters
+        ----------
+            timefunc : function
+                Returns the current time
+            delayfunc : function
+                Waits for a number of seconds
+        returns
+        -------
+            HeapScheduler
+                the scheduler, both keep the number of pending events in
+                their depth attribute
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_SCHEDULER or LOG_WHEEL_RESOLUTION
+        """
+        scheduler = os.environ.get("LOG_SCHEDULER", "heap").lower()
+        if scheduler == "heap":
+            return HeapScheduler(timefunc, delayfunc)
+        if scheduler != "wheel":
+            raise Exception("Invalid value for LOG_SCHEDULER, " +
+                            "Supplied value is : " + scheduler +
+                            " Expected heap|wheel")
+        value = os.environ.get("LOG_WHEEL_RESOLUTION", "0.001")
+        try:
+            resolution = float(value)
+        except ValueError:
+            resolution = 0
+        if not resolution > 0 or resolution == float('inf'):
+            raise Exception("Invalid value for LOG_WHEEL_RESOLUTION, " +
+                            "Supplied value is : " + value +
+                            " Expected a positive number of seconds")
+        return TimingWheelScheduler(timefunc, delayfunc, resolution)
+
+    def get_writer(self) -> BufferedLogWriter:
+        """
+            get the output stage based on the LOG_OUTPUT environment
+            variable:
+                line     - (default) each line is written and flushed on
+                           its own, through the logging module unless
+                           LOG_EMIT_PATH is direct
+                buffered - lines are gathered by a BufferedLogWriter which
+                           flushes once LOG_FLUSH_BYTES characters are
+                           buffered (default 262144) or once a line has
+                           been held for LOG_FLUSH_INTERVAL seconds
+                           (default 0.5)
+                queued   - lines are handed to a QueuedLogWriter's writer
+                           thread through a queue of LOG_QUEUE_SIZE lines,
+                           see get_queue_settings
+            output sent to a network sink (see LOG_SINK) is always
+            buffered or queued, each write being sent as one batch
+        returns
+        -------
+            BufferedLogWriter
+                the buffered writer, a QueuedLogWriter, a DirectLogWriter
+                for line at a time output on the direct emit path, or None
+                to write a line at a time through the logging module
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_OUTPUT, LOG_FLUSH_BYTES,
+                LOG_FLUSH_INTERVAL or a LOG_QUEUE_ variable
+        """
+        output = os.environ.get("LOG_OUTPUT", "line").lower()
+        if output not in ("line", "buffered", "queued"):
+            raise Exception("Invalid value for LOG_OUTPUT, " +
+                            "Supplied value is : " + output +
+                            " Expected line|buffered|queued")
+        binary = self.line_formatter is not None
+        stream = self.fh.stream
+        if binary:
+            stream = getattr(stream, "buffer", stream)
+        if output == "queued":
+            return QueuedLogWriter(self.sink or stream,
+                                   *self.get_queue_settings(),
+                                   binary=binary)
+        if self.sink is not None:
+            return BufferedLogWriter(self.sink, *self.get_flush_settings(),
+                                     binary=binary)
+        if output == "buffered":
+            return BufferedLogWriter(stream, *self.get_flush_settings(),
+                                     binary=binary)
+        if binary:
+            return DirectLogWriter(stream, binary)
+        return None
+
+    def get_recorder(self, writer) -> RecordingWriter:
+        """
+            get a writer that records every line written in a capture file
+            based on the LOG_RECORD environment variable, the path of the
+            capture file, for replaying with python main.py replay.  Each
+            line is recorded with its time after the first line, the
+            simulated time when backfilling.  {source} in the path is
+            replaced by the name of the source.  Unset (the default)
+            records nothing
+        parameters
+        ----------
+            writer : BufferedLogWriter
+                the output stage, None for a line at a time through the
+                logging module
+        returns
+        -------
+            RecordingWriter
+                the writer recording the lines and passing them on, or the
+                writer when nothing is recorded
+        """
+        path = os.environ.get("LOG_RECORD", "")
+        if not path:
+            return writer
+        if self.source is not None:
+            path = path.replace("{source}", self.source)
+        if writer is None:
+            # the lines are formatted exactly as the logging module would
+            writer = DirectLogWriter(self.fh.stream)
+        return RecordingWriter(writer, CaptureFile(path),
+                               lambda: self.s.timefunc())
+
+    def get_sink(self) -> NetworkSink:
+        """
+            get where the log lines are sent based on the LOG_SINK
+            environment variable:
+                stderr                    - (default) written to stderr
+                file://path               - written to segment files by a
+                                            FileSink, see LOG_FILE_
+                syslog+udp://host[:port]  - RFC 5424 syslog over UDP
+                syslog+tcp://host[:port]  - RFC 5424 syslog over TCP
+                tcp://host:port           - newline terminated lines over
+                                            TCP
+                http://host[:port]/path   - each batch of lines POSTed,
+                                            also https
+            with {source} replaced by the name of the source
+        returns
+        -------
+            NetworkSink
+                the network sink or FileSink, or None to write to stderr
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_SINK or a LOG_FILE_ variable
+        """
+        return sink_from_environment(self.source)
+
+    def get_metrics(self) -> DriverMetrics:
+        """
+            get the metrics for this driver based on the LOG_METRICS_PORT
+            environment variable, the port the metrics of every driver in
+            the process are served on in the Prometheus text format, at
+            /metrics.  Unset or 0 (the default) serves no metrics
+        returns
+        -------
+            DriverMetrics
+                the driver's metrics, or None when they are not served
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_METRICS_PORT
+        """
+        value = os.environ.get("LOG_METRICS_PORT", "0")
+        if not value.isdecimal() or int(value) > 65535:
+            raise Exception("Invalid value for LOG_METRICS_PORT, " +
+                            "Supplied value is : " + value +
+                            " Expected a port number, 0 to disable")
+        if int(value) == 0:
+            return None
+        return MetricsServer.shared(int(value)).register(DriverMetrics(self))
+
+    def get_line_formatter(self) -> LineFormatter:
+        """
+            get the line formatter based on the LOG_EMIT_PATH environment
+            variable:
+                logging - (default) lines are formatted by the logging
+                          module, so they can be captured by its handlers
+                direct  - lines are formatted to bytes by a LineFormatter,
+                          with the same output, and written straight to
+                          the output stream
+        returns
+        -------
+            LineFormatter
+                the formatter for the direct emit path, or None
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_EMIT_PATH
+        """
+        emit_path = os.environ.get("LOG_EMIT_PATH", "logging").lower()
+        if emit_path == "logging":
+            return None
+        if emit_path != "direct":
+            raise Exception("Invalid value for LOG_EMIT_PATH, " +
+                            "Supplied value is : " + emit_path +
+                            " Expected logging|direct")
+        return LineFormatter(self.FORMAT_DATE)
+
+    def get_flush_settings(self) -> tuple:
+        """
+            get the buffered writer flush thresholds based on the
+            LOG_FLUSH_BYTES and LOG_FLUSH_INTERVAL environment variables
+        returns
+        -------
+            int, float
+                The number of characters and the number of seconds that
+                trigger a flush
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_FLUSH_BYTES or LOG_FLUSH_INTERVAL
+        """
+        flush_bytes = os.environ.get("LOG_FLUSH_BYTES", "262144")
+        flush_interval = os.environ.get("LOG_FLUSH_INTERVAL", "0.5")
+        try:
+            flush_bytes = int(flush_bytes)
+            flush_interval = float(flush_interval)
+        except ValueError:
+            flush_bytes = flush_interval = 0
+        if flush_bytes < 1 or not flush_interval > 0:
+            raise Exception("Invalid value for LOG_FLUSH_BYTES or " +
+                            "LOG_FLUSH_INTERVAL, Expected a positive " +
+                            "number of characters and seconds")
+        return flush_bytes, flush_interval
+
+    def get_queue_settings(self) -> tuple:
+        """
+            get the queued writer settings based on the environment
+            variables:
+                LOG_QUEUE_SIZE   - the number of lines the queue holds
+                                   (default 100000)
+                LOG_QUEUE_POLICY - what happens when the queue is full,
+                                   block (default), drop-newest,
+                                   drop-oldest or sample
+                LOG_QUEUE_SAMPLE - one line in this many is queued while
+                                   sampling (default 10)
+        returns
+        -------
+            int, String, int
+                The queue size, overflow policy and sampling interval
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_QUEUE_SIZE, LOG_QUEUE_POLICY or
+                LOG_QUEUE_SAMPLE
+        """
+        capacity = os.environ.get("LOG_QUEUE_SIZE", "100000")
+        if not capacity.isdecimal() or int(capacity) < 1:
+            raise Exception("Invalid value for LOG_QUEUE_SIZE, " +
+                            "Supplied value is : " + capacity +
+                            " Expected a positive number of lines")
+        policy = os.environ.get("LOG_QUEUE_POLICY", "block").lower()
+        if policy not in QueuedLogWriter.POLICIES:
+            raise Exception("Invalid value for LOG_QUEUE_POLICY, " +
+                            "Supplied value is : " + policy +
+                            " Expected " + "|".join(QueuedLogWriter.POLICIES))
+        sample_every = os.environ.get("LOG_QUEUE_SAMPLE", "10")
+        if not sample_every.isdecimal() or int(sample_every) < 1:
+            raise Exception("Invalid value for LOG_QUEUE_SAMPLE, " +
+                            "Supplied value is : " + sample_every +
+                            " Expected a positive integer")
+        return int(capacity), policy, int(sample_every)
+
+    def get_backfill_range(self) -> tuple:
+        """
+            get the simulated time range for backfilling from the
+            LOG_BACKFILL_START and LOG_BACKFILL_END environment variables,
+            given as ISO 8601 date times, e.g. 2020-11-17T00:00:00
+        returns
+        -------
+            float, float
+                The start and end in seconds since the epoch, or None if
+                LOG_BACKFILL_START is not set
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_BACKFILL_START or LOG_BACKFILL_END
+        """
+        try:
+            start = os.environ["LOG_BACKFILL_START"]
+        except KeyError:
+            return None
+        end = os.environ.get("LOG_BACKFILL_END", "")
+        try:
+            return (datetime.datetime.fromisoformat(start).timestamp(),
+                    datetime.datetime.fromisoformat(end).timestamp())
+        except ValueError:
+            raise Exception("Invalid value for LOG_BACKFILL_START or " +
+                            "LOG_BACKFILL_END, Supplied values are : " +
+                            start + " and " + end +
+                            " Expected ISO 8601 date times")
+
+    def get_token_generator(self) -> CounterTokenGenerator:
+        """
+            get the generator for the unique part of SHARED=N messages
+            based on the LOG_UNIQUE_TOKENS environment variable:
+                md5     - (default) the MD5 of the message text and the
+                          current time
+                counter - a CounterTokenGenerator, guaranteed unique
+            Setting LOG_UNIQUE_VERIFY to Y checks every counter token
+            against a Bloom filter sized for LOG_UNIQUE_VERIFY_CAPACITY
+            tokens (default 10000000) and reports possible collisions when
+            the driver stops
+        returns
+        -------
+            CounterTokenGenerator
+                the generator, or None for md5
+        Raises
+        ------
+            Exception:
+                Invalid value for LOG_UNIQUE_TOKENS or
+                LOG_UNIQUE_VERIFY_CAPACITY
+        """
+        tokens = os.environ.get("LOG_UNIQUE_TOKENS", "md5").lower()
+        if tokens == "md5":
+            return None
+        if tokens != "counter":
+            raise Exception("Invalid value for LOG_UNIQUE_TOKENS, " +
+                            "Supplied value is : " + tokens +
+                            " Expected md5|counter")
+        bloom_filter = None
+        if os.environ.get("LOG_UNIQUE_VERIFY", "N").upper() == "Y":
+            capacity = os.environ.get("LOG_UNIQUE_VERIFY_CAPACITY",
+                                      "10000000")
+            if not capacity.isdecimal() or int(capacity) < 1:
+                raise Exception("Invalid value for " +
+                                "LOG_UNIQUE_VERIFY_CAPACITY, " +
+                                "Supplied value is : " + capacity +
+                                " Expected a positive integer")
+            bloom_filter = BloomFilter(int(capacity))
+        return CounterTokenGenerator(bloom_filter=bloom_filter)
+
+    def get_definitions_cache(self) -> str:
+        """
+            get the directory of the compiled message definition caches
+            based on the LOG_DEFINITIONS_CACHE environment variable.  The
+            validated definitions are cached there, keyed by the SHA-256
+            of the definition file, so a large file that has not changed
+            is not parsed again.  Unset (the default) caches nothing
+        returns
+        -------
+            String
+                The cache directory, or None
+        """
+        return os.environ.get("LOG_DEFINITIONS_CACHE") or None
+
+    def get_source_prefix(self) -> str:
+        """
+            get the text written before every message of a source, when
+            several definition files run in one process, based on the
+            LOG_SOURCE_PREFIX environment variable, in which {source} is
+            the name of the source.  Defaults to the name and a space
+        returns
+        -------
+            String
+                The prefix, empty for a single definition file
+        """
+        if self.source is None:
+            return ''
+        return os.environ.get("LOG_SOURCE_PREFIX", "{source} ").replace(
+            "{source}", self.source)
+
     def get_config_file_name(self):
         """
             get the location of the message definitions based
@@ -222,6 +1504,25 @@ class LogDriver(threading.Thread):
         return 'logger/message_definitions/' +\
             os.environ['MESSAGE_DEFINITIONS']
 
+    def capture_stack_trace(self) -> StackTraceLibrary:
+        """raises a real exception through level1 - level3 once and uses
+        its traceback as the default python stack trace for UNKNOWN
+        messages, the other styles are rendered by the library
+
+        return
+        ------
+            StackTraceLibrary
+                the library used to render stack traces
+        """
+        try:
+            self.level1()
+        except Exception:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            return StackTraceLibrary(
+                traceback.format_tb(exc_traceback),
+                ''.join(traceback.format_exception_only(exc_type,
+                                                        exc_value)).strip())
+
     def level1(self):
         """level1 - calls level2 to generate a stack trace
         """
@@ -243,36 +1544,47 @@ class LogDriver(threading.Thread):
         """
         raise Exception(
             "This has triggered an exception stack trace : queue depth  (" +
-            str(len(self.s.queue)) + ")")
+            str(self.s.depth) + ")")
 
     def setup_log_messages(self) -> list:
         """
         Using the environment variable MESSAGE_DEFINITIONS, or "default"
         if it is not supplied.
         The function reads and creates the individual LogMessage objects
-        and stores them in a list object.
-        The message definition file contains comma separated items in the
-        following order:
+        a line at a time and stores them in a list object, reusing the
+        validated definitions cached in LOG_DEFINITIONS_CACHE while the
+        file is unchanged.
+        The message definition file contains comma separated items, a
+        MESSAGE_TEXT containing commas in double quotes, in the following
+        order:
             message_type
             unique
             shared
             message_text
             frequency
             max_count
+            trace (optional)
+            profile (optional)
 
         Return
         -------
             List
                 List of LogMessage instances
-        """
 
-        iv_messages = []
-        with open(self.file) as file_results:
-            expected_vals = file_results.read().splitlines()
+        Raises
+        ------
+            Exception:
+                Invalid message definitions, with the line number of each
+                invalid line
+        """
 
-        for line in expected_vals:
-            split = line.split(',')
-            iv_messages.append(LogMessage(
-                split[0], split[1], split[2], split[3], split[4], split[5]))
-        self.max_queue_depth = self.get_max_queue_depth(expected_vals)
+        iv_messages = read_definitions(self.file, self.definitions_cache)
+        if self.stack_traces is None:
+            self.stack_traces = self.capture_stack_trace()
+        for message in iv_messages:
+            message.stack_traces = self.stack_traces.get(
+                message.trace_style, message.trace_depth)
+            message.token_generator = self.token_generator
+            message.encoded_lines = self.encode_lines(message)
+        self.max_queue_depth = self.get_max_queue_depth(iv_messages)
         return iv_messages
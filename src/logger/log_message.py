@@ -1,5 +1,10 @@
 import hashlib
 import datetime
+import time
+
+from logger.load_profiles import LoadProfile
+from logger.message_template import MessageTemplate
+from logger.stack_traces import StackTraceLibrary
 
 
 class LogMessage():
@@ -12,10 +17,13 @@ class LogMessage():
            The log message type:
            0 = Connection log message
            1 = Unknown log message
-       frequency : int
-           The frequency in seconds for each log entry
+       frequency : float
+           The interval in seconds between each log entry, derived from
+           either a (fractional) number of seconds or an N/s rate
        message_text : String
            The log Message text
+       template : MessageTemplate
+           The compiled message text when it has placeholders, or None
        shared : String
            Indicates whether the unique sequence should be repeated
            on another running instance in the current day
@@ -24,9 +32,59 @@ class LogMessage():
        unique : String
           Indicates whether each log record should be unique within the same
            run, generates a random MD5 hash to create uniqueness
+       trace_style : String
+           The style of stack trace written with an UNKNOWN message
+       trace_depth : int
+           The number of stack trace frames, 0 for the default
+       profile : LoadProfile
+           Shapes the rate of the message over time, or None for a flat
+           rate of one message every frequency
+       counter : int
+           The number of the next message in this message's sequence
+       counter_step : int
+           The amount the counter increases by for each message, greater
+           than 1 when the sequence is shared between workers
+       stack_traces : Tuple
+           The rendered stack traces for this message, set by the LogDriver
+       token_generator : CounterTokenGenerator
+           When set by the LogDriver, generates the unique part of
+           SHARED=N messages instead of the MD5 of the text and time
+       encoded_lines : Tuple
+           For UNIQUE=N messages on the direct emit path, the encoded
+           line for each stack trace, set by the LogDriver
+       lookahead : List
+           The precomputed SHARED=Y output strings for the next counter
+           values, refilled in blocks of LOOKAHEAD
+       definition : String
+           The message definition line, set when the definitions are read
+       event : List
+           The pending timer event for this message, set by the LogDriver
+       output_bytes : int
+           The number of bytes written for this message, counted by the
+           LogDriver when metrics are served
+       next_due : float
+           The deadline of the next message, set by the LogDriver
+       drift : float
+           How many seconds after its deadline the last message was written
+       max_drift : float
+           The largest drift of any message
+       skipped : int
+           The number of messages skipped to catch up with their deadlines
+       released : float
+           When the last message was written, for spreading a backlog
 
        Methods
        -------
+       from_compiled(compiled: tuple)
+            creates a LogMessage from a validated definition, as returned
+            by compiled, without validating it again
+
+       compiled()
+            returns the validated definition, to be cached
+
+       set_initial_state()
+            sets the state of a message that has not been written yet
+
        validate(p_message_type: str, p_unique: str, p_shared: str,
                  p_message_text: str, p_frequency: int, p_max_count: int):
             Applied validation rules
@@ -34,20 +92,53 @@ class LogMessage():
         parse_unique_string(val: str)
             extract Unique and Seed from the supplied value
 
+        parse_frequency(val: str)
+            convert a frequency or N/s rate into an interval in seconds
+
+        parse_trace_string(val: str)
+            extract the stack trace style and depth from the supplied value
+
         output_string():
             return an ouput message based on the supplied attributes
+
+        get_day_of_year(now: float)
+            return the day of the year, recomputed only when the day changes
+
+        fill_lookahead(prefix: str)
+            precompute the next block of SHARED=Y output strings
+
+        advance()
+            moves the counter on without creating an output string
+
+        next_time(when: float)
+            returns the time of the message after one at when
     """
 
+    LOOKAHEAD = 1024
+
+    # a fixed layout rather than a dict for each of the many thousands of
+    # messages a large definition file creates
+    __slots__ = ('message_type', 'frequency', 'message_text', 'template',
+                 'shared', 'counter', 'counter_step', 'max_count', 'unique',
+                 'seed', 'trace_style', 'trace_depth', 'profile',
+                 'stack_traces', 'token_generator', 'encoded_lines',
+                 'next_due', 'day_of_year', 'day_start', 'day_end',
+                 'lookahead', 'lookahead_index', 'lookahead_counter',
+                 'lookahead_prefix', 'definition', 'event', 'output_bytes',
+                 'drift', 'max_drift', 'skipped', 'released')
+
     def __init__(self, p_message_type: str, p_unique: str, p_shared: str,
-                 p_message_text: str, p_frequency: int, p_max_count: int):
+                 p_message_text: str, p_frequency: int, p_max_count: int,
+                 p_trace: str = '', p_profile: str = ''):
         """initialise the log attributes
         and calls the necessary validation functions
 
         Parameters
         ----------
             message_type : String
-        frequency : int
-            The frequency in seconds for each log entry
+        frequency : String
+            The interval in seconds for each log entry, e.g. 5 or 0.25,
+            or a rate of messages per second, e.g. 1000/s
         message_text : String
             The log Message text
         shared : String
@@ -58,18 +149,97 @@ class LogMessage():
         unique : String
             Indicates whether each log record should be unique within the same
             run, generates a random MD5 hash to create uniqueness
+        trace : String
+            The stack trace written with an UNKNOWN message, style[:depth]
+            e.g. java:12, defaults to python
+        profile : String
+            The load profile, e.g. ramp:300:0.1-1 or sine:3600:0.5-2+poisson,
+            defaults to a flat rate
 
         """
 
         self.validate(p_message_type, p_unique, p_shared,
                       p_message_text, p_frequency, p_max_count)
         self.message_type = int(p_message_type)
-        self.frequency = int(p_frequency)
+        self.frequency = self.parse_frequency(p_frequency)
         self.message_text = p_message_text
+        self.template = MessageTemplate.compile(p_message_text)
         self.shared = p_shared.upper()
-        self.counter = 0
         self.max_count = int(p_max_count)
         self.unique, self.seed = self.parse_unique_string(p_unique.upper())
+        self.trace_style, self.trace_depth =\
+            self.parse_trace_string(p_trace.lower())
+        self.profile = LoadProfile.parse(p_profile)
+        self.definition = ''
+        self.set_initial_state()
+
+    @classmethod
+    def from_compiled(cls, compiled: tuple):
+        """creates a LogMessage from a validated definition, as returned by
+        compiled, without parsing or validating it again
+
+        Parameters
+        ----------
+        compiled : Tuple
+            The validated definition
+        Return
+        ------
+            LogMessage
+                the message, with its own template and load profile
+        """
+
+        message = cls.__new__(cls)
+        (message.message_type, message.frequency, message.message_text,
+         template, message.shared, message.max_count, message.unique,
+         message.seed, message.trace_style, message.trace_depth,
+         profile, message.definition) = compiled
+        message.template = None if template is None else\
+            MessageTemplate(message.message_text, *template)
+        message.profile = None if profile is None else LoadProfile(*profile)
+        message.set_initial_state()
+        return message
+
+    def compiled(self) -> tuple:
+        """returns the validated definition, made up of plain values so it
+        can be cached and passed to from_compiled
+
+        Return
+        ------
+            Tuple
+                The validated definition
+        """
+
+        template = None if self.template is None else\
+            (self.template.format, self.template.fields)
+        profile = None if self.profile is None else\
+            (self.profile.shape, self.profile.arguments, self.profile.poisson)
+        return (self.message_type, self.frequency, self.message_text,
+                template, self.shared, self.max_count, self.unique,
+                self.seed, self.trace_style, self.trace_depth, profile,
+                self.definition)
+
+    def set_initial_state(self):
+        """sets the state of a message that has not been written yet"""
+
+        self.counter = 0
+        self.counter_step = 1
+        self.stack_traces = ()
+        self.token_generator = None
+        self.encoded_lines = ()
+        self.next_due = 0.0
+        self.day_of_year = ''
+        self.day_start = 0.0
+        self.day_end = 0.0
+        self.lookahead = []
+        self.lookahead_index = 0
+        self.lookahead_counter = 0
+        self.lookahead_prefix = ''
+        self.event = None
+        self.output_bytes = 0
+        self.drift = 0.0
+        self.max_drift = 0.0
+        self.skipped = 0
+        self.released = 0.0
 
     def validate(self, p_message_type: str, p_unique: str, p_shared: str,
                  p_message_text: str, p_frequency: int, p_max_count: int):
@@ -81,8 +251,9 @@ class LogMessage():
         ----------
         message_type : String
             indicates whether it is a Connection or Unknown message
-        frequency : int
-            Expected to be a positive integer
+        frequency : String
+            Expected to be a positive number of seconds or a positive
+            N/s rate
         message_text : String
             Expected not to be empty
         shared : String
@@ -96,7 +267,8 @@ class LogMessage():
         ------
             Exception:
                 invalid parameters used to create log entry:
-                    frequency and max_count must be positive integers
+                    frequency must be a positive number or N/s rate
+                    max_count must be a positive integer
                     shared must be Y or N
                     message_type must be 0 or 1
                     message_type must have a value
@@ -105,9 +277,10 @@ class LogMessage():
         issues = []
         if len(p_message_text) == 0:
             issues.append('message_type must have a value')
-        if (not p_frequency.isdecimal() or int(p_frequency) < 1):
+        if self.parse_frequency(p_frequency) is None:
             issues.append(
-                ' frequency must be a positive integer')
+                ' frequency must be a positive number of seconds or' +
+                ' a rate such as 100/s')
         # may change this to allow -1 for unlimited MAX408701
         if (not p_max_count.isdecimal() or int(p_max_count) < 0):
             issues.append(
@@ -158,7 +331,73 @@ class LogMessage():
                             "Supplied value is : " + val +
                             " Expected Y|N with optional :seed for Y")
 
-    def output_string(self) -> str:
+    def parse_frequency(self, val: str) -> float:
+        """parses the frequency value which can be :
+            n       - a whole number of seconds, e.g. 5
+            n.n     - a fractional number of seconds, e.g. 0.001
+            n/s     - a rate of messages per second, e.g. 1000/s
+
+        Parameters
+        ----------
+        val : String
+            The frequency value
+        Return
+        ------
+            float
+                The interval in seconds between messages, or None if the
+                value is not a valid positive frequency
+        """
+
+        val = val.strip().lower()
+        is_rate = val.endswith('/s')
+        if is_rate:
+            val = val[:-2]
+        try:
+            number = float(val)
+        except ValueError:
+            return None
+        # reject nan, inf and anything that is not strictly positive
+        if not number > 0 or number == float('inf'):
+            return None
+        if is_rate:
+            return 1.0 / number
+        return number
+
+    def parse_trace_string(self, val: str) -> tuple:
+        """parses the stack trace value which can be :
+            (empty)     - the default python style
+            style
+            style:depth
+        Raises an exception to stop the process
+
+        Parameters
+        ----------
+        val : String
+            The stack trace value
+        Return
+        ------
+            Str,int
+                Style, Depth (0 for the default depth)
+
+        Raises
+        ------
+            Exception:
+                Invalid value for TRACE flag
+                 Supplied value is <val>
+                 Expected style with optional :depth
+        """
+
+        style, _, depth = val.strip().partition(':')
+        style = style or 'python'
+        if style in StackTraceLibrary.STYLES and\
+                (depth == '' or (depth.isdecimal() and int(depth) > 0)):
+            return style, int(depth or 0)
+        raise Exception("Invalid value for TRACE flag, " +
+                        "Supplied value is : " + val +
+                        " Expected " + '|'.join(StackTraceLibrary.STYLES) +
+                        " with optional :depth")
+
+    def output_string(self, now: float = None) -> str:
         """
         Outputs a formatted log messages depending on
            a combination of the following flags:
@@ -179,18 +418,37 @@ class LogMessage():
             The current year and day of the year
             An integer counter (increased every time the message is generated)
 
+        When the message text has placeholders they are filled in by the
+        compiled template, the MD5 hash does not depend on their values
+
+        Parameters
+        ----------
+        now : float
+            The time of the message as seconds since the epoch, used for the
+            day of the year, defaults to the current time.  A LogDriver
+            running against a simulated clock supplies the simulated time
+
         """
 
         output_string = ""
+        if self.template is None:
+            text = self.message_text
+        else:
+            text = self.template.render(self.counter, self.counter_step)
         if self.unique == 'N':
-            output_string = self.message_text
+            output_string = text
         elif self.unique == 'Y':
-            if self.shared == 'N':
+            if self.shared == 'N' and self.token_generator is not None:
+                # generate a new unique message every time from a counter
+                output_string = text + " " +\
+                    self.token_generator.next_token()
+
+            elif self.shared == 'N':
                 # generate a new unique message every time
                 uniqueness = str(datetime.datetime.now())
-                full_string = self.message_text + " " + uniqueness
+                full_string = text + " " + uniqueness
                 result = hashlib.md5(full_string.encode())
-                output_string = self.message_text + " " + result.hexdigest()
+                output_string = text + " " + result.hexdigest()
 
             elif self.shared == 'Y':
                 # generate a message that is unique across multiple instances
@@ -200,13 +458,108 @@ class LogMessage():
                 # this gives the ability to link similar  but not identical
                 # messages
                 if self.seed == "":
-                    uniqueness = datetime.datetime.now().strftime("%j")
+                    prefix = self.get_day_of_year(now)
                 else:
-                    uniqueness = self.seed
-                uniqueness = uniqueness + str(self.counter)
+                    prefix = self.seed
 
-                result = hashlib.md5(uniqueness.encode())
-                output_string = self.message_text + " " + result.hexdigest()
+                # the sequence is deterministic, so it is taken from a block
+                # of precomputed messages, which is refilled when it runs
+                # out, the day changes or the counter is moved
+                if self.lookahead_index >= len(self.lookahead) or\
+                        self.lookahead_counter != self.counter or\
+                        self.lookahead_prefix != prefix:
+                    self.fill_lookahead(prefix)
+                output_string = self.lookahead[self.lookahead_index]
+                if self.template is not None:
+                    # the hash does not depend on the placeholder values
+                    output_string = text + output_string
+                self.lookahead_index += 1
+                self.lookahead_counter += self.counter_step
 
-        self.counter = self.counter + 1
+        self.counter = self.counter + self.counter_step
         return output_string
+
+    def advance(self):
+        """moves the counter on to the next message, as output_string does,
+        for a UNIQUE=N message whose text has already been encoded
+        """
+
+        self.counter = self.counter + self.counter_step
+
+    def next_time(self, when: float) -> float:
+        """returns the time of the message after one at when, one frequency
+        later unless the message has a load profile
+
+        Parameters
+        ----------
+        when : float
+            The time of the previous message, or when the message started
+        """
+
+        if self.profile is None:
+            return when + self.frequency
+        return self.profile.next_time(when, self.frequency)
+
+    def get_day_of_year(self, now: float = None) -> str:
+        """returns the day of the year used for SHARED=Y sequences.
+        The bounds of the current day are kept so that it is only
+        recomputed when the day changes
+
+        Parameters
+        ----------
+        now : float
+            The time in seconds since the epoch, defaults to the current time
+        Return
+        ------
+            String
+                The day of the year, 001 - 366
+        """
+
+        if now is None:
+            now = time.time()
+        if not self.day_start <= now < self.day_end:
+            local = time.localtime(now)
+            self.day_of_year = time.strftime("%j", local)
+            # mktime normalises the day after the end of the month and
+            # allows for daylight saving changes
+            self.day_start = time.mktime(
+                (local.tm_year, local.tm_mon, local.tm_mday,
+                 0, 0, 0, 0, 0, -1))
+            self.day_end = time.mktime(
+                (local.tm_year, local.tm_mon, local.tm_mday + 1,
+                 0, 0, 0, 0, 0, -1))
+        return self.day_of_year
+
+    def fill_lookahead(self, prefix: str):
+        """precomputes the SHARED=Y output strings for the next block of
+        counter values, no more than the messages left to generate
+
+        Parameters
+        ----------
+        prefix : String
+            The day of the year or the seed the counter is appended to
+        """
+
+        size = self.LOOKAHEAD
+        if self.max_count != 0:
+            remaining = (self.max_count - self.counter +
+                         self.counter_step - 1) // self.counter_step
+            size = max(1, min(size, remaining))
+        # the hash state after the prefix is shared by the whole block
+        base = hashlib.md5(prefix.encode())
+        if self.template is None:
+            text = self.message_text + " "
+        else:
+            # the rendered text is added as each message is written
+            text = " "
+        lookahead = []
+        for counter in range(self.counter,
+                             self.counter + size * self.counter_step,
+                             self.counter_step):
+            digest = base.copy()
+            digest.update(str(counter).encode())
+            lookahead.append(text + digest.hexdigest())
+        self.lookahead = lookahead
+        self.lookahead_index = 0
+        self.lookahead_counter = self.counter
+        self.lookahead_prefix = prefix
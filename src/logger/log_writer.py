@@ -0,0 +1,455 @@
+import collections
+import threading
+import time
+
+
+class BufferedLogWriter():
+    """BufferedLogWriter gathers formatted log lines into a large buffer and
+       writes them to the output stream in bulk, rather than writing and
+       flushing every line on its own
+
+       The buffer is flushed when it reaches a size threshold, when it has
+       not been flushed for a time threshold and when the writer is closed
+
+       Attributes
+       ----------
+       stream : stream
+           The stream the buffered lines are written to
+       flush_bytes : int
+           The number of buffered characters, or bytes, that triggers a flush
+       flush_interval : float
+           The maximum number of seconds a line is held in the buffer
+       binary : bool
+           Whether the lines are bytes for a binary stream rather than
+           strings for a text stream
+
+       Methods
+       -------
+       write(line: str)
+            adds a formatted line to the buffer
+       write_lines(lines: list)
+            adds a list of formatted lines to the buffer
+       flush()
+            writes the buffer to the stream
+       close()
+            stops the flush timer and writes any remaining lines
+    """
+
+    def __init__(self, stream, flush_bytes: int, flush_interval: float,
+                 binary: bool = False):
+        """initialise the buffer and start the flush timer thread
+
+        Parameters
+        ----------
+        stream : stream
+            The stream the buffered lines are written to
+        flush_bytes : int
+            The number of buffered characters, or bytes, that triggers a flush
+        flush_interval : float
+            The maximum number of seconds a line is held in the buffer
+        binary : bool
+            Whether the lines are bytes for a binary stream rather than
+            strings for a text stream
+        """
+
+        self.stream = stream
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.binary = binary
+        self.empty = b'' if binary else ''
+        self.buffer = []
+        self.buffered = 0
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.closed = threading.Event()
+        self.timer = threading.Thread(target=self.flush_timer,
+                                      name="log-writer-flush", daemon=True)
+        self.timer.start()
+
+    def write(self, line: str):
+        """adds a formatted line to the buffer, flushing the buffer
+        when it reaches flush_bytes
+
+        Parameters
+        ----------
+        line : String
+            The formatted line, including its line terminator
+        """
+
+        with self.lock:
+            self.buffer.append(line)
+            self.buffered += len(line)
+            if self.buffered >= self.flush_bytes:
+                self.flush_locked()
+
+    def write_lines(self, lines: list):
+        """adds a list of formatted lines to the buffer, flushing the
+        buffer when it reaches flush_bytes
+
+        Parameters
+        ----------
+        lines : List
+            The formatted lines, each including its line terminator
+        """
+
+        with self.lock:
+            self.buffer.extend(lines)
+            self.buffered += sum(map(len, lines))
+            if self.buffered >= self.flush_bytes:
+                self.flush_locked()
+
+    def flush(self):
+        """writes the buffer to the stream"""
+
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        """writes the buffer to the stream, the caller must hold the lock"""
+
+        if self.buffer:
+            self.stream.write(self.empty.join(self.buffer))
+            self.stream.flush()
+            self.buffer = []
+            self.buffered = 0
+        self.last_flush = time.monotonic()
+
+    def flush_timer(self):
+        """flushes the buffer once it has been held for flush_interval,
+        runs on a daemon thread until the writer is closed
+        """
+
+        wait = self.flush_interval
+        while not self.closed.wait(wait):
+            with self.lock:
+                elapsed = time.monotonic() - self.last_flush
+                if elapsed >= self.flush_interval:
+                    self.flush_locked()
+                    wait = self.flush_interval
+                else:
+                    wait = self.flush_interval - elapsed
+
+    def close(self):
+        """stops the flush timer and writes any remaining lines"""
+
+        self.closed.set()
+        if self.timer is not threading.current_thread():
+            self.timer.join()
+        self.flush()
+
+
+class DirectLogWriter():
+    """DirectLogWriter writes and flushes every formatted log line as soon
+       as it is written, for line at a time output that does not go through
+       the logging module
+
+       Attributes
+       ----------
+       stream : stream
+           The stream the lines are written to
+       binary : bool
+           Whether the lines are bytes for a binary stream rather than
+           strings for a text stream
+
+       Methods
+       -------
+       write(line)
+            writes and flushes a formatted line
+       write_lines(lines: list)
+            writes and flushes a list of formatted lines
+       flush()
+            flushes the stream
+       close()
+            flushes the stream
+    """
+
+    def __init__(self, stream, binary: bool = False):
+        """
+        Parameters
+        ----------
+        stream : stream
+            The stream the lines are written to
+        binary : bool
+            Whether the lines are bytes for a binary stream rather than
+            strings for a text stream
+        """
+
+        self.stream = stream
+        self.binary = binary
+        self.empty = b'' if binary else ''
+        self.lock = threading.Lock()
+
+    def write(self, line):
+        """writes and flushes a formatted line
+
+        Parameters
+        ----------
+        line : bytes or String
+            The formatted line, including its line terminator
+        """
+
+        with self.lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+    def write_lines(self, lines: list):
+        """writes and flushes a list of formatted lines
+
+        Parameters
+        ----------
+        lines : List
+            The formatted lines, each including its line terminator
+        """
+
+        with self.lock:
+            self.stream.write(self.empty.join(lines))
+            self.stream.flush()
+
+    def flush(self):
+        """flushes the stream"""
+
+        with self.lock:
+            self.stream.flush()
+
+    def close(self):
+        """flushes the stream"""
+
+        self.flush()
+
+
+class QueuedLogWriter():
+    """QueuedLogWriter hands formatted log lines to a dedicated writer
+       thread through a bounded queue, so a stalled output stream, e.g. a
+       pipe nobody is reading, never blocks the scheduling loop unless the
+       overflow policy says it should
+
+       The writer thread writes every line waiting in the queue as one
+       write.  When the queue is full the overflow policy decides what
+       happens to the lines that do not fit:
+           block       - the scheduling loop waits for room, each line
+                         that had to wait is counted as delayed
+           drop-newest - the lines that do not fit are dropped
+           drop-oldest - the oldest queued lines are dropped to make room
+           sample      - once the queue is half full only one line in
+                         sample_every is queued, the rest are dropped, and
+                         lines that do not fit are dropped
+       so the dropped and delayed counts tell lines lost or held up by the
+       generator from lines lost further down the pipeline
+
+       Attributes
+       ----------
+       stream : stream
+           The stream the lines are written to
+       capacity : int
+           The maximum number of lines held in the queue
+       policy : String
+           What happens to lines when the queue is full, block,
+           drop-newest, drop-oldest or sample
+       sample_every : int
+           One line in sample_every is queued while sampling
+       binary : bool
+           Whether the lines are bytes for a binary stream rather than
+           strings for a text stream
+       written_lines : int
+           The number of lines written to the stream
+       dropped_lines : int
+           The number of lines dropped because the queue was full
+       delayed_lines : int
+           The number of lines that waited for room in the queue
+       high_water : int
+           The largest number of lines held in the queue
+
+       Methods
+       -------
+       write(line)
+            queues a formatted line
+       write_lines(lines: list)
+            queues a list of formatted lines
+       flush()
+            waits until every queued line has been written
+       close(timeout: float)
+            writes the queued lines and stops the writer thread
+       report()
+            describes any lines that were dropped or delayed
+    """
+
+    POLICIES = ("block", "drop-newest", "drop-oldest", "sample")
+
+    def __init__(self, stream, capacity: int, policy: str = "block",
+                 sample_every: int = 10, binary: bool = False):
+        """initialise the queue and start the writer thread
+
+        Parameters
+        ----------
+        stream : stream
+            The stream the lines are written to
+        capacity : int
+            The maximum number of lines held in the queue
+        policy : String
+            What happens to lines when the queue is full, block,
+            drop-newest, drop-oldest or sample
+        sample_every : int
+            One line in sample_every is queued while sampling
+        binary : bool
+            Whether the lines are bytes for a binary stream rather than
+            strings for a text stream
+        """
+
+        self.stream = stream
+        self.capacity = capacity
+        self.policy = policy
+        self.sample_every = sample_every
+        self.binary = binary
+        self.empty = b'' if binary else ''
+        self.queue = collections.deque()
+        self.sampled = 0
+        self.written_lines = 0
+        self.dropped_lines = 0
+        self.delayed_lines = 0
+        self.high_water = 0
+        self.writing = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.thread = threading.Thread(target=self.write_queued,
+                                       name="log-writer-queue", daemon=True)
+        self.thread.start()
+
+    def write(self, line):
+        """queues a formatted line
+
+        Parameters
+        ----------
+        line : bytes or String
+            The formatted line, including its line terminator
+        """
+
+        self.write_lines((line,))
+
+    def write_lines(self, lines):
+        """queues a list of formatted lines, applying the overflow policy
+        to the lines that do not fit
+
+        Parameters
+        ----------
+        lines : List
+            The formatted lines, each including its line terminator
+        """
+
+        with self.lock:
+            queue = self.queue
+            room = self.capacity - len(queue)
+            if self.policy == "sample" and\
+                    (len(queue) + len(lines)) * 2 > self.capacity:
+                for line in lines:
+                    if len(queue) * 2 >= self.capacity:
+                        self.sampled += 1
+                        if (self.sampled - 1) % self.sample_every or\
+                                len(queue) >= self.capacity:
+                            self.dropped_lines += 1
+                            continue
+                    queue.append(line)
+            elif len(lines) <= room:
+                queue.extend(lines)
+            elif self.policy == "block":
+                self.delayed_lines += len(lines) - room
+                start = 0
+                while True:
+                    room = self.capacity - len(queue)
+                    queue.extend(lines[start:start + room])
+                    start += room
+                    if start >= len(lines):
+                        break
+                    if not self.thread.is_alive():
+                        # nothing will make room, so the rest are dropped
+                        self.delayed_lines -= len(lines) - start
+                        self.dropped_lines += len(lines) - start
+                        break
+                    self.not_empty.notify()
+                    self.not_full.wait(0.1)
+            elif self.policy == "drop-oldest":
+                overflow = len(queue) + len(lines) - self.capacity
+                self.dropped_lines += overflow
+                if len(lines) >= self.capacity:
+                    queue.clear()
+                    queue.extend(lines[-self.capacity:])
+                else:
+                    for _ in range(overflow):
+                        queue.popleft()
+                    queue.extend(lines)
+            else:
+                queue.extend(lines[:room])
+                self.dropped_lines += len(lines) - room
+            if len(queue) > self.high_water:
+                self.high_water = len(queue)
+            self.not_empty.notify()
+
+    def write_queued(self):
+        """writes every queued line as one write, runs on the writer thread
+        until the writer is closed and the queue is empty.  Lines that the
+        stream fails to write, e.g. on a broken pipe, are counted as
+        dropped"""
+
+        while True:
+            with self.lock:
+                while not self.queue and not self.closed:
+                    self.not_empty.wait()
+                if not self.queue:
+                    return
+                lines = list(self.queue)
+                self.queue.clear()
+                self.writing = len(lines)
+                self.not_full.notify_all()
+            try:
+                self.stream.write(self.empty.join(lines))
+                self.stream.flush()
+                written = len(lines)
+            except (OSError, ValueError):
+                written = 0
+            with self.lock:
+                self.written_lines += written
+                self.dropped_lines += len(lines) - written
+                self.writing = 0
+                self.not_full.notify_all()
+
+    def flush(self):
+        """waits until every queued line has been written"""
+
+        with self.lock:
+            while (self.queue or self.writing) and self.thread.is_alive():
+                self.not_empty.notify()
+                self.not_full.wait(0.1)
+
+    def close(self, timeout: float = 5.0):
+        """writes the queued lines and stops the writer thread, giving up
+        on the lines that cannot be written within timeout seconds, which
+        are counted as dropped
+
+        Parameters
+        ----------
+        timeout : float
+            The number of seconds allowed for the queued lines
+        """
+
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify()
+        if self.thread is threading.current_thread():
+            return
+        self.thread.join(timeout)
+        with self.lock:
+            self.dropped_lines += len(self.queue)
+            self.queue.clear()
+
+    def report(self) -> str:
+        """describes any lines that were dropped or delayed because the
+        queue was full, or returns None if none were"""
+
+        if not self.dropped_lines and not self.delayed_lines:
+            return None
+        return "Output queue : " + str(self.written_lines) +\
+            " lines written, " + str(self.dropped_lines) +\
+            " lines dropped, " + str(self.delayed_lines) +\
+            " lines delayed, at most " + str(self.high_water) +\
+            " lines queued"
@@ -0,0 +1,207 @@
+import random
+import re
+import socket
+import struct
+
+
+class MessageTemplate():
+    """MessageTemplate is a message text with placeholders, compiled once
+       into a format string and a list of fields, that renders the text of
+       each log line
+
+       The placeholders are:
+           {ip}            a random IPv4 address
+           {user_id}       a random user id, user00000 - user99999
+           {host}          a random host name, host-000 - host-999
+           {int:a-b}       a random integer from a to b inclusive
+           {choice:a|b|c}  one of the values chosen at random
+           {counter}       the message counter
+       with {{ and }} for literal braces
+
+       Rather than generating the field values for each line, the lines are
+       rendered in blocks: the random values for a whole block are taken
+       from a single call to the random number generator and the lines are
+       formatted together.  Blocks start small so that slow messages do not
+       render lines they never write, and double in size up to BLOCK
+
+       Attributes
+       ----------
+       text : String
+           The message text the template was compiled from
+       format : String
+           The %-format string with a %s for each field
+       fields : List
+           The name and arguments of each field, in order
+
+       Methods
+       -------
+       compile(text: str)
+            compiles a message text, returning None if it has no placeholders
+       render(counter: int, step: int)
+            returns the text of the line for a counter value
+    """
+
+    BLOCK = 4096
+    FIRST_BLOCK = 16
+    NAMES = ('ip', 'user_id', 'host', 'int', 'choice', 'counter')
+    PLACEHOLDER = re.compile(r'\{\{|\}\}|\{([a-z_]+)(?::([^{}]*))?\}')
+
+    def __init__(self, text: str, format: str, fields: list,
+                 seed: str = None):
+        """
+        Parameters
+        ----------
+        text : String
+            The message text the template was compiled from
+        format : String
+            The %-format string with a %s for each field
+        fields : List
+            The name and arguments of each field, in order
+        seed : String
+            Seeds the random field values, for a repeatable sequence,
+            defaults to a random seed
+        """
+
+        self.text = text
+        self.format = format
+        self.fields = fields
+        self.random = random.Random(seed)
+        self.block = []
+        self.index = 0
+        self.block_counter = 0
+        self.block_size = self.FIRST_BLOCK
+
+    @classmethod
+    def compile(cls, text: str, seed: str = None):
+        """compiles a message text into a MessageTemplate
+
+        Parameters
+        ----------
+        text : String
+            The message text
+        seed : String
+            Seeds the random field values, defaults to a random seed
+        Return
+        ------
+            MessageTemplate
+                the compiled template, or None if the text has no
+                placeholders and is written as it is
+
+        Raises
+        ------
+            Exception:
+                Invalid placeholder in MESSAGE_TEXT
+        """
+
+        parts = []
+        fields = []
+        position = 0
+        for match in cls.PLACEHOLDER.finditer(text):
+            parts.append(text[position:match.start()].replace('%', '%%'))
+            position = match.end()
+            if match.group(1) is None:
+                # an escaped brace
+                parts.append(match.group()[0])
+                continue
+            fields.append(cls.parse_field(match.group(1), match.group(2),
+                                          match.group()))
+            parts.append('%s')
+        if not fields:
+            return None
+        parts.append(text[position:].replace('%', '%%'))
+        return cls(text, ''.join(parts), fields, seed)
+
+    @classmethod
+    def parse_field(cls, name: str, arguments: str, placeholder: str):
+        """parses a placeholder into a field
+
+        Return
+        ------
+            Tuple
+                the field name and its parsed arguments
+
+        Raises
+        ------
+            Exception:
+                Invalid placeholder in MESSAGE_TEXT
+        """
+
+        if name == 'int':
+            low, _, high = (arguments or '').partition('-')
+            if low.isdecimal() and high.isdecimal() and\
+                    int(low) <= int(high):
+                return name, (int(low), int(high))
+        elif name == 'choice':
+            if arguments:
+                return name, tuple(arguments.split('|'))
+        elif name in cls.NAMES and arguments is None:
+            return name, ()
+        raise Exception("Invalid placeholder in MESSAGE_TEXT, " +
+                        "Supplied value is : " + placeholder +
+                        " Expected {ip}, {user_id}, {host}, {int:a-b}, " +
+                        "{choice:a|b|c} or {counter}")
+
+    def render(self, counter: int, step: int = 1) -> str:
+        """returns the text of the line for a counter value, from the
+        current block, which is refilled when it runs out or the counter
+        is moved
+
+        Parameters
+        ----------
+        counter : int
+            The counter value of the line
+        step : int
+            The amount the counter increases by for each line
+        """
+
+        if self.index >= len(self.block) or self.block_counter != counter:
+            self.fill(counter, step)
+        line = self.block[self.index]
+        self.index += 1
+        self.block_counter += step
+        return line
+
+    def fill(self, counter: int, step: int):
+        """renders the lines for the next block of counter values"""
+
+        size = self.block_size
+        self.block_size = min(size * 2, self.BLOCK)
+        columns = [self.values(name, arguments, size, counter, step)
+                   for name, arguments in self.fields]
+        format = self.format
+        self.block = [format % values for values in zip(*columns)]
+        self.index = 0
+        self.block_counter = counter
+
+    def numbers(self, size: int) -> tuple:
+        """returns size random 64 bit numbers from a single call to the
+        random number generator"""
+
+        return struct.unpack(
+            '<%dQ' % size,
+            self.random.getrandbits(64 * size).to_bytes(8 * size, 'little'))
+
+    def values(self, name: str, arguments: tuple, size: int, counter: int,
+               step: int) -> list:
+        """returns the values of a field for a block of size lines"""
+
+        if name == 'counter':
+            return [str(value) for value in
+                    range(counter, counter + size * step, step)]
+        if name == 'ip':
+            packed = self.random.getrandbits(32 * size).to_bytes(
+                4 * size, 'little')
+            return [socket.inet_ntoa(packed[index:index + 4])
+                    for index in range(0, 4 * size, 4)]
+        if name == 'user_id':
+            return ['user%05d' % (value % 100000)
+                    for value in self.numbers(size)]
+        if name == 'host':
+            return ['host-%03d' % (value % 1000)
+                    for value in self.numbers(size)]
+        if name == 'int':
+            low, high = arguments
+            span = high - low + 1
+            return [str(low + value % span) for value in self.numbers(size)]
+        count = len(arguments)
+        return [arguments[value % count] for value in self.numbers(size)]
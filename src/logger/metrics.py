@@ -0,0 +1,368 @@
+import bisect
+import http.server
+import threading
+import time
+
+from logger.log_writer import QueuedLogWriter
+
+
+class Histogram():
+    """Histogram counts observations into fixed buckets, as a Prometheus
+       histogram
+
+       Attributes
+       ----------
+       buckets : Tuple
+           The upper bound of each bucket, in increasing order
+       counts : List
+           The number of observations in each bucket, and above the last
+       sum : float
+           The total of every observation
+
+       Methods
+       -------
+       observe(value: float)
+            counts an observation
+    """
+
+    def __init__(self, buckets: tuple):
+        """
+        Parameters
+        ----------
+        buckets : Tuple
+            The upper bound of each bucket, in increasing order
+        """
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """counts an observation
+
+        Parameters
+        ----------
+        value : float
+            The observed value
+        """
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class DriverMetrics():
+    """DriverMetrics holds the metrics of one LogDriver.  They are only
+       updated by the driver's own thread, as plain numbers without a lock,
+       and are read and added up by the metrics server when it is scraped,
+       so recording them costs a few additions for each write
+
+       The lines written for each definition are its counter, so only the
+       bytes, the scheduler lateness and the write latency are recorded as
+       messages are written
+
+       Attributes
+       ----------
+       driver : LogDriver
+           The driver the metrics are for
+       lateness : Histogram
+           The number of seconds each timer event fired after it was due
+       write_latency : Histogram
+           The number of seconds each write to the output took
+
+       Methods
+       -------
+       write(write, lines: list, types: list, lateness: float,
+             formatted: bool)
+            writes lines, recording the write latency, the lateness and
+            the bytes written for each LogMessage
+       write_line(write, line, type, lateness: float, overhead: int)
+            writes a single line, recording the same metrics
+    """
+
+    LATENESS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+    WRITE_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01,
+                     0.1)
+    # the timestamp, level and line terminator the logging module adds to
+    # a message text, e.g. "2020-11-17 15:25:46.877 ERROR " and "\n"
+    LINE_OVERHEAD = 31
+
+    def __init__(self, driver):
+        """
+        Parameters
+        ----------
+        driver : LogDriver
+            The driver the metrics are for
+        """
+
+        self.driver = driver
+        self.lateness = Histogram(self.LATENESS_BUCKETS)
+        self.write_latency = Histogram(self.WRITE_BUCKETS)
+
+    def write_line(self, write, line, type, lateness: float,
+                   overhead: int = 0):
+        """writes a single line, recording the same metrics as write
+
+        Parameters
+        ----------
+        write : function
+            Writes a single line
+        line : bytes or String
+            The line or message text to write
+        type : LogMessage
+            The LogMessage of the line
+        lateness : float
+            The number of seconds the timer event fired after it was due
+        overhead : int
+            The number of characters added to the line as it is written
+        """
+
+        lateness_histogram = self.lateness
+        lateness_histogram.counts[bisect.bisect_left(
+            lateness_histogram.buckets, lateness)] += 1
+        lateness_histogram.sum += lateness
+        started = time.perf_counter()
+        write(line)
+        latency = time.perf_counter() - started
+        latency_histogram = self.write_latency
+        latency_histogram.counts[bisect.bisect_left(
+            latency_histogram.buckets, latency)] += 1
+        latency_histogram.sum += latency
+        type.output_bytes += len(line) + overhead
+
+    def write(self, write, lines: list, types: list, lateness: float,
+              formatted: bool = False):
+        """writes lines, recording how long the write took, how late the
+        timer event was and the bytes written for each LogMessage
+
+        Parameters
+        ----------
+        write : function
+            Writes a list of lines, the driver's write_batch
+        lines : List
+            The lines, encoded lines or message texts to write
+        types : List
+            The LogMessage of each line
+        lateness : float
+            The number of seconds the timer event fired after it was due
+        formatted : bool
+            Whether text lines are already formatted, rather than message
+            texts the timestamp and level are added to as they are written
+        """
+
+        self.lateness.observe(lateness)
+        started = time.perf_counter()
+        write(lines)
+        self.write_latency.observe(time.perf_counter() - started)
+        overhead = 0
+        if lines and isinstance(lines[0], str) and not formatted:
+            overhead = self.LINE_OVERHEAD
+        for type, line in zip(types, lines):
+            type.output_bytes += len(line) + overhead
+
+
+class MetricsServer():
+    """MetricsServer serves the metrics of the registered drivers over HTTP
+       in the Prometheus text format, at /metrics, from a daemon thread
+
+       Attributes
+       ----------
+       port : int
+           The port the server listens on
+       drivers : List
+           The DriverMetrics of each registered driver
+
+       Methods
+       -------
+       shared(port: int)
+            returns the server for a port, starting it the first time
+       register(metrics: DriverMetrics)
+            adds a driver's metrics to those served
+       render()
+            returns the metrics in the Prometheus text format
+       close()
+            stops the server
+    """
+
+    servers = {}
+    lock = threading.Lock()
+
+    def __init__(self, port: int, host: str = ''):
+        """starts serving the metrics
+
+        Parameters
+        ----------
+        port : int
+            The port to listen on, 0 for any free port
+        host : String
+            The address to listen on, defaults to every address
+        """
+
+        self.drivers = []
+        self.server = http.server.HTTPServer((host, port), MetricsHandler)
+        self.server.metrics = self
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever,
+                         name="log-metrics-server", daemon=True).start()
+
+    @classmethod
+    def shared(cls, port: int):
+        """returns the server for a port, starting it the first time, so
+        every driver in a process is served on the same port
+
+        Parameters
+        ----------
+        port : int
+            The port to listen on
+        """
+
+        with cls.lock:
+            if port not in cls.servers:
+                cls.servers[port] = cls(port)
+            return cls.servers[port]
+
+    def register(self, metrics: DriverMetrics) -> DriverMetrics:
+        """adds a driver's metrics to those served
+
+        Parameters
+        ----------
+        metrics : DriverMetrics
+            The driver's metrics
+        """
+
+        with self.lock:
+            self.drivers.append(metrics)
+        return metrics
+
+    def close(self):
+        """stops the server"""
+
+        with self.lock:
+            for port, server in list(self.servers.items()):
+                if server is self:
+                    del self.servers[port]
+        self.server.shutdown()
+        self.server.server_close()
+
+    def render(self) -> str:
+        """returns the metrics of every registered driver in the Prometheus
+        text format"""
+
+        with self.lock:
+            drivers = list(self.drivers)
+        lines = []
+        definitions = []
+        for metrics in drivers:
+            driver = metrics.driver
+            messages = list(driver.log_messages)
+            for index, type in enumerate(messages):
+                written = type.counter // type.counter_step
+                rate = 1.0 if type.profile is None else type.profile.rate
+                labels = self.labels(driver=driver.name,
+                                     definition=str(index + 1),
+                                     message=type.message_text)
+                definitions.append((labels, written, type.output_bytes,
+                                    rate / type.frequency,
+                                    type.drift, type.skipped))
+        for column, name, kind, help in (
+                (1, 'log_generator_lines_total', 'counter',
+                 'Lines written for each definition'),
+                (2, 'log_generator_bytes_total', 'counter',
+                 'Bytes written for each definition, the characters of ' +
+                 'each line when it is formatted as text'),
+                (3, 'log_generator_target_rate', 'gauge',
+                 'The lines per second each definition is set to write'),
+                (4, 'log_generator_drift_seconds', 'gauge',
+                 'How long after its deadline the last line of each ' +
+                 'definition was written'),
+                (5, 'log_generator_skipped_total', 'counter',
+                 'Lines each definition skipped to catch up with its ' +
+                 'deadlines')):
+            self.family(lines, name, kind, help,
+                        [(definition[0], definition[column])
+                         for definition in definitions])
+        self.family(lines, 'log_generator_queue_depth', 'gauge',
+                    'The number of pending timer events',
+                    [(self.labels(driver=metrics.driver.name),
+                      metrics.driver.s.depth) for metrics in drivers])
+        self.family(lines, 'log_generator_sink_queue_depth', 'gauge',
+                    'The number of batches waiting for the output sink',
+                    [(self.labels(driver=metrics.driver.name),
+                      metrics.driver.sink.batches.qsize())
+                     for metrics in drivers
+                     if metrics.driver.sink is not None])
+        queued = [(self.labels(driver=metrics.driver.name),
+                   metrics.driver.writer) for metrics in drivers
+                  if isinstance(metrics.driver.writer, QueuedLogWriter)]
+        self.family(lines, 'log_generator_output_queue_depth', 'gauge',
+                    'The number of lines waiting for the writer thread',
+                    [(labels, len(writer.queue))
+                     for labels, writer in queued])
+        self.family(lines, 'log_generator_output_dropped_total', 'counter',
+                    'Lines dropped because the output queue was full',
+                    [(labels, writer.dropped_lines)
+                     for labels, writer in queued])
+        self.family(lines, 'log_generator_output_delayed_total', 'counter',
+                    'Lines that waited for room in the output queue',
+                    [(labels, writer.delayed_lines)
+                     for labels, writer in queued])
+        self.histogram(lines, 'log_generator_scheduler_lateness_seconds',
+                       'How long after it was due each timer event fired',
+                       [metrics.lateness for metrics in drivers])
+        self.histogram(lines, 'log_generator_write_seconds',
+                       'How long each write to the output took',
+                       [metrics.write_latency for metrics in drivers])
+        return '\n'.join(lines) + '\n'
+
+    def labels(self, **labels) -> str:
+        """formats Prometheus labels, escaping their values"""
+
+        return ','.join(
+            name + '="' + value.replace('\\', '\\\\').replace(
+                '"', '\\"').replace('\n', '\\n') + '"'
+            for name, value in labels.items())
+
+    def family(self, lines: list, name: str, kind: str, help: str,
+               samples: list):
+        """adds a metric family and its samples"""
+
+        lines.append('# HELP ' + name + ' ' + help)
+        lines.append('# TYPE ' + name + ' ' + kind)
+        for labels, value in samples:
+            lines.append(name + '{' + labels + '} ' + repr(value))
+
+    def histogram(self, lines: list, name: str, help: str,
+                  histograms: list):
+        """adds a histogram, the total of every driver's histogram"""
+
+        buckets = histograms[0].buckets if histograms else ()
+        counts = [sum(histogram.counts[index] for histogram in histograms)
+                  for index in range(len(buckets) + 1)]
+        lines.append('# HELP ' + name + ' ' + help)
+        lines.append('# TYPE ' + name + ' histogram')
+        total = 0
+        for bound, count in zip(buckets + (float('inf'),), counts):
+            total += count
+            lines.append(name + '_bucket{le="' +
+                         ('+Inf' if bound == float('inf') else repr(bound)) +
+                         '"} ' + str(total))
+        lines.append(name + '_sum ' +
+                     repr(sum(histogram.sum for histogram in histograms)))
+        lines.append(name + '_count ' + str(total))
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """serves GET /metrics for a MetricsServer"""
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
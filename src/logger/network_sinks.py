@@ -0,0 +1,474 @@
+import errno
+import http.client
+import itertools
+import os
+import queue
+import re
+import socket
+import threading
+import time
+import urllib.parse
+
+from logger.file_sink import create_file_sink
+
+# every log line starts with its date and time, which tells the lines of a
+# batch apart from the line breaks in multiline stack traces
+LINE_START = re.compile(rb'\n(?=\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{3} )')
+
+
+class NetworkSink():
+    """NetworkSink is a write-only stream that sends the log lines written
+       to it over the network, so that a BufferedLogWriter can write to a
+       collector instead of stderr
+
+       Each write is one batch of complete lines.  Batches are queued and
+       sent by a sender thread, so the scheduling loop never waits for the
+       network unless the queue is full.  The connection is opened on the
+       first send and kept open, when a send fails the sink reconnects and
+       sends the rest of the batch again, backing off exponentially up to
+       max_backoff seconds between attempts.  Subclasses implement the
+       protocol, counting in progress the lines of the batch they have
+       already sent or dropped, so those are not sent again.  Over TCP a
+       line counts as sent once all of it has been taken by the socket, a
+       line cut off by a failure is sent again whole, so the collector may
+       receive a partial copy of it before the whole line.  An HTTP batch
+       is sent again whole
+
+       Attributes
+       ----------
+       host : String
+           The collector's host name or address
+       port : int
+           The collector's port
+       timeout : float
+           The number of seconds to wait to connect or send
+       max_backoff : float
+           The maximum number of seconds between reconnection attempts
+       sent_lines : int
+           The number of lines sent
+       dropped_lines : int
+           The number of lines that could not be sent
+       reconnects : int
+           The number of times the connection failed and was reopened
+       progress : int
+           The number of lines of the batch being sent that have been
+           sent or dropped
+
+       Methods
+       -------
+       write(data)
+            queues a batch of lines to be sent
+       flush()
+            does nothing, each batch is sent as soon as possible
+       close(timeout: float)
+            sends the queued batches and closes the connection
+       report()
+            describes any lines that could not be sent
+    """
+
+    QUEUE_SIZE = 64
+    FIRST_BACKOFF = 0.1
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0,
+                 max_backoff: float = 30.0):
+        """
+        Parameters
+        ----------
+        host : String
+            The collector's host name or address
+        port : int
+            The collector's port
+        timeout : float
+            The number of seconds to wait to connect or send
+        max_backoff : float
+            The maximum number of seconds between reconnection attempts
+        """
+
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.sent_lines = 0
+        self.dropped_lines = 0
+        self.reconnects = 0
+        self.progress = 0
+        self.connection = None
+        self.deadline = None
+        self.batches = queue.Queue(self.QUEUE_SIZE)
+        self.sender = threading.Thread(target=self.send_batches,
+                                       name="log-sink-sender", daemon=True)
+        self.sender.start()
+
+    def write(self, data):
+        """queues a batch of lines to be sent, waiting if the queue is full
+
+        Parameters
+        ----------
+        data : bytes or String
+            one or more complete log lines
+        """
+
+        if isinstance(data, str):
+            data = data.encode()
+        if data:
+            self.batches.put(data)
+
+    def flush(self):
+        """does nothing, each batch is sent as soon as possible"""
+
+    def close(self, timeout: float = 5.0):
+        """sends the queued batches, giving up on any that cannot be sent
+        within timeout seconds, and closes the connection
+
+        Parameters
+        ----------
+        timeout : float
+            The number of seconds allowed for the queued batches
+        """
+
+        self.deadline = time.monotonic() + timeout
+        self.batches.put(None)
+        self.sender.join(timeout + self.timeout)
+
+    def report(self) -> str:
+        """describes any lines that could not be sent, or returns None
+        if every line was sent"""
+
+        if not self.dropped_lines:
+            return None
+        return "Network sink : " + str(self.sent_lines) +\
+            " lines sent, " + str(self.dropped_lines) + " lines dropped"
+
+    def send_batches(self):
+        """sends each queued batch in turn, runs on the sender thread until
+        the sink is closed"""
+
+        while True:
+            data = self.batches.get()
+            if data is None:
+                break
+            self.deliver(data)
+        self.disconnect()
+
+    def deliver(self, data: bytes):
+        """sends a batch, reconnecting and retrying the lines not yet sent
+        with exponential backoff until they are sent, or until the close
+        deadline has passed"""
+
+        lines = len(LINE_START.findall(data.rstrip(b'\n'))) + 1
+        self.progress = 0
+        backoff = self.FIRST_BACKOFF
+        while True:
+            try:
+                if self.connection is None:
+                    self.connection = self.connect()
+                if self.send(data):
+                    self.sent_lines += lines - self.progress
+                else:
+                    self.dropped_lines += lines - self.progress
+                return
+            except (OSError, http.client.HTTPException):
+                self.disconnect()
+                self.reconnects += 1
+            wait = backoff
+            if self.deadline is not None:
+                wait = min(wait, self.deadline - time.monotonic())
+                if wait <= 0:
+                    self.dropped_lines += lines - self.progress
+                    return
+            time.sleep(wait)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def disconnect(self):
+        """closes the connection, it is reopened by the next send"""
+
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except OSError:
+                pass
+            self.connection = None
+
+    def connect(self):
+        """opens a connection to the collector"""
+
+        return socket.create_connection((self.host, self.port), self.timeout)
+
+    def send(self, data: bytes) -> bool:
+        """sends the lines of a batch after the first progress lines on
+        the open connection
+
+        Return
+        ------
+            bool
+                False if the collector rejected the batch, which is dropped
+        """
+
+        raise NotImplementedError
+
+    def send_stream(self, data: bytes, ends: list):
+        """sends the messages of a batch on a stream connection, after the
+        first progress, with as few sends as the socket allows.  Each
+        message is counted in progress and sent_lines once all of it has
+        been sent
+
+        Parameters
+        ----------
+        data : bytes
+            The messages, one after another
+        ends : List
+            The offset in data just after each message
+        """
+
+        view = memoryview(data)
+        offset = ends[self.progress - 1] if self.progress else 0
+        while self.progress < len(ends):
+            offset += self.connection.send(view[offset:])
+            while self.progress < len(ends) and\
+                    ends[self.progress] <= offset:
+                self.progress += 1
+                self.sent_lines += 1
+
+
+class TcpLineSink(NetworkSink):
+    """TcpLineSink sends the log lines as they are, each terminated by a
+       newline, over a TCP connection"""
+
+    def send(self, data: bytes) -> bool:
+        ends = [match.start() + 1
+                for match in LINE_START.finditer(data.rstrip(b'\n'))]
+        self.send_stream(data, ends + [len(data)])
+        return True
+
+
+class SyslogFormatter():
+    """SyslogFormatter frames log lines as RFC 5424 syslog messages.
+       The timestamp at the start of each line becomes the message's
+       timestamp, and the rest of the line its MSG, so stack traces that
+       span several lines stay in one message
+
+       Methods
+       -------
+       messages(data: bytes)
+            returns the syslog message for each line of a batch
+    """
+
+    # user-level messages, error or warning severity
+    PRIORITIES = {b'ERROR': b'<11>', b'WARNING': b'<12>'}
+    TIMESTAMP = re.compile(
+        rb'(\d{4}-\d\d-\d\d) (\d\d:\d\d:\d\d\.\d{3}) (\w+) ')
+
+    def __init__(self, app_name: str = 'log-generator'):
+        """
+        Parameters
+        ----------
+        app_name : String
+            The APP-NAME of every message
+        """
+
+        self.header = (' ' + (socket.gethostname() or '-') + ' ' +
+                       app_name + ' ' + str(os.getpid()) +
+                       ' - - ').encode()
+        self.offsets = {}
+
+    def offset(self, date: bytes, clock: bytes) -> bytes:
+        """returns the local UTC offset at a date and time, as +hh:mm,
+        computed once for each hour"""
+
+        hour = date + clock[:2]
+        offset = self.offsets.get(hour)
+        if offset is None:
+            local = time.mktime(time.strptime(hour.decode(), '%Y-%m-%d%H'))
+            offset = time.strftime('%z', time.localtime(local))
+            offset = (offset[:3] + ':' + offset[3:]).encode()
+            if len(self.offsets) > 1000:
+                self.offsets.clear()
+            self.offsets[hour] = offset
+        return offset
+
+    def messages(self, data: bytes) -> list:
+        """returns the syslog message for each line of a batch
+
+        Parameters
+        ----------
+        data : bytes
+            one or more complete log lines
+        """
+
+        messages = []
+        for line in LINE_START.split(data.rstrip(b'\n')):
+            match = self.TIMESTAMP.match(line)
+            if match is None:
+                messages.append(b'<11>1 -' + self.header + line)
+                continue
+            date, clock, level = match.groups()
+            messages.append(
+                self.PRIORITIES.get(level, b'<11>') + b'1 ' + date + b'T' +
+                clock + self.offset(date, clock) + self.header +
+                line[match.start(3):])
+        return messages
+
+
+class SyslogTcpSink(NetworkSink):
+    """SyslogTcpSink sends RFC 5424 syslog messages over a TCP connection,
+       framed by octet counting as described in RFC 6587, each batch in a
+       single send"""
+
+    def __init__(self, host: str, port: int, **options):
+        self.formatter = SyslogFormatter()
+        super().__init__(host, port, **options)
+
+    def send(self, data: bytes) -> bool:
+        frames = [str(len(message)).encode() + b' ' + message
+                  for message in self.formatter.messages(data)]
+        self.send_stream(b''.join(frames),
+                         list(itertools.accumulate(map(len, frames))))
+        return True
+
+
+class SyslogUdpSink(NetworkSink):
+    """SyslogUdpSink sends RFC 5424 syslog messages over UDP, one datagram
+       for each message as described in RFC 5426.  A message too large for
+       a datagram can never be sent, so it is dropped rather than retried"""
+
+    def __init__(self, host: str, port: int, **options):
+        self.formatter = SyslogFormatter()
+        super().__init__(host, port, **options)
+
+    def connect(self):
+        family, type, proto, _, address = socket.getaddrinfo(
+            self.host, self.port, 0, socket.SOCK_DGRAM)[0]
+        connection = socket.socket(family, type, proto)
+        connection.connect(address)
+        return connection
+
+    def send(self, data: bytes) -> bool:
+        for message in self.formatter.messages(data)[self.progress:]:
+            try:
+                self.connection.send(message)
+                self.sent_lines += 1
+            except OSError as error:
+                if error.errno != errno.EMSGSIZE:
+                    raise
+                self.dropped_lines += 1
+            self.progress += 1
+        return True
+
+
+class HttpBulkSink(NetworkSink):
+    """HttpBulkSink POSTs each batch of log lines as the body of a single
+       request over a persistent HTTP connection.  A server error is
+       retried, a batch the server rejects as a client error is dropped
+
+       Attributes
+       ----------
+       path : String
+           The path the batches are posted to
+       secure : bool
+           Whether to use HTTPS
+    """
+
+    def __init__(self, host: str, port: int, path: str = '/',
+                 secure: bool = False, **options):
+        self.path = path
+        self.secure = secure
+        super().__init__(host, port, **options)
+
+    def connect(self):
+        if self.secure:
+            return http.client.HTTPSConnection(self.host, self.port,
+                                               timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port,
+                                          timeout=self.timeout)
+
+    def send(self, data: bytes) -> bool:
+        self.connection.request(
+            'POST', self.path, body=data,
+            headers={'Content-Type': 'text/plain; charset=utf-8'})
+        response = self.connection.getresponse()
+        response.read()
+        if response.status >= 500:
+            raise http.client.HTTPException(
+                "HTTP status " + str(response.status))
+        return response.status < 300
+
+
+def create_sink(url: str) -> NetworkSink:
+    """creates the network sink for a URL:
+        syslog+udp://host[:port]  - RFC 5424 syslog over UDP, port 514
+        syslog+tcp://host[:port]  - RFC 5424 syslog over TCP, port 601
+        tcp://host:port           - newline terminated lines over TCP
+        http://host[:port]/path   - each batch POSTed, also https
+
+    Parameters
+    ----------
+    url : String
+        where the log lines are sent
+    Return
+    ------
+        NetworkSink
+            the sink
+
+    Raises
+    ------
+        Exception:
+            Invalid value for LOG_SINK
+    """
+
+    parts = urllib.parse.urlsplit(url)
+    ports = {'syslog+udp': 514, 'syslog+tcp': 601, 'tcp': None,
+             'http': 80, 'https': 443}
+    try:
+        port = parts.port or ports.get(parts.scheme)
+    except ValueError:
+        port = None
+    if parts.scheme not in ports or not parts.hostname or port is None:
+        raise Exception("Invalid value for LOG_SINK, " +
+                        "Supplied value is : " + url +
+                        " Expected stderr, file://path, " +
+                        "syslog+udp://host[:port], " +
+                        "syslog+tcp://host[:port], tcp://host:port or " +
+                        "http(s)://host[:port]/path")
+    if parts.scheme == 'syslog+udp':
+        return SyslogUdpSink(parts.hostname, port)
+    if parts.scheme == 'syslog+tcp':
+        return SyslogTcpSink(parts.hostname, port)
+    if parts.scheme == 'tcp':
+        return TcpLineSink(parts.hostname, port)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    return HttpBulkSink(parts.hostname, port, path,
+                        secure=parts.scheme == 'https')
+
+
+def sink_from_environment(source: str = None) -> NetworkSink:
+    """creates the sink given by the LOG_SINK environment variable,
+    stderr (the default), file://path for a FileSink or a URL accepted by
+    create_sink
+
+    Parameters
+    ----------
+    source : String
+        The name of the source the sink is for, which replaces {source} in
+        LOG_SINK when several definition files run in one process
+
+    Return
+    ------
+        NetworkSink
+            the sink, or None to write to stderr
+
+    Raises
+    ------
+        Exception:
+            Invalid value for LOG_SINK or a LOG_FILE_ variable
+    """
+
+    value = os.environ.get("LOG_SINK", "stderr")
+    if source is not None:
+        value = value.replace("{source}", source)
+    if value.lower() == "stderr":
+        return None
+    if value.startswith("file://"):
+        return create_file_sink(value[len("file://"):])
+    return create_sink(value)
@@ -0,0 +1,490 @@
+import heapq
+import itertools
+import math
+import sched
+
+
+class HeapScheduler():
+    """HeapScheduler is an event scheduler with the same interface as the
+       standard library's sched.scheduler, that also tracks the number of
+       pending events so that the queue depth is available in O(1)
+
+       sched.scheduler only offers the depth through its queue property,
+       which copies and sorts the whole heap every time it is read.  Here
+       every event is a short list of [time, priority, sequence, action,
+       argument] kept on a heap, cancelling an event clears its action and
+       it is discarded when it reaches the top of the heap
+
+       Attributes
+       ----------
+       timefunc : function
+           Returns the current time
+       delayfunc : function
+           Waits for a number of seconds
+       depth : int
+           The number of pending events
+
+       Methods
+       -------
+       enterabs(time: float, priority: int, action, argument: tuple)
+            schedules an event at a time, returning the event
+       enter(delay: float, priority: int, action, argument: tuple)
+            schedules an event after a delay, returning the event
+       cancel(event)
+            removes a pending event
+       empty()
+            checks whether there are no pending events
+       run()
+            runs the pending events as they fall due until there are none
+    """
+
+    TIME, PRIORITY, SEQUENCE, ACTION, ARGUMENT = range(5)
+
+    def __init__(self, timefunc, delayfunc):
+        """
+        Parameters
+        ----------
+        timefunc : function
+            Returns the current time
+        delayfunc : function
+            Waits for a number of seconds
+        """
+
+        self.timefunc = timefunc
+        self.delayfunc = delayfunc
+        self.heap = []
+        self.depth = 0
+        self.sequence = itertools.count()
+
+    def enterabs(self, time: float, priority: int, action,
+                 argument: tuple = ()) -> list:
+        """schedules an event at a time, events at the same time run in
+        order of priority then in the order they were scheduled
+
+        Return
+        ------
+            List
+                the event, which can be passed to cancel
+        """
+
+        event = [time, priority, next(self.sequence), action, argument]
+        heapq.heappush(self.heap, event)
+        self.depth += 1
+        return event
+
+    def enter(self, delay: float, priority: int, action,
+              argument: tuple = ()) -> list:
+        """schedules an event after a delay from the current time
+
+        Return
+        ------
+            List
+                the event, which can be passed to cancel
+        """
+
+        return self.enterabs(self.timefunc() + delay, priority, action,
+                             argument)
+
+    def cancel(self, event: list):
+        """removes a pending event
+
+        Raises
+        ------
+            ValueError:
+                the event is not pending
+        """
+
+        if event[self.ACTION] is None:
+            raise ValueError(event)
+        event[self.ACTION] = None
+        self.depth -= 1
+
+    def empty(self) -> bool:
+        """checks whether there are no pending events"""
+
+        return self.depth == 0
+
+    @property
+    def queue(self) -> list:
+        """the pending events in the order they will run, as
+        sched.Event tuples.  This copies and sorts the heap, use depth
+        for the number of pending events
+        """
+
+        return [sched.Event(event[self.TIME], event[self.PRIORITY],
+                            event[self.SEQUENCE], event[self.ACTION],
+                            event[self.ARGUMENT], {})
+                for event in sorted(self.heap)
+                if event[self.ACTION] is not None]
+
+    def run(self):
+        """runs the pending events as they fall due until there are none,
+        waiting with delayfunc until the next event is due"""
+
+        heap = self.heap
+        timefunc = self.timefunc
+        heappop = heapq.heappop
+        while heap:
+            event = heap[0]
+            action = event[self.ACTION]
+            if action is None:
+                heappop(heap)
+                continue
+            now = timefunc()
+            if event[self.TIME] > now:
+                self.delayfunc(event[self.TIME] - now)
+                continue
+            heappop(heap)
+            # the event can no longer be cancelled once it is running
+            event[self.ACTION] = None
+            self.depth -= 1
+            action(*event[self.ARGUMENT])
+
+
+class TimingWheelScheduler():
+    """TimingWheelScheduler is an event scheduler with the same interface
+       as HeapScheduler, backed by a hierarchical timing wheel, for very
+       large numbers of events.  Scheduling and cancelling an event are
+       O(1) however many events are pending
+
+       Time is divided into ticks of resolution seconds.  The first wheel
+       has a slot for each of the next 256 ticks, each further wheel has
+       a slot for 256 slots of the wheel below it.  As time reaches the
+       start of a slot of a higher wheel its events are cascaded down into
+       the lower wheels.  Events later than the last wheel wait in an
+       overflow list
+
+       Each event is a short list of [time, sequence, action, argument].
+       The events of a tick run in order of time, then in the order they
+       were scheduled, the same order as HeapScheduler as priority is not
+       used.  An event's time is rounded up to its tick, so it never runs
+       early but may run up to resolution late
+
+       Attributes
+       ----------
+       timefunc : function
+           Returns the current time
+       delayfunc : function
+           Waits for a number of seconds
+       resolution : float
+           The length of a tick in seconds
+       depth : int
+           The number of pending events
+
+       Methods
+       -------
+       enterabs(time: float, priority: int, action, argument: tuple)
+            schedules an event at a time, returning the event
+       enter(delay: float, priority: int, action, argument: tuple)
+            schedules an event after a delay, returning the event
+       cancel(event)
+            removes a pending event
+       empty()
+            checks whether there are no pending events
+       run()
+            runs the pending events as they fall due until there are none
+    """
+
+    BITS = 8
+    SLOTS = 1 << BITS
+    MASK = SLOTS - 1
+    LEVELS = 4
+    TIME, SEQUENCE, ACTION, ARGUMENT = range(4)
+
+    def __init__(self, timefunc, delayfunc, resolution: float = 0.001):
+        """
+        Parameters
+        ----------
+        timefunc : function
+            Returns the current time
+        delayfunc : function
+            Waits for a number of seconds
+        resolution : float
+            The length of a tick in seconds
+        """
+
+        self.timefunc = timefunc
+        self.delayfunc = delayfunc
+        self.resolution = resolution
+        self.wheels = [[[] for slot in range(self.SLOTS)]
+                       for level in range(self.LEVELS)]
+        self.overflow = []
+        self.depth = 0
+        self.sequence = itertools.count()
+        self.current = self.to_tick(timefunc())
+
+    def to_tick(self, time: float) -> int:
+        """the tick an event at time runs in, rounded up"""
+
+        return math.ceil(time / self.resolution)
+
+    def place(self, tick: int, event: list):
+        """puts an event in the slot for its tick"""
+
+        delta = tick - self.current
+        if delta < self.SLOTS:
+            # including events that are already due, which go in the
+            # current slot
+            tick = max(tick, self.current)
+            self.wheels[0][tick & self.MASK].append(event)
+            return
+        for level in range(1, self.LEVELS):
+            if delta < 1 << (self.BITS * (level + 1)):
+                self.wheels[level][
+                    (tick >> (self.BITS * level)) & self.MASK].append(event)
+                return
+        self.overflow.append(event)
+
+    def enterabs(self, time: float, priority: int, action,
+                 argument: tuple = ()) -> list:
+        """schedules an event at a time
+
+        Return
+        ------
+            List
+                the event, which can be passed to cancel
+        """
+
+        event = [time, next(self.sequence), action, argument]
+        self.place(self.to_tick(time), event)
+        self.depth += 1
+        return event
+
+    def enter(self, delay: float, priority: int, action,
+              argument: tuple = ()) -> list:
+        """schedules an event after a delay from the current time
+
+        Return
+        ------
+            List
+                the event, which can be passed to cancel
+        """
+
+        return self.enterabs(self.timefunc() + delay, priority, action,
+                             argument)
+
+    def cancel(self, event: list):
+        """removes a pending event, it is discarded when its slot is
+        reached
+
+        Raises
+        ------
+            ValueError:
+                the event is not pending
+        """
+
+        if event[self.ACTION] is None:
+            raise ValueError(event)
+        event[self.ACTION] = None
+        self.depth -= 1
+
+    def empty(self) -> bool:
+        """checks whether there are no pending events"""
+
+        return self.depth == 0
+
+    @property
+    def queue(self) -> list:
+        """the pending events in order of time, as sched.Event tuples.
+        This visits every slot, use depth for the number of pending events
+        """
+
+        events = [event for wheel in self.wheels for slot in wheel
+                  for event in slot] + self.overflow
+        return [sched.Event(event[self.TIME], 1, event[self.SEQUENCE],
+                            event[self.ACTION], event[self.ARGUMENT], {})
+                for event in sorted(events)
+                if event[self.ACTION] is not None]
+
+    def cascade(self):
+        """moves the events of the higher wheels' slots that start at the
+        current tick down into the lower wheels.  Called as the current tick
+        reaches the start of a first wheel rotation"""
+
+        for level in range(1, self.LEVELS):
+            slots = self.wheels[level]
+            index = (self.current >> (self.BITS * level)) & self.MASK
+            events, slots[index] = slots[index], []
+            for event in events:
+                if event[self.ACTION] is not None:
+                    self.place(self.to_tick(event[self.TIME]), event)
+            if index != 0:
+                break
+        else:
+            events, self.overflow = self.overflow, []
+            for event in events:
+                if event[self.ACTION] is not None:
+                    self.place(self.to_tick(event[self.TIME]), event)
+
+    def next_slot(self) -> list:
+        """moves the current tick forward to the next slot holding events,
+        cascading the higher wheels on the way, and returns that slot"""
+
+        first = self.wheels[0]
+        while True:
+            offset = self.current & self.MASK
+            for index in range(offset, self.SLOTS):
+                if first[index]:
+                    self.current += index - offset
+                    return first[index]
+            self.advance()
+
+    def advance(self):
+        """moves the current tick to the start of the next first wheel
+        rotation holding events, jumping over the empty slots of the higher
+        wheels and cascading the slots it reaches"""
+
+        current = (self.current | self.MASK) + 1
+        while True:
+            self.current = current
+            self.cascade()
+            if any(self.wheels[0]):
+                return
+            for level in range(1, self.LEVELS):
+                shift = self.BITS * level
+                slots = self.wheels[level]
+                offset = (current >> shift) & self.MASK
+                later = [index for index in range(offset + 1, self.SLOTS)
+                         if slots[index]]
+                if later:
+                    # the start of the next slot holding events
+                    current = ((current >> shift) + later[0] - offset) <<\
+                        shift
+                    break
+                if any(slots):
+                    # the slots holding events are in the next rotation
+                    shift += self.BITS
+                    current = ((current >> shift) + 1) << shift
+                    break
+            else:
+                shift = self.BITS * self.LEVELS
+                current = ((current >> shift) + 1) << shift
+
+    def run(self):
+        """runs the pending events as they fall due until there are none,
+        waiting with delayfunc until the next tick with events is due"""
+
+        timefunc = self.timefunc
+        while self.depth:
+            slot = self.next_slot()
+            now = timefunc()
+            due = self.current * self.resolution
+            if due > now:
+                self.delayfunc(due - now)
+                continue
+            # events scheduled for the current tick while these run are
+            # added to a new slot and run on the next pass
+            self.wheels[0][self.current & self.MASK] = []
+            if len(slot) > 1:
+                slot.sort()
+            for event in slot:
+                action = event[self.ACTION]
+                if action is not None:
+                    event[self.ACTION] = None
+                    self.depth -= 1
+                    action(*event[self.ARGUMENT])
+            if not self.wheels[0][self.current & self.MASK]:
+                self.current += 1
+                if not self.current & self.MASK:
+                    self.cascade()
+
+
+class SourceScheduler():
+    """SourceScheduler is one source's view of a scheduler shared by the
+       sources of several definition files in one process.  Its events are
+       scheduled on the shared scheduler, while it counts only its own, so
+       each source's queue depth check sees its own pending events
+
+       Attributes
+       ----------
+       scheduler : HeapScheduler or TimingWheelScheduler
+           The shared scheduler the events run on
+       timefunc : function
+           Returns the current time
+       delayfunc : function
+           Waits for a number of seconds
+       depth : int
+           The number of this source's pending events
+
+       Methods
+       -------
+       enterabs(time: float, priority: int, action, argument: tuple)
+            schedules an event at a time, returning the event
+       enter(delay: float, priority: int, action, argument: tuple)
+            schedules an event after a delay, returning the event
+       cancel(event)
+            removes a pending event
+       empty()
+            checks whether this source has no pending events
+       run()
+            runs the shared scheduler's events until there are none
+    """
+
+    def __init__(self, scheduler):
+        """
+        Parameters
+        ----------
+        scheduler : HeapScheduler or TimingWheelScheduler
+            The shared scheduler the events run on
+        """
+
+        self.scheduler = scheduler
+        self.timefunc = scheduler.timefunc
+        self.delayfunc = scheduler.delayfunc
+        self.depth = 0
+
+    def enterabs(self, time: float, priority: int, action,
+                 argument: tuple = ()) -> list:
+        """schedules an event at a time on the shared scheduler
+
+        Return
+        ------
+            List
+                the event, which can be passed to cancel
+        """
+
+        self.depth += 1
+        return self.scheduler.enterabs(time, priority, self.fire,
+                                       (action, argument))
+
+    def enter(self, delay: float, priority: int, action,
+              argument: tuple = ()) -> list:
+        """schedules an event after a delay from the current time
+
+        Return
+        ------
+            List
+                the event, which can be passed to cancel
+        """
+
+        return self.enterabs(self.timefunc() + delay, priority, action,
+                             argument)
+
+    def fire(self, action, argument: tuple):
+        """runs one of this source's events, which is no longer pending"""
+
+        self.depth -= 1
+        action(*argument)
+
+    def cancel(self, event: list):
+        """removes a pending event
+
+        Raises
+        ------
+            ValueError:
+                the event is not pending
+        """
+
+        self.scheduler.cancel(event)
+        self.depth -= 1
+
+    def empty(self) -> bool:
+        """checks whether this source has no pending events"""
+
+        return self.depth == 0
+
+    def run(self):
+        """runs the shared scheduler's events, of every source, as they
+        fall due until there are none"""
+
+        self.scheduler.run()
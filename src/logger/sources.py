@@ -0,0 +1,116 @@
+import os
+
+from logger.graceful_killer import GracefulKiller
+from logger.log_generator import LogDriver
+from logger.scheduler import SourceScheduler
+
+
+def source_names(files: list) -> list:
+    """returns the name of the source for each definition file, its file
+    name, followed by its position in the list when two files have the
+    same name
+
+    Parameters
+    ----------
+    files : List
+        The definition files
+    """
+
+    names = [os.path.basename(file) for file in files]
+    return [name if names.count(name) == 1 else name + "-" + str(index + 1)
+            for index, name in enumerate(names)]
+
+
+def check_source_paths(count: int):
+    """checks that every source writes its own files, when several
+    definition files run in one process, so a FileSink or capture file
+    given by LOG_SINK or LOG_RECORD must contain {source}
+
+    Parameters
+    ----------
+    count : int
+        The number of sources
+
+    Raises
+    ------
+        Exception:
+            Invalid value for LOG_SINK or LOG_RECORD
+    """
+
+    if count < 2:
+        return
+    for name in ("LOG_SINK", "LOG_RECORD"):
+        value = os.environ.get(name, "")
+        if name == "LOG_SINK" and not value.startswith("file://"):
+            continue
+        if value and "{source}" not in value:
+            raise Exception("Invalid value for " + name + ", " +
+                            "Supplied value is : " + value +
+                            " Expected a path containing {source} when " +
+                            "several definition files are run")
+
+
+def create_sources(files: list, killer=None) -> list:
+    """creates a LogDriver for each definition file, each a logical source
+    with its own messages and counters, logger, output prefix, writer and
+    sink and queue depth check, all scheduling their events on the
+    scheduler of the first
+
+    Parameters
+    ----------
+    files : List
+        The definition files
+    killer : GracefulKiller
+        Detects a termination request for every source, defaults to a
+        GracefulKiller handling SIGINT and SIGTERM
+    Return
+    ------
+        List
+            The LogDriver of each source
+
+    Raises
+    ------
+        Exception:
+            Invalid value for LOG_SINK or LOG_RECORD
+    """
+
+    check_source_paths(len(files))
+    if killer is None:
+        killer = GracefulKiller()
+    drivers = []
+    for index, (file, name) in enumerate(zip(files, source_names(files))):
+        driver = LogDriver(index + 1, name, killer, source=name)
+        driver.file = file
+        drivers.append(driver)
+    scheduler = drivers[0].s
+    for driver in drivers:
+        # backfilling sources share the first source's simulated clock
+        driver.clock = drivers[0].clock
+        driver.s = SourceScheduler(scheduler)
+    return drivers
+
+
+def run_sources(files: list) -> int:
+    """runs several definition files in the current process, as sources
+    sharing one scheduler, until every message has been generated or a
+    termination signal is detected, then closes the output of every source
+
+    Parameters
+    ----------
+    files : List
+        The definition files
+    Return
+    ------
+        int
+            the exit status, a termination signal exits with status 99
+    """
+
+    drivers = create_sources(files)
+    try:
+        for driver in drivers:
+            driver.schedule_log_messages()
+        drivers[0].s.run()
+    finally:
+        for driver in drivers:
+            driver.close_output()
+    return 0
@@ -0,0 +1,216 @@
+import random
+
+
+class StackTraceLibrary():
+    """StackTraceLibrary renders synthetic stack traces once, so that
+       UNKNOWN messages can reuse them rather than raising and formatting
+       a real exception for every log message
+
+       Every style and depth is rendered into a small set of variants the
+       first time it is requested.  The variants differ in their frames,
+       line numbers and exception type, so consecutive messages are lightly
+       varied while still being repeatable across instances
+
+       Styles
+       ------
+       python
+           single line, the repr of a list of traceback frames
+       python_multiline
+           a full multi-line Python traceback
+       java
+           single line, a Java exception with escaped line breaks
+       java_multiline
+           a full multi-line Java exception
+
+       Attributes
+       ----------
+       captured_frames : List
+           the frames of a real traceback (as from traceback.format_tb)
+           used by the python styles when no depth is given
+       captured_exception : String
+           the exception line that goes with captured_frames
+
+       Methods
+       -------
+       get(style: str, depth: int)
+            returns the rendered variants for a style and depth
+       render(style: str, depth: int)
+            renders the variants for a style and depth
+    """
+
+    STYLES = ('python', 'python_multiline', 'java', 'java_multiline')
+    DEFAULT_DEPTH = 3
+    VARIANTS = 8
+
+    PYTHON_FILES = ('/app/logger/service.py', '/app/logger/handlers.py',
+                    '/app/logger/connection_pool.py', '/app/logger/models.py',
+                    '/app/logger/scheduler.py', '/app/logger/client.py')
+    PYTHON_FUNCTIONS = ('handle_request', 'dispatch', 'process_batch',
+                        'get_connection', 'execute', 'load_record',
+                        'validate', 'send', 'retry', 'commit')
+    PYTHON_EXCEPTIONS = ('Exception', 'RuntimeError', 'ValueError',
+                         'ConnectionError', 'TimeoutError', 'KeyError')
+
+    JAVA_CLASSES = ('com.example.service.OrderService',
+                    'com.example.service.CustomerService',
+                    'com.example.repository.JdbcRepository',
+                    'com.example.client.HttpConnector',
+                    'com.example.messaging.QueueConsumer',
+                    'org.springframework.web.servlet.FrameworkServlet',
+                    'org.apache.catalina.core.StandardWrapperValve')
+    JAVA_METHODS = ('process', 'handle', 'invoke', 'doFilter', 'execute',
+                    'findById', 'connect', 'consume', 'service', 'call')
+    JAVA_EXCEPTIONS = ('java.lang.IllegalStateException',
+                       'java.lang.NullPointerException',
+                       'java.io.IOException',
+                       'java.net.SocketTimeoutException',
+                       'java.sql.SQLException')
+
+    MESSAGE = 'This has triggered an exception stack trace'
+
+    def __init__(self, captured_frames: list = None,
+                 captured_exception: str = ''):
+        """initialise the library
+
+        Parameters
+        ----------
+        captured_frames : List
+            the frames of a real traceback (as from traceback.format_tb)
+            used by the python styles when no depth is given
+        captured_exception : String
+            the exception line that goes with captured_frames
+        """
+
+        self.captured_frames = captured_frames
+        self.captured_exception = captured_exception
+        self.rendered = {}
+
+    def get(self, style: str, depth: int) -> tuple:
+        """returns the rendered variants for a style and depth, rendering
+        them the first time they are requested
+
+        Parameters
+        ----------
+        style : String
+            one of STYLES
+        depth : int
+            the number of frames, 0 for the default
+        Return
+        ------
+            Tuple
+                the rendered stack trace variants
+        """
+
+        key = (style, depth)
+        variants = self.rendered.get(key)
+        if variants is None:
+            variants = self.render(style, depth)
+            self.rendered[key] = variants
+        return variants
+
+    def render(self, style: str, depth: int) -> tuple:
+        """renders the variants for a style and depth.
+        The random generator is seeded from the style and depth so that
+        every instance renders the same variants
+
+        Parameters
+        ----------
+        style : String
+            one of STYLES
+        depth : int
+            the number of frames, 0 for the default
+        Return
+        ------
+            Tuple
+                the rendered stack trace variants
+
+        Raises
+        ------
+            Exception:
+                Invalid stack trace style
+        """
+
+        if style not in self.STYLES:
+            raise Exception("Invalid stack trace style, " +
+                            "Supplied value is : " + style +
+                            " Expected " + '|'.join(self.STYLES))
+
+        if style.startswith('python') and depth == 0 and\
+                self.captured_frames is not None:
+            return (self.format_python(style, self.captured_frames,
+                                       self.captured_exception),)
+
+        depth = depth or self.DEFAULT_DEPTH
+        generator = random.Random(style + ':' + str(depth))
+        variants = []
+        for variant in range(self.VARIANTS):
+            if style.startswith('python'):
+                frames, exception = self.python_frames(generator, depth)
+                variants.append(self.format_python(style, frames, exception))
+            else:
+                variants.append(self.format_java(
+                    style, *self.java_frames(generator, depth)))
+        return tuple(variants)
+
+    def python_frames(self, generator: random.Random, depth: int) -> tuple:
+        """generates synthetic Python traceback frames, in the same form
+        as traceback.format_tb
+
+        Return
+        ------
+            List, String
+                the frames and the exception line
+        """
+
+        exception_type = generator.choice(self.PYTHON_EXCEPTIONS)
+        frames = []
+        for level in range(depth):
+            if level < depth - 1:
+                code = 'self.' + generator.choice(self.PYTHON_FUNCTIONS) + '()'
+            else:
+                code = 'raise ' + exception_type + '('
+            frames.append('  File "' + generator.choice(self.PYTHON_FILES) +
+                          '", line ' + str(generator.randint(10, 900)) +
+                          ', in ' + generator.choice(self.PYTHON_FUNCTIONS) +
+                          '\n    ' + code + '\n')
+        return frames, exception_type + ': ' + self.MESSAGE
+
+    def java_frames(self, generator: random.Random, depth: int) -> tuple:
+        """generates synthetic Java stack frames
+
+        Return
+        ------
+            List, String
+                the frames and the exception line
+        """
+
+        frames = []
+        for level in range(depth):
+            java_class = generator.choice(self.JAVA_CLASSES)
+            frames.append('at ' + java_class + '.' +
+                          generator.choice(self.JAVA_METHODS) + '(' +
+                          java_class.rsplit('.', 1)[1] + '.java:' +
+                          str(generator.randint(20, 1200)) + ')')
+        exception = generator.choice(self.JAVA_EXCEPTIONS) + ': ' +\
+            self.MESSAGE
+        return frames, exception
+
+    def format_python(self, style: str, frames: list, exception: str) -> str:
+        """formats Python frames, as the repr of the frame list for the
+        single line style or as a full traceback for the multi-line style
+        """
+
+        if style == 'python':
+            return repr(frames)
+        return 'Traceback (most recent call last):\n' + ''.join(frames) +\
+            exception
+
+    def format_java(self, style: str, frames: list, exception: str) -> str:
+        """formats Java frames, escaping the line breaks for the single
+        line style
+        """
+
+        trace = exception + '\n\t' + '\n\t'.join(frames)
+        if style == 'java':
+            return trace.replace('\n', '\\n').replace('\t', '\\t')
+        return trace
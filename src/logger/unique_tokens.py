@@ -0,0 +1,133 @@
+import math
+import os
+
+
+class CounterTokenGenerator():
+    """CounterTokenGenerator produces the unique 32 hex character token
+       appended to UNIQUE=Y, SHARED=N messages, as a fast alternative to
+       hashing the message text with the current time
+
+       Each token is a 128 bit value made from a 64 bit instance id and a
+       64 bit counter, passed through a mix of multiplications by odd
+       constants and xor shifts.  Every step of the mix can be reversed, so
+       two different (instance id, counter) pairs can never produce the same
+       token, however close together they are generated
+
+       Attributes
+       ----------
+       instance_id : int
+           A random 64 bit id for this generator
+       counter : int
+           The number of tokens generated
+       bloom_filter : BloomFilter
+           When verification is enabled, the filter every token is checked
+           against
+       possible_collisions : int
+           The number of tokens the filter reports as already generated
+
+       Methods
+       -------
+       next_token()
+            returns the next unique token
+    """
+
+    MASK = (1 << 128) - 1
+    MULTIPLIER_1 = 0x9e3779b97f4a7c15f39cc0605cedc835
+    MULTIPLIER_2 = 0xc2b2ae3d27d4eb4f165667b19e3779f9
+
+    def __init__(self, instance_id: int = None,
+                 bloom_filter: 'BloomFilter' = None):
+        """
+        Parameters
+        ----------
+        instance_id : int
+            A 64 bit id for this generator, random if not supplied
+        bloom_filter : BloomFilter
+            A filter to check every token against, None to not verify
+        """
+
+        if instance_id is None:
+            instance_id = int.from_bytes(os.urandom(8), 'big')
+        self.instance_id = instance_id & 0xffffffffffffffff
+        self.base = self.instance_id << 64
+        self.counter = 0
+        self.bloom_filter = bloom_filter
+        self.possible_collisions = 0
+
+    def next_token(self) -> str:
+        """returns the next unique token as 32 hex characters"""
+
+        self.counter += 1
+        value = ((self.base | self.counter) * self.MULTIPLIER_1) & self.MASK
+        value ^= value >> 67
+        value = (value * self.MULTIPLIER_2) & self.MASK
+        value ^= value >> 59
+        token = '%032x' % value
+        if self.bloom_filter is not None and self.bloom_filter.add(value):
+            self.possible_collisions += 1
+        return token
+
+
+class BloomFilter():
+    """BloomFilter is a compact probabilistic set used to verify that no
+       token is generated twice over a long run.  It never misses a token
+       that has been added, but may report a token that has not been added
+       with a probability of error_rate once capacity tokens have been added
+
+       Attributes
+       ----------
+       size : int
+           The number of bits in the filter
+       hashes : int
+           The number of bits set for each value
+
+       Methods
+       -------
+       add(value: int)
+            adds a 128 bit value, returning whether it may already be present
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """sizes the filter for the expected number of values
+
+        Parameters
+        ----------
+        capacity : int
+            The number of values expected to be added
+        error_rate : float
+            The acceptable false positive rate at capacity
+        """
+
+        self.size = max(64, int(-capacity * math.log(error_rate) /
+                                (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, value: int) -> bool:
+        """adds a well mixed 128 bit value to the filter.
+        The bit positions are derived from the two halves of the value by
+        double hashing, which needs no further hashing of the value
+
+        Parameters
+        ----------
+        value : int
+            The value to add, such as a token
+        Return
+        ------
+            bool
+                True if every bit was already set, meaning the value may
+                have been added before
+        """
+
+        position = value & 0xffffffffffffffff
+        step = (value >> 64) | 1
+        bits = self.bits
+        present = True
+        for index in range(self.hashes):
+            bit = position % self.size
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+            position += step
+        return present
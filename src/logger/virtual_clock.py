@@ -0,0 +1,45 @@
+class VirtualClock():
+    """VirtualClock is a simulated clock for generating historic logs.
+       It is used as both the time and the delay function of a scheduler,
+       sleeping simply moves the simulated time forward, so the scheduler
+       runs its events as fast as they can be processed
+
+       Attributes
+       ----------
+       now : float
+           The simulated time in seconds since the epoch
+
+       Methods
+       -------
+       time()
+            returns the simulated time
+       sleep(seconds: float)
+            moves the simulated time forward
+    """
+
+    def __init__(self, start: float):
+        """
+        Parameters
+        ----------
+        start : float
+            The simulated start time in seconds since the epoch
+        """
+
+        self.now = start
+
+    def time(self) -> float:
+        """returns the simulated time in seconds since the epoch"""
+
+        return self.now
+
+    def sleep(self, seconds: float):
+        """moves the simulated time forward without waiting
+
+        Parameters
+        ----------
+        seconds : float
+            The number of simulated seconds to move forward
+        """
+
+        if seconds > 0:
+            self.now += seconds
@@ -0,0 +1,169 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+
+from logger.graceful_killer import EventKiller, GracefulKiller
+from logger.log_generator import LogDriver
+from logger.log_writer import BufferedLogWriter
+from logger.network_sinks import sink_from_environment
+
+
+class ConnectionStream():
+    """ConnectionStream is a write-only stream that sends everything that
+       is written to it over a multiprocessing Connection, so that a
+       worker's BufferedLogWriter sends each flushed batch of lines to the
+       parent process as a single message
+
+       Methods
+       -------
+       write(text: str)
+            sends the text to the parent process
+       flush()
+            does nothing, each write is sent immediately
+    """
+
+    def __init__(self, connection):
+        """
+        Parameters
+        ----------
+        connection : multiprocessing.connection.Connection
+            the sending end of a pipe to the parent process
+        """
+
+        self.connection = connection
+
+    def write(self, text):
+        """sends the text to the parent process
+
+        Parameters
+        ----------
+        text : bytes or String
+            one or more complete log lines
+        """
+
+        if isinstance(text, str):
+            text = text.encode()
+        self.connection.send_bytes(text)
+
+    def flush(self):
+        """does nothing, each write is sent immediately"""
+
+
+def run_worker(index: int, count: int, split: str, file: str,
+               connection, stop_event):
+    """runs a LogDriver for one worker's share of the message definitions
+    in the current process, sending its output to the parent process
+
+    Parameters
+    ----------
+    index : int
+        this worker's index, 0 to count - 1
+    count : int
+        the number of workers
+    split : String
+        how the definitions are shared, definitions or counter
+    file : String
+        the message definition file, None for MESSAGE_DEFINITIONS
+    connection : multiprocessing.connection.Connection
+        the sending end of a pipe to the parent process
+    stop_event : multiprocessing.Event
+        set by the parent process to request a shutdown
+    """
+
+    # the workers cannot share the metrics port
+    os.environ.pop("LOG_METRICS_PORT", None)
+    driver = LogDriver(index + 1, "Worker-" + str(index + 1),
+                       EventKiller(stop_event))
+    driver.worker_index = index
+    driver.worker_count = count
+    driver.worker_split = split
+    if file is not None:
+        driver.file = file
+    if driver.writer is not None:
+        driver.writer.close()
+    if driver.sink is not None:
+        # the parent process sends the output
+        driver.sink.close()
+        driver.sink = None
+    driver.writer = BufferedLogWriter(
+        ConnectionStream(connection), *driver.get_flush_settings(),
+        binary=driver.line_formatter is not None)
+    try:
+        driver.run()
+    finally:
+        connection.close()
+
+
+def run_workers(count: int, split: str = 'definitions', file: str = None,
+                stream=None) -> int:
+    """shares the message definitions between count worker processes.
+    The parent process owns signal handling, when a termination signal is
+    detected it asks every worker to stop, then writes the remainder of
+    their output before returning
+
+    Parameters
+    ----------
+    count : int
+        the number of worker processes
+    split : String
+        how the definitions are shared, definitions or counter
+    file : String
+        the message definition file, None for MESSAGE_DEFINITIONS
+    stream : stream
+        where the workers' output is written, defaults to the network
+        sink given by LOG_SINK or sys.stderr
+    Return
+    ------
+        int
+            the exit status, the highest worker exit code
+
+    Raises
+    ------
+        Exception:
+            Invalid number of workers, or LOG_RECORD is set
+    """
+
+    if count < 1:
+        raise Exception("Invalid number of workers, " +
+                        "Supplied value is : " + str(count) +
+                        " Expected a positive integer")
+    if os.environ.get("LOG_RECORD", ""):
+        raise Exception("Worker processes do not record captures, " +
+                        "use a single process with LOG_RECORD")
+    sink = None
+    if stream is None:
+        sink = sink_from_environment()
+        stream = sys.stderr if sink is None else sink
+
+    killer = GracefulKiller()
+    stop_event = multiprocessing.Event()
+    processes = []
+    readers = []
+    for index in range(count):
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=run_worker, name="log-worker-" + str(index + 1),
+            args=(index, count, split, file, writer, stop_event))
+        process.start()
+        writer.close()
+        processes.append(process)
+        readers.append(reader)
+
+    while readers:
+        if killer.kill_now:
+            stop_event.set()
+        for reader in multiprocessing.connection.wait(readers, 0.2):
+            try:
+                data = reader.recv_bytes()
+            except EOFError:
+                readers.remove(reader)
+                continue
+            stream.write(data.decode())
+            stream.flush()
+
+    for process in processes:
+        process.join()
+    if sink is not None:
+        sink.close()
+    return max(process.exitcode for process in processes)
@@ -1,16 +1,204 @@
 import logger.log_generator as logger
+import logger.workers as workers
+import logger.async_log_generator as async_logger
+import logger.capture as capture
+import logger.corpus as corpus
+import logger.definitions as definitions
+import logger.sources as sources
+import argparse
+import asyncio
+import functools
 import os
+import sys
 
 
-def main():
+def argument_type(parse):
+    """wraps a parse function as an argparse type, so an invalid value is
+    reported as a usage error rather than a traceback
+
+    Parameters
+    ----------
+    parse : function
+        Parses an option's value, raising an Exception if it is invalid
+    """
+
+    def parse_argument(value: str):
+        try:
+            return parse(value)
+        except Exception as error:
+            raise argparse.ArgumentTypeError(str(error))
+    return parse_argument
+
+
+def get_workers(options) -> int:
+    """returns the number of worker processes, the --workers option or
+    the LOG_WORKERS environment variable, default 1
+
+    Parameters
+    ----------
+    options : argparse.Namespace
+        The parsed command line
+
+    Raises
+    ------
+        Exception:
+            Invalid value for LOG_WORKERS
+    """
+
+    if options.workers is not None:
+        return options.workers
+    value = os.environ.get("LOG_WORKERS", "1")
+    try:
+        return int(value)
+    except ValueError:
+        raise Exception("Invalid value for LOG_WORKERS, " +
+                        "Supplied value is : " + value +
+                        " Expected a whole number")
+
+
+def parse_arguments(arguments=None):
+    """parses the command line, defaulting each option from its
+    environment variable
+
+    Parameters
+    ----------
+    arguments : List
+        the command line arguments, defaults to sys.argv
+    """
+
+    parser = argparse.ArgumentParser(description="log-generator")
+    parser.add_argument(
+        "--definitions",
+        default=os.environ.get("MESSAGE_DEFINITIONS", "default"),
+        help="the message definition file, or a comma separated list of "
+             "files and glob patterns such as 'apps/*' to run each file as "
+             "its own source in one process (MESSAGE_DEFINITIONS, default "
+             "default)")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="number of worker processes the message definitions are "
+             "shared between (LOG_WORKERS, default 1)")
+    parser.add_argument(
+        "--worker-split", choices=("definitions", "counter"),
+        default=os.environ.get("LOG_WORKER_SPLIT", "definitions"),
+        help="share the workers by definition, or share every definition "
+             "by counter value (LOG_WORKER_SPLIT, default definitions)")
+    parser.add_argument(
+        "--driver", choices=("thread", "async"),
+        default=os.environ.get("LOG_DRIVER", "thread"),
+        help="run the definitions on a sched thread or as asyncio tasks "
+             "(LOG_DRIVER, default thread)")
+    parser.add_argument(
+        "--backfill-start", default=os.environ.get("LOG_BACKFILL_START"),
+        help="generate historic logs against a simulated clock starting at "
+             "this ISO 8601 date time (LOG_BACKFILL_START)")
+    parser.add_argument(
+        "--backfill-end", default=os.environ.get("LOG_BACKFILL_END"),
+        help="the ISO 8601 date time the simulated clock stops at "
+             "(LOG_BACKFILL_END)")
+    parser.add_argument(
+        "--record", default=os.environ.get("LOG_RECORD"),
+        help="record every line written, with its time, in this capture "
+             "file for replay (LOG_RECORD)")
+    commands = parser.add_subparsers(dest="command")
+    export = commands.add_parser(
+        "export", help="write a sharded, gzip compressed corpus of log lines "
+                       "without waiting on the wall clock")
+    export.add_argument(
+        "definitions", help="the message definition file")
+    export.add_argument(
+        "--output", required=True,
+        help="the directory the shards and manifest.json are written to")
+    export.add_argument(
+        "--seed", default="0",
+        help="seeds every random sequence, the same seed gives the same "
+             "corpus (default 0)")
+    budget = export.add_mutually_exclusive_group(required=True)
+    budget.add_argument(
+        "--lines", type=argument_type(corpus.parse_size),
+        help="the number of lines, e.g. 10M")
+    budget.add_argument(
+        "--bytes", type=argument_type(corpus.parse_size),
+        help="the number of uncompressed bytes, e.g. 5G")
+    export.add_argument(
+        "--shards", default=1,
+        type=argument_type(functools.partial(corpus.parse_integer, low=1)),
+        help="the number of shard files, written in parallel (default 1)")
+    export.add_argument(
+        "--start", default="2020-01-01T00:00:00",
+        help="the ISO 8601 date time of the first line "
+             "(default 2020-01-01T00:00:00)")
+    export.add_argument(
+        "--processes", default=None,
+        type=argument_type(functools.partial(corpus.parse_integer, low=1)),
+        help="the number of shards written at once (default the number "
+             "of CPUs)")
+    export.add_argument(
+        "--compress-level", default=6,
+        type=argument_type(functools.partial(corpus.parse_integer, low=1,
+                                             high=9)),
+        help="the gzip compression level, 1 - 9 (default 6)")
+    replay = commands.add_parser(
+        "replay", help="write the lines of a capture file to LOG_SINK or "
+                       "stderr, paced as they were recorded")
+    replay.add_argument(
+        "capture", help="the capture file")
+    replay.add_argument(
+        "--speed", type=argument_type(capture.parse_speed), default=1.0,
+        help="how many times faster than recorded to write the lines, or "
+             "max for as fast as possible (default 1)")
+    replay.add_argument(
+        "--seek", type=float, default=0.0,
+        help="start with the first line recorded this many seconds into "
+             "the capture (default 0)")
+    replay.add_argument(
+        "--seek-line", type=int, default=0,
+        help="start with this line of the capture, counting from 0 "
+             "(default 0)")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
     """configures and starts log-generator"""
 
     try:
         os.environ["MESSAGE_DEFINITIONS"]
     except KeyError:
         os.environ["MESSAGE_DEFINITIONS"] = "default"
+    options = parse_arguments(arguments)
+    if options.command == "export":
+        corpus.export_corpus(
+            options.definitions, options.output, options.seed,
+            options.lines, options.bytes, options.shards, options.start,
+            options.processes, options.compress_level)
+        return
+    if options.command == "replay":
+        sys.exit(capture.replay_capture(options.capture, options.speed,
+                                        options.seek, options.seek_line))
+    if options.record is not None:
+        os.environ["LOG_RECORD"] = options.record
+    if options.backfill_start is not None:
+        os.environ["LOG_BACKFILL_START"] = options.backfill_start
+        os.environ["LOG_BACKFILL_END"] = options.backfill_end or ""
+    options.workers = get_workers(options)
+    files = definitions.definition_files(options.definitions)
+    if len(files) > 1:
+        if options.workers > 1 or options.driver == "async":
+            raise Exception("Invalid value for MESSAGE_DEFINITIONS, " +
+                            "Supplied value is : " + options.definitions +
+                            " Expected a single file with worker " +
+                            "processes or the asyncio driver")
+        sys.exit(sources.run_sources(files))
+    os.environ["MESSAGE_DEFINITIONS"] = os.path.relpath(
+        files[0], definitions.DIRECTORY)
+    if options.workers > 1:
+        sys.exit(workers.run_workers(options.workers, options.worker_split))
+    if options.driver == "async":
+        sys.exit(asyncio.run(async_logger.AsyncLogDriver().run()))
     thread1 = logger.LogDriver(1, "Thread-1")
     thread1.start()
+    thread1.join()
+    sys.exit(99 if thread1.killer.kill_now else 0)
 
 
 if __name__ == '__main__':
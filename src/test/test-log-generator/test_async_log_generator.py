@@ -0,0 +1,114 @@
+import unittest
+import asyncio
+import io
+import os
+import time
+from logger.async_log_generator import AsyncLogDriver
+
+
+class AsyncLogDriverTest(unittest.TestCase):
+    """test suite for async_log_generator.py"""
+
+    def setUp(self):
+        os.environ["LOG_FLUSH_INTERVAL"] = "0.05"
+        self.addCleanup(os.environ.pop, "LOG_FLUSH_INTERVAL")
+
+    def create_driver(self, testname: str, stream, **options):
+        driver = AsyncLogDriver(stream=stream, handle_signals=False,
+                                **options)
+        driver.driver.file = 'test/message_definitions/' + testname
+        return driver
+
+    def test_runs_to_max_count(self):
+        """
+            GIVEN a CONNECTION message every 0.01 seconds
+            AND a CONNECTION message at 200/s
+            WHEN I run an AsyncLogDriver
+            THEN all 60 messages are written
+            AND it finishes with an exit status of 0
+        """
+        stream = io.StringIO()
+        driver = self.create_driver("test_logger_tick_batch", stream)
+        self.assertEqual(0, asyncio.run(driver.run()))
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(60, len(lines))
+        self.assertEqual(2, len(driver.tasks))
+        self.assertEqual(20, len([line for line in lines if line.endswith(
+            " ERROR Unable to connect to server")]))
+
+    def test_grouped_direct_path(self):
+        """
+            GIVEN two CONNECTION messages
+            AND I set LOG_EMIT_PATH to direct
+            WHEN I run an AsyncLogDriver with a group size of 2
+            THEN one task writes all 60 messages as encoded lines
+        """
+        os.environ["LOG_EMIT_PATH"] = "direct"
+        self.addCleanup(os.environ.pop, "LOG_EMIT_PATH")
+        stream = io.BytesIO()
+        driver = self.create_driver("test_logger_tick_batch", stream,
+                                    group_size=2)
+        self.assertEqual(0, asyncio.run(driver.run()))
+        self.assertEqual(1, len(driver.tasks))
+        self.assertEqual(60, stream.getvalue().count(b"\n"))
+
+    def test_spread(self):
+        """
+            GIVEN a message every 0.05 seconds
+            AND LOG_CATCH_UP is spread
+            WHEN the event loop is held up for 0.5 seconds by the first
+            message
+            THEN the missed messages are written at no more than twice the
+            rate, rather than all at once
+            AND all 20 messages are written
+        """
+        os.environ["LOG_CATCH_UP"] = "spread"
+        self.addCleanup(os.environ.pop, "LOG_CATCH_UP")
+        stream = io.StringIO()
+        driver = self.create_driver("test_logger_spread", stream)
+        format_message = driver.driver.format_message
+        written = []
+
+        def slow_format_message(type):
+            if not written:
+                time.sleep(0.5)
+            written.append(time.monotonic())
+            return format_message(type)
+
+        driver.driver.format_message = slow_format_message
+        self.assertEqual(0, asyncio.run(driver.run()))
+        self.assertEqual(20, len(stream.getvalue().splitlines()))
+        gaps = [later - earlier
+                for earlier, later in zip(written[1:], written[2:])]
+        self.assertGreater(min(gaps), 0.02)
+
+    def test_stop_when_embedded(self):
+        """
+            GIVEN a message every 400 seconds and one every 0.01 seconds
+            WHEN I run an AsyncLogDriver alongside another task on the same
+            event loop and stop it after 0.3 seconds
+            THEN it stops immediately with an exit status of 99
+            AND the messages written before it stopped are flushed
+        """
+        stream = io.StringIO()
+        driver = self.create_driver("test_logger_async_stop", stream)
+
+        async def service():
+            generator = asyncio.ensure_future(driver.run())
+            await asyncio.sleep(0.3)
+            driver.stop()
+            stopped = time.monotonic()
+            status = await generator
+            return status, time.monotonic() - stopped
+
+        status, elapsed = asyncio.run(service())
+        self.assertEqual(99, status)
+        self.assertLess(elapsed, 0.5)
+        lines = stream.getvalue().splitlines()
+        self.assertGreater(len(lines), 5)
+        self.assertTrue(all(line.endswith("Fast CONNECTION message")
+                            for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import datetime
+import hashlib
+import io
+import os
+from testfixtures import LogCapture
+from logger.log_generator import LogDriver
+
+
+class BackfillTest(unittest.TestCase):
+    """test suite for generating historic logs against a simulated clock"""
+
+    testfile = 'test/message_definitions/test_logger_backfill'
+
+    def start_backfill(self, start: str, end: str) -> LogDriver:
+        """creates a driver that backfills the test definitions"""
+        os.environ["LOG_BACKFILL_START"] = start
+        os.environ["LOG_BACKFILL_END"] = end
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            os.environ.pop("LOG_BACKFILL_START")
+            os.environ.pop("LOG_BACKFILL_END")
+        thread1.file = self.testfile
+        return thread1
+
+    def shared_hash(self, day: str, counter: int) -> str:
+        return hashlib.md5((day + str(counter)).encode()).hexdigest()
+
+    def test_backfill_one_hour(self):
+        """
+            GIVEN a message every 60 seconds and a message every 600 seconds
+            WHEN I backfill one hour of logs
+            THEN 66 messages are generated without waiting an hour
+            AND each is stamped with its simulated time
+            AND SHARED messages use the simulated day of the year
+        """
+        with LogCapture() as log:
+            thread1 = self.start_backfill("2020-03-01T00:00:00",
+                                          "2020-03-01T01:00:00")
+            thread1.start()
+            thread1.join(10)
+        self.assertFalse(thread1.is_alive())
+
+        self.assertEqual(66, len(log.records))
+        start = datetime.datetime(2020, 3, 1).timestamp()
+        self.assertEqual(start + 60, log.records[0].created)
+        self.assertEqual(start + 3600, log.records[-1].created)
+        self.assertEqual("Shared CONNECTION message " +
+                         self.shared_hash("061", 0),
+                         log.records[0].getMessage())
+
+    def test_backfill_across_midnight_in_ticks(self):
+        """
+            GIVEN a SHARED message every 60 seconds
+            AND I set LOG_TICK to 5 seconds and LOG_OUTPUT to buffered
+            WHEN I backfill from 23:30 to 00:30
+            THEN each line starts with its simulated timestamp
+            AND the day of the year changes at midnight
+        """
+        os.environ["LOG_TICK"] = "5"
+        os.environ["LOG_OUTPUT"] = "buffered"
+        self.addCleanup(os.environ.pop, "LOG_TICK")
+        self.addCleanup(os.environ.pop, "LOG_OUTPUT")
+        stream = io.StringIO()
+        thread1 = self.start_backfill("2020-03-01T23:30:00",
+                                      "2020-03-02T00:30:00")
+        thread1.writer.stream = stream
+        thread1.start()
+        thread1.join(10)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(66, len(lines))
+        self.assertEqual("2020-03-01 23:31:00.000 ERROR " +
+                         "Shared CONNECTION message " +
+                         self.shared_hash("061", 0), lines[0])
+        self.assertIn("2020-03-02 00:00:00.000 ERROR " +
+                      "Shared CONNECTION message " +
+                      self.shared_hash("062", 29), lines)
+
+    def test_invalid_backfill_range(self):
+        """
+            GIVEN a backfill end before its start
+            WHEN I create a LogDriver
+            THEN an exception is raised
+        """
+        with self.assertRaises(Exception) as context:
+            self.start_backfill("2020-03-02T00:00:00", "2020-03-01T00:00:00")
+        self.assertIn("Invalid backfill range", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
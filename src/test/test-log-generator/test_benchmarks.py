@@ -0,0 +1,51 @@
+import unittest
+import json
+import os
+import tempfile
+from benchmarks import suite
+
+
+class BenchmarkSuiteTest(unittest.TestCase):
+    """test suite for benchmarks/suite.py"""
+
+    def test_compare_to_baseline(self):
+        """
+            GIVEN a baseline of a rate and a time
+            WHEN I compare results that are slower and faster
+            THEN only the results slower than the tolerance are reported
+        """
+        baseline = {"throughput": {"a": {"lines_per_sec": 1000.0}},
+                    "startup": {"b": {"seconds": 1.0}}}
+        self.assertEqual([], suite.compare(
+            {"throughput": {"a": {"lines_per_sec": 900.0}},
+             "startup": {"b": {"seconds": 1.1}}}, baseline, 0.2))
+        regressions = suite.compare(
+            {"throughput": {"a": {"lines_per_sec": 700.0}},
+             "startup": {"b": {"seconds": 1.5}},
+             "scheduler": {"c": {"usec_per_line": 1.0}}}, baseline, 0.2)
+        self.assertEqual(2, len(regressions))
+        self.assertTrue(regressions[0].startswith("throughput a"))
+
+    def test_quick_run_writes_results(self):
+        """
+            GIVEN the quick benchmark options
+            WHEN I run the suite against its own results as a baseline
+            with a generous tolerance
+            THEN results for every section are written as JSON
+            AND no regression is reported
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            self.assertEqual(0, suite.main(["--quick", "--output", output]))
+            with open(output) as results:
+                report = json.load(results)
+            self.assertEqual({"throughput", "scheduler", "startup"},
+                             set(report["results"]))
+            self.assertIn("connection/shared_seed/direct_buffered",
+                          report["results"]["throughput"])
+            self.assertEqual(0, suite.main(["--quick", "--baseline", output,
+                                            "--tolerance", "10"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
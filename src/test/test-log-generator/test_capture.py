@@ -0,0 +1,179 @@
+import unittest
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+from logger.capture import CaptureFile, CaptureReader, parse_speed, replay
+from logger.graceful_killer import GracefulKiller
+from logger.log_generator import LogDriver
+import main
+
+
+class CaptureTest(unittest.TestCase):
+    """test suite for capture.py"""
+
+    def capture_path(self) -> str:
+        """returns the path of a new capture file, removed after the test"""
+        descriptor, path = tempfile.mkstemp(suffix='.cap')
+        os.close(descriptor)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def open_capture(self, path: str) -> CaptureReader:
+        reader = CaptureReader(path)
+        self.addCleanup(reader.close)
+        return reader
+
+    def record_backfill(self, **settings) -> tuple:
+        """backfills an hour of the backfill test definitions, recording
+        them, returning what was written and the capture file"""
+        path = self.capture_path()
+        settings.update(LOG_RECORD=path,
+                        LOG_BACKFILL_START="2020-03-01T00:00:00",
+                        LOG_BACKFILL_END="2020-03-01T01:00:00")
+        os.environ.update(settings)
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            for name in settings:
+                os.environ.pop(name)
+        stream = io.BytesIO() if "LOG_EMIT_PATH" in settings else\
+            io.StringIO()
+        thread1.writer.writer.stream = stream
+        thread1.file = 'test/message_definitions/test_logger_backfill'
+        try:
+            thread1.run()
+        finally:
+            thread1.logger.removeHandler(thread1.fh)
+        written = stream.getvalue()
+        if isinstance(written, str):
+            written = written.encode()
+        return written, path
+
+    def test_record_direct(self):
+        """
+            GIVEN I set LOG_RECORD and LOG_EMIT_PATH to direct
+            WHEN I backfill an hour
+            THEN every line written is recorded
+            AND each line's time is recorded after the first line
+        """
+        written, path = self.record_backfill(LOG_EMIT_PATH="direct")
+        reader = self.open_capture(path)
+        self.assertEqual(66, reader.count)
+        self.assertEqual(written, bytes(reader.lines(0, reader.count)))
+        self.assertEqual([0.0, 60.0, 120.0], list(reader.times[:3]))
+        self.assertEqual(written.splitlines(keepends=True)[1],
+                         bytes(reader.lines(1, 2)))
+
+    def test_record_logging(self):
+        """
+            GIVEN I set LOG_RECORD on the logging emit path
+            WHEN I backfill an hour
+            THEN the lines are written and recorded exactly as the logging
+            module formats them
+        """
+        written, path = self.record_backfill()
+        reader = self.open_capture(path)
+        self.assertEqual(66, reader.count)
+        self.assertEqual(written, bytes(reader.lines(0, reader.count)))
+        self.assertRegex(written.decode().splitlines()[0],
+                         r"^2020-03-01 00:01:00\.000 ERROR ")
+
+    def test_replay(self):
+        """
+            GIVEN a recorded capture
+            WHEN I replay it as fast as possible, from the start, from a
+            line and from a time
+            THEN the recorded lines are written from there on
+        """
+        written, path = self.record_backfill(LOG_EMIT_PATH="direct")
+        reader = self.open_capture(path)
+        lines = written.splitlines(keepends=True)
+        stream = io.BytesIO()
+        self.assertEqual(66, replay(reader, stream, None))
+        self.assertEqual(written, stream.getvalue())
+        stream = io.BytesIO()
+        self.assertEqual(6, replay(reader, stream, None, 60))
+        self.assertEqual(b''.join(lines[60:]), stream.getvalue())
+        first = reader.find_time(1800.0)
+        self.assertTrue(lines[first].startswith(b"2020-03-01 00:31:00.000"))
+        self.assertEqual(reader.count, reader.find_time(1e9))
+
+    def test_paced_replay(self):
+        """
+            GIVEN a capture of lines recorded over 2 seconds
+            WHEN I replay it at 10 times the speed
+            THEN it takes about 0.2 seconds
+        """
+        path = self.capture_path()
+        capture = CaptureFile(path)
+        for index in range(21):
+            capture.record(1000.0 + index * 0.1, [b"%d\n" % index])
+        capture.close()
+        reader = self.open_capture(path)
+        stream = io.BytesIO()
+        started = time.monotonic()
+        self.assertEqual(21, replay(reader, stream, 10.0))
+        elapsed = time.monotonic() - started
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(b"".join(b"%d\n" % index for index in range(21)),
+                         stream.getvalue())
+        self.assertEqual(1000.0, reader.start)
+
+    def test_replay_stops_in_a_gap(self):
+        """
+            GIVEN a capture with an hour between its two lines
+            WHEN I replay it at the recorded speed
+            AND a termination signal is detected during the gap
+            THEN the replay stops straight away after the first line
+        """
+        path = self.capture_path()
+        capture = CaptureFile(path)
+        capture.record(1000.0, [b"first\n"])
+        capture.record(4600.0, [b"second\n"])
+        capture.close()
+        reader = self.open_capture(path)
+        killer = GracefulKiller(False)
+        timer = threading.Timer(0.2, killer.exit_gracefully, (None, None))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        stream = io.BytesIO()
+        started = time.monotonic()
+        self.assertEqual(1, replay(reader, stream, 1.0, killer=killer))
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(b"first\n", stream.getvalue())
+
+    def test_invalid_capture_and_speed(self):
+        """
+            GIVEN an incomplete capture file, or an invalid replay speed
+            WHEN I open the capture or parse the speed
+            THEN an exception is raised
+            AND an invalid speed on the command line is a usage error
+        """
+        path = self.capture_path()
+        with open(path, 'wb') as file:
+            file.write(b'LGCAP001 recording was interrupted' * 2)
+        with self.assertRaises(Exception) as context:
+            CaptureReader(path)
+        self.assertTrue(str(context.exception).startswith(
+            "Invalid capture file"))
+        self.assertIsNone(parse_speed("max"))
+        self.assertEqual(10.0, parse_speed("10"))
+        for value in ("0", "-1", "fast", "inf"):
+            with self.assertRaises(Exception) as context:
+                parse_speed(value)
+            self.assertTrue(str(context.exception).startswith(
+                "Invalid replay speed, Supplied value is : " + value))
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            with self.assertRaises(SystemExit):
+                main.parse_arguments(["replay", path, "--speed", "fast"])
+        self.assertIn("--speed: Invalid replay speed, Supplied value is : " +
+                      "fast", errors.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
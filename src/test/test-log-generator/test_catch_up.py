@@ -0,0 +1,166 @@
+import unittest
+import io
+import os
+from logger.log_generator import LogDriver
+
+
+class SlowStream(io.BytesIO):
+    """a stream that moves the simulated clock on as each write takes
+    time, cost seconds after the costs of the first writes"""
+
+    def __init__(self, clock, cost: float, first_costs: tuple = ()):
+        super().__init__()
+        self.clock = clock
+        self.cost = cost
+        self.first_costs = list(first_costs)
+
+    def write(self, data):
+        if self.first_costs:
+            self.clock.now += self.first_costs.pop(0)
+        else:
+            self.clock.now += self.cost
+        return super().write(data)
+
+
+class CatchUpTest(unittest.TestCase):
+    """test suite for absolute deadline scheduling and the catch-up
+    policies, writing a message every second for 100 simulated seconds
+    while each write takes simulated time"""
+
+    testfile = 'test/message_definitions/test_logger_catch_up'
+
+    def run_driver(self, policy: str, cost: float, first_costs: tuple = (),
+                   tick: str = None) -> tuple:
+        """runs the driver, returning it and the time of each line"""
+        settings = {"LOG_EMIT_PATH": "direct", "LOG_CATCH_UP": policy,
+                    "LOG_BACKFILL_START": "2020-03-01T00:00:00",
+                    "LOG_BACKFILL_END": "2020-03-01T00:01:40"}
+        if tick is not None:
+            settings["LOG_TICK"] = tick
+        os.environ.update(settings)
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            for name in settings:
+                os.environ.pop(name)
+        stream = SlowStream(thread1.clock, cost, first_costs)
+        thread1.writer.stream = stream
+        thread1.file = self.testfile
+        try:
+            thread1.run()
+        finally:
+            thread1.logger.removeHandler(thread1.fh)
+        times = [line[17:23].decode()
+                 for line in stream.getvalue().splitlines()]
+        return thread1, times
+
+    def test_no_drift(self):
+        """
+            GIVEN each write takes 0.3 seconds
+            WHEN I write a message every second for 100 seconds
+            THEN all 100 messages are written on their deadlines
+            AND there is no drift to report
+        """
+        thread1, times = self.run_driver("burst", 0.3)
+        self.assertEqual(100, len(times))
+        self.assertEqual(['01.000', '02.000', '03.000'], times[:3])
+        self.assertEqual('40.000', times[-1])
+        self.assertEqual(0, thread1.log_messages[0].max_drift)
+        self.assertIsNone(thread1.schedule_report())
+
+    def test_burst(self):
+        """
+            GIVEN the first write takes 5 seconds
+            AND LOG_CATCH_UP is burst
+            WHEN I write a message every second
+            THEN the 5 missed messages are written straight away
+        """
+        thread1, times = self.run_driver("burst", 0, (5,))
+        self.assertEqual(['01.000'] + ['06.000'] * 5 + ['07.000'],
+                         times[:7])
+        self.assertEqual(100, len(times))
+        self.assertEqual(4, thread1.log_messages[0].max_drift)
+        self.assertEqual("Schedule : fell behind by up to 4000.000 ms, " +
+                         "0 lines skipped", thread1.schedule_report())
+
+    def test_spread(self):
+        """
+            GIVEN the first write takes 5 seconds
+            AND LOG_CATCH_UP is spread
+            WHEN I write a message every second
+            THEN the missed messages are written at twice the rate
+            AND every message is written once it has caught up
+        """
+        thread1, times = self.run_driver("spread", 0, (5,))
+        self.assertEqual(['01.000', '06.000', '06.500', '07.000', '07.500',
+                          '08.000', '08.500', '09.000', '09.500', '10.000',
+                          '11.000', '12.000'], times[:12])
+        self.assertEqual(100, len(times))
+
+    def test_spread_in_ticks(self):
+        """
+            GIVEN I set LOG_TICK to 1 second
+            AND the first write takes 5 seconds
+            AND LOG_CATCH_UP is spread
+            WHEN I write a message every second
+            THEN the first missed message is written straight away and the
+            rest two a tick, at twice the rate, until it has caught up
+        """
+        thread1, times = self.run_driver("spread", 0, (5,), tick="1")
+        self.assertEqual(['01.000', '06.000', '07.000', '07.000', '08.000',
+                          '08.000', '09.000', '09.000', '10.000', '10.000',
+                          '11.000', '12.000'], times[:12])
+        self.assertEqual(100, len(times))
+
+    def test_skip(self):
+        """
+            GIVEN each write takes 2.5 seconds
+            AND LOG_CATCH_UP is skip
+            WHEN I write a message every second
+            THEN messages more than a second late are skipped and counted
+            AND the drift stays within a second
+        """
+        thread1, times = self.run_driver("skip", 2.5)
+        message = thread1.log_messages[0]
+        self.assertEqual(['01.000', '03.500', '06.000'], times[:3])
+        self.assertEqual(100, len(times) + message.skipped - 2)
+        self.assertLessEqual(message.max_drift, 1)
+        self.assertTrue(thread1.schedule_report().endswith(
+            ", " + str(message.skipped) + " lines skipped"))
+
+    def test_skip_in_ticks(self):
+        """
+            GIVEN I set LOG_TICK to 5 seconds
+            AND each write takes 12 seconds
+            AND LOG_CATCH_UP is skip
+            WHEN I write a message every second
+            THEN only the messages due during the last tick are written
+            AND every other message up to the end is skipped
+        """
+        thread1, times = self.run_driver("skip", 12, tick="5")
+        message = thread1.log_messages[0]
+        self.assertEqual(['05.000'] * 5 + ['17.000'] * 6 + ['29.000'],
+                         times[:12])
+        self.assertEqual(100, message.skipped + len(times))
+
+    def test_invalid_policy(self):
+        """
+            GIVEN an invalid LOG_CATCH_UP or LOG_CATCH_UP_RATE
+            WHEN I create a driver
+            THEN an Exception is raised
+        """
+        for name, value in (("LOG_CATCH_UP", "wait"),
+                            ("LOG_CATCH_UP_RATE", "1")):
+            os.environ[name] = value
+            try:
+                with self.assertRaises(Exception) as context:
+                    LogDriver(1, "Thread-1")
+            finally:
+                os.environ.pop(name)
+            self.assertTrue(str(context.exception).startswith(
+                "Invalid value for " + name + ", Supplied value is : " +
+                value))
+
+
+if __name__ == '__main__':
+    unittest.main()
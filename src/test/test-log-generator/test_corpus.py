@@ -0,0 +1,157 @@
+import unittest
+import contextlib
+import gzip
+import io
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from logger.corpus import export_corpus, parse_size
+import main
+
+
+class CorpusTest(unittest.TestCase):
+    """test suite for corpus.py"""
+
+    testfile = 'test/message_definitions/test_logger_corpus'
+
+    def export(self, **options) -> tuple:
+        """exports a corpus to a new directory, returning the directory and
+        the manifest"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        options.setdefault("seed", "corpus-test")
+        return directory, export_corpus(self.testfile, directory, **options)
+
+    def read_lines(self, directory: str, manifest: dict) -> list:
+        """returns the lines of each shard"""
+        shards = []
+        for shard in manifest["shards"]:
+            with gzip.open(os.path.join(directory, shard["file"])) as file:
+                shards.append(file.read().splitlines(keepends=True))
+        return shards
+
+    def test_deterministic(self):
+        """
+            GIVEN definitions with random template fields, unique tokens and
+            a poisson load profile
+            WHEN I export the same corpus twice, in parallel
+            THEN the shard files and manifests are byte for byte the same
+            AND a different seed gives a different corpus
+        """
+        first, manifest = self.export(lines=3000, shards=3, processes=3)
+        second, _ = self.export(lines=3000, shards=3, processes=3)
+        for name in os.listdir(first):
+            with open(os.path.join(first, name), 'rb') as file:
+                expected = file.read()
+            with open(os.path.join(second, name), 'rb') as file:
+                self.assertEqual(expected, file.read(), name)
+        self.assertEqual(4, len(os.listdir(first)))
+        _, other = self.export(lines=3000, shards=3, seed="other")
+        self.assertNotEqual(manifest["shards"][0]["sha256"],
+                            other["shards"][0]["sha256"])
+
+    def test_manifest(self):
+        """
+            GIVEN a line budget shared between 3 shards
+            WHEN I export a corpus
+            THEN the manifest holds the lines, bytes and checksums of each
+            shard and their totals
+        """
+        directory, manifest = self.export(lines=1000, shards=3)
+        self.assertEqual([334, 333, 333],
+                         [shard["lines"] for shard in manifest["shards"]])
+        self.assertEqual(1000, manifest["lines"])
+        with open(os.path.join(directory, "manifest.json")) as file:
+            self.assertEqual(manifest, json.load(file))
+        for shard, lines in zip(manifest["shards"],
+                                self.read_lines(directory, manifest)):
+            content = b''.join(lines)
+            self.assertEqual(shard["lines"], len(lines))
+            self.assertEqual(shard["bytes"], len(content))
+            self.assertEqual(shard["sha256"],
+                             hashlib.sha256(content).hexdigest())
+            with open(os.path.join(directory, shard["file"]), 'rb') as file:
+                self.assertEqual(shard["gzip_sha256"],
+                                 hashlib.sha256(file.read()).hexdigest())
+        self.assertEqual(sum(shard["bytes"] for shard in manifest["shards"]),
+                         manifest["bytes"])
+
+    def test_shards_match_single_shard(self):
+        """
+            GIVEN definitions whose max counts end the corpus
+            WHEN I export it as 1 shard and as 3 shards
+            THEN the 3 shards hold the lines of the single shard
+            AND each shard is in time order
+        """
+        self.testfile = 'test/message_definitions/test_logger_corpus_counted'
+        one, single = self.export(lines=100000)
+        three, sharded = self.export(lines=100000, shards=3)
+        lines = self.read_lines(one, single)[0]
+        shards = self.read_lines(three, sharded)
+        self.assertEqual(sorted(lines), sorted(sum(shards, [])))
+        for shard in shards:
+            self.assertEqual(sorted(shard, key=lambda line: line[:23]),
+                             shard)
+        self.assertTrue(lines[0].startswith(b"2020-01-01 00:00:01.000 "))
+
+    def test_byte_budget(self):
+        """
+            GIVEN a budget of 10000 bytes shared between 2 shards
+            WHEN I export a corpus
+            THEN each shard ends with the line that reaches its share
+        """
+        directory, manifest = self.export(size=10000, shards=2)
+        for shard, lines in zip(manifest["shards"],
+                                self.read_lines(directory, manifest)):
+            self.assertGreaterEqual(shard["bytes"], 5000)
+            self.assertLess(shard["bytes"] - len(lines[-1]), 5000)
+
+    def test_command_line(self):
+        """
+            GIVEN the export subcommand
+            WHEN I run it with a K suffixed line budget
+            THEN the corpus is written and invalid values are rejected
+            AND an invalid budget, number of shards or processes or
+            compression level on the command line is a usage error
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        main.main(["export", self.testfile, "--output", directory,
+                   "--lines", "2K", "--shards", "2", "--seed", "1"])
+        with open(os.path.join(directory, "manifest.json")) as file:
+            self.assertEqual(2000, json.load(file)["lines"])
+        self.assertEqual(5000000, parse_size("5M"))
+        for value in ("0", "5T", "x"):
+            with self.assertRaises(Exception) as context:
+                parse_size(value)
+            self.assertTrue(str(context.exception).startswith(
+                "Invalid size, Supplied value is : " + value))
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            with self.assertRaises(SystemExit):
+                main.parse_arguments(["export", self.testfile, "--output",
+                                      directory, "--lines", "abc"])
+        self.assertIn("--lines: Invalid size, Supplied value is : abc",
+                      errors.getvalue())
+        for option, value, expected in (
+                ("--shards", "0", "of at least 1"),
+                ("--processes", "x", "of at least 1"),
+                ("--compress-level", "42", "from 1 to 9")):
+            errors = io.StringIO()
+            with contextlib.redirect_stderr(errors):
+                with self.assertRaises(SystemExit):
+                    main.parse_arguments(["export", self.testfile,
+                                          "--output", directory, "--lines",
+                                          "1", option, value])
+            self.assertIn(option + ": Invalid value, Supplied value is : " +
+                          value + " Expected a whole number " + expected,
+                          errors.getvalue())
+        with self.assertRaises(Exception) as context:
+            export_corpus(self.testfile, directory, shards=0, lines=1)
+        self.assertIn("Invalid number of shards", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
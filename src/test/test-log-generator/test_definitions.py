@@ -0,0 +1,139 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+from logger.definitions import read_definitions
+from logger.log_generator import LogDriver
+from logger.log_message import LogMessage
+
+
+class DefinitionsTest(unittest.TestCase):
+    """test suite for definitions.py"""
+
+    quoted = 'test/message_definitions/test_logger_quoted'
+    invalid = 'test/message_definitions/test_logger_invalid'
+
+    def cache_directory(self) -> str:
+        """returns a new cache directory, removed after the test"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        return directory
+
+    def test_quoted_message_text(self):
+        """
+            GIVEN a definition file with a MESSAGE_TEXT in double quotes
+            containing commas and doubled quotes, and a blank line
+            WHEN I read the definitions through a LogDriver
+            THEN the text keeps its commas and quotes
+            AND quotes inside an unquoted text are kept as they are
+        """
+        driver = LogDriver(1, "Thread-1")
+        driver.logger.removeHandler(driver.fh)
+        driver.file = self.quoted
+        first, second, third = driver.setup_log_messages()
+        self.assertEqual('Checkout failed, retrying "cart" {counter}',
+                         first.message_text)
+        self.assertEqual('Checkout failed, retrying "cart" 0',
+                         first.output_string())
+        self.assertEqual('Payment declined [code "51"]', second.message_text)
+        self.assertEqual(('java', 3), (second.trace_style,
+                                       second.trace_depth))
+        self.assertEqual(0.5, third.frequency)
+        self.assertTrue(third.profile.poisson)
+        self.assertTrue(first.definition.startswith('0,N,N,"Checkout'))
+        self.assertEqual(3, driver.max_queue_depth)
+
+    def test_errors_have_line_numbers(self):
+        """
+            GIVEN a definition file with three invalid lines
+            WHEN I read the definitions
+            THEN one Exception reports the line number and problem of each
+        """
+        with self.assertRaises(Exception) as context:
+            read_definitions(self.invalid)
+        lines = str(context.exception).splitlines()
+        self.assertEqual("Invalid message definitions, Supplied value " +
+                         "is : " + self.invalid, lines[0])
+        self.assertTrue(lines[1].startswith("line 2 : invalid parameters"))
+        self.assertIn("line 5 : invalid parameters", str(context.exception))
+        self.assertTrue(lines[-1].startswith("line 6 : "))
+
+    def test_too_many_errors(self):
+        """
+            GIVEN a definition file with 25 invalid lines
+            WHEN I read the definitions
+            THEN the first 10 are reported and the rest are counted
+        """
+        directory = self.cache_directory()
+        path = os.path.join(directory, 'definitions')
+        with open(path, 'w') as file:
+            file.write('\n'.join(['0,N,N,Text,5'] * 25))
+        with self.assertRaises(Exception) as context:
+            read_definitions(path)
+        lines = str(context.exception).splitlines()
+        self.assertEqual(12, len(lines))
+        self.assertEqual("line 10 : Expected 6 - 8 comma separated " +
+                         "fields, found 5, put a MESSAGE_TEXT that " +
+                         "contains commas in double quotes", lines[10])
+        self.assertEqual("and 15 more invalid lines", lines[11])
+
+    def test_cache(self):
+        """
+            GIVEN a cache directory
+            WHEN I read the same definitions twice
+            THEN the second read uses the cache without validating again
+            AND gives the same messages, each with its own state
+            AND a changed file is parsed and cached again
+        """
+        cache = self.cache_directory()
+        path = os.path.join(cache, 'definitions')
+        shutil.copyfile(self.quoted, path)
+        first = read_definitions(path, cache)
+        self.assertEqual(2, len(os.listdir(cache)))
+        with mock.patch.object(LogMessage, 'validate',
+                               side_effect=AssertionError):
+            second = read_definitions(path, cache)
+        self.assertEqual([message.compiled() for message in first],
+                         [message.compiled() for message in second])
+        self.assertEqual(first[0].output_string(),
+                         second[0].output_string())
+        self.assertIsNot(first[2].profile, second[2].profile)
+        self.assertEqual(0, second[1].counter)
+
+        with open(path, 'a') as file:
+            file.write('\n1,N,N,Added message,5,0')
+        self.assertEqual(4, len(read_definitions(path, cache)))
+        self.assertEqual(3, len(os.listdir(cache)))
+
+    def test_unusable_cache(self):
+        """
+            GIVEN a corrupt cache file and a cache directory that cannot
+            be written
+            WHEN I read the definitions
+            THEN they are parsed from the file
+        """
+        cache = self.cache_directory()
+        read_definitions(self.quoted, cache)
+        name, = os.listdir(cache)
+        with open(os.path.join(cache, name), 'wb') as file:
+            file.write(b'not a cache')
+        self.assertEqual(3, len(read_definitions(self.quoted, cache)))
+        blocked = os.path.join(cache, 'file')
+        open(blocked, 'w').close()
+        self.assertEqual(3, len(read_definitions(self.quoted, blocked)))
+
+    def test_slots(self):
+        """
+            GIVEN a LogMessage
+            WHEN I set an attribute it does not have
+            THEN an AttributeError is raised, as it has no __dict__
+        """
+        message = LogMessage('0', 'N', 'N', 'Text', '5', '0')
+        self.assertFalse(hasattr(message, '__dict__'))
+        with self.assertRaises(AttributeError):
+            message.colour = 'red'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+import os
+import tempfile
+import time
+from unittest import mock
+from logger.file_sink import FileSink, create_file_sink
+from logger.log_generator import LogDriver
+
+LINE = b"2020-03-01 00:01:00.000 ERROR Connection refused by host-001\n"
+
+
+class FileSinkTest(unittest.TestCase):
+    """test suite for file_sink.py"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'app.log')
+
+    def segment(self, number: int) -> bytes:
+        with open(self.path + '.%06d' % number, 'rb') as segment:
+            return segment.read()
+
+    def test_aligned_chunks(self):
+        """
+            GIVEN a FileSink with 256 byte chunks
+            WHEN I write batches of lines
+            THEN every write but the last is a whole chunk
+            AND the segment holds every line in order
+        """
+        sizes = []
+        write = os.write
+
+        def recording_write(fd, data):
+            sizes.append(len(data))
+            return write(fd, data)
+
+        sink = FileSink(self.path, chunk_bytes=256)
+        with mock.patch('os.write', recording_write):
+            for index in range(20):
+                sink.write(LINE * 3)
+            sink.close()
+        self.assertEqual(LINE * 60, self.segment(1))
+        self.assertEqual([256] * (len(LINE) * 60 // 256), sizes[:-1])
+        self.assertEqual(len(LINE) * 60 % 256, sizes[-1])
+
+    def test_rotates_by_size(self):
+        """
+            GIVEN a FileSink that rotates at 1000 bytes
+            WHEN I write 50 lines a batch at a time
+            THEN each segment is rotated between batches
+            AND the segments together hold every line
+        """
+        sink = FileSink(self.path, rotate_bytes=1000, chunk_bytes=128)
+        for index in range(50):
+            sink.write(LINE)
+        sink.close()
+        self.assertEqual(3, sink.segments)
+        segments = [self.segment(number) for number in range(1, 4)]
+        self.assertEqual([LINE * 17, LINE * 17, LINE * 16], segments)
+        self.assertEqual(2, len(sink.rotation_seconds))
+        self.assertEqual(3, len(sink.sync_seconds))
+
+    def test_rotates_by_age(self):
+        """
+            GIVEN a FileSink that rotates after 0.1 seconds
+            WHEN I write a batch, wait and write another
+            THEN each batch is in its own segment
+        """
+        sink = FileSink(self.path, rotate_seconds=0.1)
+        sink.write(LINE)
+        time.sleep(0.2)
+        sink.write(LINE)
+        sink.close()
+        self.assertEqual(2, sink.segments)
+        self.assertEqual(LINE, self.segment(1))
+        self.assertEqual(LINE, self.segment(2))
+
+    def test_preallocated_segments_truncated(self):
+        """
+            GIVEN a FileSink that preallocates 64KiB segments
+            WHEN I write fewer lines than fill a segment
+            THEN the closed segment is truncated to the lines written
+        """
+        sink = FileSink(self.path, rotate_bytes=65536, chunk_bytes=4096,
+                        preallocate=True)
+        sink.write(LINE * 10)
+        sink.close()
+        self.assertEqual(LINE * 10, self.segment(1))
+
+    def test_report(self):
+        """
+            GIVEN a FileSink
+            WHEN I write lines and close it
+            THEN the report gives the bytes, segments and latencies
+        """
+        sink = FileSink(self.path, rotate_bytes=100)
+        sink.write(LINE * 2)
+        sink.write(LINE * 2)
+        sink.close()
+        self.assertRegex(sink.report(),
+                         r"^File sink : " + str(len(LINE) * 4) +
+                         r" bytes written to 2 segments, rotation latency " +
+                         r"max \d+\.\d{3} ms, segment fsync max " +
+                         r"\d+\.\d{3} ms$")
+
+    def test_write_error(self):
+        """
+            GIVEN a FileSink whose directory does not exist
+            WHEN I write lines and close it
+            THEN the close returns and the report gives the error
+        """
+        sink = FileSink(os.path.join(self.path, 'missing', 'app.log'))
+        sink.write(LINE)
+        sink.write(LINE)
+        sink.close()
+        self.assertIsInstance(sink.error, OSError)
+        self.assertTrue(sink.report().startswith(
+            "File sink : stopped writing after 0 bytes"))
+
+    def test_create_file_sink(self):
+        """
+            GIVEN LOG_FILE_ environment variables
+            WHEN I create a file sink
+            THEN it has the settings given
+            AND an invalid setting raises an Exception
+        """
+        os.environ["LOG_FILE_ROTATE_BYTES"] = "4096"
+        os.environ["LOG_FILE_ROTATE_SECONDS"] = "2.5"
+        os.environ["LOG_FILE_CHUNK_BYTES"] = "512"
+        try:
+            sink = create_file_sink(self.path)
+            sink.close()
+            self.assertEqual((4096, 2.5, 512, False),
+                             (sink.rotate_bytes, sink.rotate_seconds,
+                              sink.chunk_bytes, sink.preallocate))
+            for name, value in (("LOG_FILE_CHUNK_BYTES", "0"),
+                                ("LOG_FILE_ROTATE_SECONDS", "-1"),
+                                ("LOG_FILE_ROTATE_SECONDS", "nan"),
+                                ("LOG_FILE_ROTATE_SECONDS", "inf"),
+                                ("LOG_FILE_ROTATE_BYTES", "big"),
+                                ("LOG_FILE_PREALLOCATE", "maybe")):
+                os.environ[name] = value
+                with self.assertRaises(Exception) as context:
+                    create_file_sink(self.path)
+                self.assertTrue(str(context.exception).startswith(
+                    "Invalid value for " + name))
+                os.environ.pop(name)
+        finally:
+            for name in ("LOG_FILE_ROTATE_BYTES", "LOG_FILE_ROTATE_SECONDS",
+                         "LOG_FILE_CHUNK_BYTES", "LOG_FILE_PREALLOCATE"):
+                os.environ.pop(name, None)
+
+    def test_driver_writes_to_file(self):
+        """
+            GIVEN I set LOG_SINK to a file path
+            WHEN I backfill an hour of the backfill test definitions
+            THEN all 66 lines are written to the segment
+        """
+        os.environ["LOG_SINK"] = "file://" + self.path
+        os.environ["LOG_BACKFILL_START"] = "2020-03-01T00:00:00"
+        os.environ["LOG_BACKFILL_END"] = "2020-03-01T01:00:00"
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            os.environ.pop("LOG_SINK")
+            os.environ.pop("LOG_BACKFILL_START")
+            os.environ.pop("LOG_BACKFILL_END")
+        thread1.file = 'test/message_definitions/test_logger_backfill'
+        try:
+            thread1.run()
+        finally:
+            thread1.logger.removeHandler(thread1.fh)
+        lines = self.segment(1).splitlines()
+        self.assertEqual(66, len(lines))
+        self.assertEqual(b"2020-03-01 00:01:00.000 ERROR Shared " +
+                         b"CONNECTION message " +
+                         b"c60dffe5e8e83e8819a88d5feb479b13", lines[0])
+        self.assertIsInstance(thread1.sink, FileSink)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import io
+import logging
+import os
+import time
+from logger.line_formatter import LineFormatter
+from logger.log_generator import LogDriver
+
+
+class LineFormatterTest(unittest.TestCase):
+    """test suite for line_formatter.py and the direct emit path"""
+
+    def test_same_as_logging_formatter(self):
+        """
+            GIVEN a LineFormatter and the LogDriver's logging Formatter
+            WHEN I format lines at times across several seconds
+            THEN the LineFormatter lines are the encoded Formatter lines
+        """
+        formatter = logging.Formatter(
+            fmt='%(asctime)s.%(msecs)03d %(levelname)s %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S')
+        line_formatter = LineFormatter('%Y-%m-%d %H:%M:%S')
+        start = time.time()
+        for offset in (0, 0.0005, 0.9995, 1, 1.25, 61.999, 3600.5):
+            record = logging.makeLogRecord(
+                {"msg": "Some message", "levelno": logging.ERROR,
+                 "levelname": "ERROR"})
+            record.created = start + offset
+            record.msecs = int((record.created - int(record.created)) * 1000)
+            self.assertEqual((formatter.format(record) + "\n").encode(),
+                             line_formatter.format(start + offset,
+                                                   "Some message"))
+
+    def backfill_output(self, emit_path: str):
+        """backfills an hour of the test definitions on an emit path"""
+        os.environ["LOG_EMIT_PATH"] = emit_path
+        os.environ["LOG_OUTPUT"] = "buffered"
+        os.environ["LOG_BACKFILL_START"] = "2020-03-01T00:00:00"
+        os.environ["LOG_BACKFILL_END"] = "2020-03-01T01:00:00"
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            for name in ("LOG_EMIT_PATH", "LOG_OUTPUT",
+                         "LOG_BACKFILL_START", "LOG_BACKFILL_END"):
+                os.environ.pop(name)
+        thread1.file = 'test/message_definitions/test_logger_direct'
+        stream = io.BytesIO() if emit_path == "direct" else io.StringIO()
+        thread1.writer.stream = stream
+        thread1.start()
+        thread1.join(10)
+        return stream.getvalue()
+
+    def test_direct_path_byte_identical(self):
+        """
+            GIVEN UNIQUE=N CONNECTION and UNKNOWN messages and SHARED
+            messages
+            WHEN I backfill an hour through the logging path and the direct
+            emit path
+            THEN both paths write exactly the same output
+        """
+        direct = self.backfill_output("direct")
+        self.assertGreater(direct.count(b"\n"), 1000)
+        self.assertEqual(self.backfill_output("logging").encode(), direct)
+
+    def test_unique_n_lines_encoded_once(self):
+        """
+            GIVEN I set LOG_EMIT_PATH to direct
+            WHEN I set up the test definitions
+            THEN the UNIQUE=N messages have their lines encoded
+            AND the SHARED messages do not
+        """
+        os.environ["LOG_EMIT_PATH"] = "direct"
+        self.addCleanup(os.environ.pop, "LOG_EMIT_PATH")
+        driver = LogDriver(1, "Thread-1")
+        driver.file = 'test/message_definitions/test_logger_direct'
+        connection, unknown, shared, shared_unknown =\
+            driver.setup_log_messages()
+        self.assertEqual((b" ERROR Unable to connect to server\n",),
+                         connection.encoded_lines)
+        self.assertEqual(len(unknown.stack_traces),
+                         len(unknown.encoded_lines))
+        self.assertEqual((), shared.encoded_lines)
+        self.assertEqual((), shared_unknown.encoded_lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import unittest
+import datetime
+import io
+import os
+import time
+from logger.load_profiles import LoadProfile
+from logger.log_generator import LogDriver
+from logger.log_message import LogMessage
+
+
+class LoadProfileTest(unittest.TestCase):
+    """test suite for load_profiles.py"""
+
+    def count(self, profile: LoadProfile, frequency: float, start: float,
+              end: float) -> list:
+        """returns the number of messages in each second from start"""
+        counts = [0] * int(end - start)
+        when = profile.next_time(start, frequency)
+        while when < end:
+            counts[int(when - start)] += 1
+            when = profile.next_time(when, frequency)
+        return counts
+
+    def test_parse(self):
+        """
+            GIVEN PROFILE values
+            WHEN I parse them
+            THEN a flat rate has no profile
+            AND each shape has its arguments
+            AND an invalid value raises an Exception
+        """
+        self.assertIsNone(LoadProfile.parse(''))
+        self.assertIsNone(LoadProfile.parse('FLAT'))
+        for text, shape, arguments, poisson in (
+                ('poisson', 'flat', (), True),
+                ('ramp:60:0.1-1', 'ramp', (60, 0.1, 1), False),
+                ('burst:10:5:60+poisson', 'burst', (10, 5, 60), True),
+                ('sine:3600:.5-2', 'sine', (3600, 0.5, 2), False),
+                ('diurnal:0.2-1', 'diurnal', (0.2, 1, 14), False),
+                ('diurnal:0.2-1:0', 'diurnal', (0.2, 1, 0), False)):
+            profile = LoadProfile.parse(text)
+            self.assertEqual((shape, arguments, poisson),
+                             (profile.shape, profile.arguments,
+                              profile.poisson))
+        for text in ('square', 'flat:1', 'ramp:60:0-1', 'ramp:60:1',
+                     'burst:10:60:5', 'sine:0:1-2', 'diurnal:1-2:24',
+                     'ramp:60:1-2+poisson+poisson'):
+            with self.assertRaises(Exception) as context:
+                LogMessage('0', 'N', 'N', 'Text', '1', '0', '', text)
+            self.assertTrue(str(context.exception).startswith(
+                "Invalid value for PROFILE, Supplied value is : " + text))
+
+    def test_ramp(self):
+        """
+            GIVEN a ramp from 0.1 to 1 times over 100 seconds
+            WHEN I generate 200 seconds of a 100/s message
+            THEN the rate rises steadily then holds at 100/s
+        """
+        counts = self.count(LoadProfile.parse('ramp:100:0.1-1'), 0.01,
+                            1000.0, 1200.0)
+        self.assertAlmostEqual(10, counts[0], delta=1)
+        self.assertAlmostEqual(55, counts[49], delta=1)
+        self.assertEqual([100] * 99, counts[101:])
+        self.assertAlmostEqual(5500, sum(counts[:100]), delta=1)
+
+    def test_burst(self):
+        """
+            GIVEN a burst of 10 times for 5 seconds every 60 seconds
+            WHEN I generate a 1/s message for two minutes
+            THEN the message is written 10 times a second in each burst
+            AND once a second between bursts
+        """
+        counts = self.count(LoadProfile.parse('burst:10:5:60'), 1.0, 0.0,
+                            120.0)
+        self.assertAlmostEqual(50, sum(counts[:5]), delta=1)
+        self.assertEqual([1] * 54, counts[6:60])
+        self.assertAlmostEqual(50, sum(counts[60:65]), delta=1)
+
+    def test_long_interval_catches_burst(self):
+        """
+            GIVEN a burst of 100 times for 1 second every 600 seconds
+            WHEN I generate a message every 60 seconds
+            THEN the burst is not stepped over
+        """
+        counts = self.count(LoadProfile.parse('burst:100:1:600'), 60.0,
+                            0.0, 1200.0)
+        self.assertEqual(2, sum(counts[600:601]))
+
+    def test_sine_peaks_at_50k(self):
+        """
+            GIVEN a sine profile from 0.02 to 1 times every 100 seconds
+            WHEN I generate a 50000/s message for a period
+            THEN the peak second is within 1% of 50000 lines
+            AND the total is within 0.1% of the integral of the rate
+        """
+        profile = LoadProfile.parse('sine:100:0.02-1')
+        counts = self.count(profile, 1 / 50000, 0.0, 100.0)
+        self.assertAlmostEqual(50000, max(counts), delta=500)
+        self.assertAlmostEqual(50, counts.index(max(counts)), delta=1)
+        self.assertAlmostEqual(50000 * 100 * 0.51, sum(counts),
+                               delta=50000 * 100 * 0.51 / 1000)
+
+    def test_diurnal(self):
+        """
+            GIVEN a diurnal profile from 0.1 to 1 times peaking at 14:00
+            WHEN I look at the multiplier through the local day
+            THEN it is highest at 14:00 and lowest at 02:00
+        """
+        profile = LoadProfile.parse('diurnal:0.1-1')
+        day = datetime.datetime(2020, 3, 1).timestamp()
+        self.assertAlmostEqual(1, profile.multiplier(day + 14 * 3600),
+                               delta=0.01)
+        self.assertAlmostEqual(0.1, profile.multiplier(day + 2 * 3600),
+                               delta=0.01)
+        self.assertAlmostEqual(0.55, profile.multiplier(day + 8 * 3600),
+                               delta=0.03)
+
+    def test_poisson(self):
+        """
+            GIVEN a poisson profile
+            WHEN I generate 20000 intervals
+            THEN the mean interval is the frequency
+            AND the intervals vary as an exponential distribution does
+        """
+        profile = LoadProfile.parse('poisson')
+        profile.random.seed('test')
+        intervals = []
+        when = 0.0
+        for index in range(20000):
+            after = profile.next_time(when, 2.0)
+            intervals.append(after - when)
+            when = after
+        mean = sum(intervals) / len(intervals)
+        variance = sum((interval - mean) ** 2
+                       for interval in intervals) / len(intervals)
+        self.assertAlmostEqual(2.0, mean, delta=0.05)
+        self.assertAlmostEqual(4.0, variance, delta=0.3)
+
+    def test_driver_profiles(self):
+        """
+            GIVEN a burst profile and a ramp profile
+            WHEN I backfill an hour with timer events and with ticks
+            THEN both write the profiled number of messages
+            AND the burst messages are 6 seconds apart within a burst
+        """
+        for tick in (None, "5"):
+            os.environ["LOG_BACKFILL_START"] = "2020-03-01T00:00:00"
+            os.environ["LOG_BACKFILL_END"] = "2020-03-01T01:00:00"
+            os.environ["LOG_OUTPUT"] = "buffered"
+            if tick is not None:
+                os.environ["LOG_TICK"] = tick
+            try:
+                thread1 = LogDriver(1, "Thread-1")
+            finally:
+                for name in ("LOG_BACKFILL_START", "LOG_BACKFILL_END",
+                             "LOG_OUTPUT", "LOG_TICK"):
+                    os.environ.pop(name, None)
+            stream = io.StringIO()
+            thread1.writer.stream = stream
+            thread1.file = 'test/message_definitions/test_logger_profiles'
+            try:
+                thread1.run()
+            finally:
+                thread1.logger.removeHandler(thread1.fh)
+            lines = stream.getvalue().splitlines()
+            burst = [line for line in lines if "Burst" in line]
+            # 10 a minute for the first minute of every 10, 1 otherwise
+            self.assertEqual(6 * 19, len(burst))
+            # 0.5 to 2 times a message every 10 seconds over 30 minutes
+            self.assertEqual(225 + 360,
+                             len([line for line in lines if "Ramp" in line]))
+            if tick is None:
+                self.assertEqual(["2020-03-01 00:00:06.000",
+                                  "2020-03-01 00:00:12.000"],
+                                 [line[:23] for line in burst[:2]])
+
+    def test_profile_cost(self):
+        """
+            GIVEN a sine profile
+            WHEN I compute the times of 200000 messages
+            THEN each costs no more than a few microseconds
+        """
+        profile = LoadProfile.parse('sine:60:0.5-1')
+        when = 0.0
+        started = time.perf_counter()
+        for index in range(200000):
+            when = profile.next_time(when, 0.0001)
+        self.assertLess(time.perf_counter() - started, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
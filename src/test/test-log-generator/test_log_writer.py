@@ -0,0 +1,296 @@
+import unittest
+import io
+import os
+import threading
+import time
+from logger.log_generator import LogDriver
+from logger.log_writer import BufferedLogWriter, QueuedLogWriter
+
+
+class BufferedLogWriterTest(unittest.TestCase):
+    """test suite for log_writer.py"""
+
+    def test_flush_on_size(self):
+        """
+            GIVEN a BufferedLogWriter with a 20 character threshold
+            WHEN I write lines totalling less than, then more than 20
+            THEN nothing is written until the threshold is reached
+        """
+        stream = io.StringIO()
+        writer = BufferedLogWriter(stream, 20, 60)
+        self.addCleanup(writer.close)
+        writer.write("0123456789\n")
+        self.assertEqual("", stream.getvalue())
+        writer.write_lines(["0123456789\n", "x\n"])
+        self.assertEqual("0123456789\n0123456789\nx\n", stream.getvalue())
+
+    def test_flush_on_interval(self):
+        """
+            GIVEN a BufferedLogWriter with a 0.1 second interval
+            WHEN I write a line that does not fill the buffer
+            THEN it is written once the interval has elapsed
+        """
+        stream = io.StringIO()
+        writer = BufferedLogWriter(stream, 1024, 0.1)
+        self.addCleanup(writer.close)
+        writer.write("held line\n")
+        deadline = time.monotonic() + 2
+        while stream.getvalue() == "" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual("held line\n", stream.getvalue())
+
+    def test_flush_on_close(self):
+        """
+            GIVEN a BufferedLogWriter with a large threshold and interval
+            WHEN I write a line and close the writer
+            THEN the line is written
+        """
+        stream = io.StringIO()
+        writer = BufferedLogWriter(stream, 1024, 60)
+        writer.write("last line\n")
+        writer.close()
+        self.assertEqual("last line\n", stream.getvalue())
+
+    def test_logger_buffered_output(self):
+        """
+            GIVEN I specify 60 CONNECTION messages
+            AND I set LOG_OUTPUT to buffered
+            WHEN I run the logging thread to completion
+            THEN the 60 formatted lines are written when the driver stops
+        """
+        os.environ["LOG_OUTPUT"] = "buffered"
+        os.environ["LOG_FLUSH_INTERVAL"] = "60"
+        self.addCleanup(os.environ.pop, "LOG_OUTPUT")
+        self.addCleanup(os.environ.pop, "LOG_FLUSH_INTERVAL")
+        os.environ["LOG_TICK"] = "0.05"
+        self.addCleanup(os.environ.pop, "LOG_TICK")
+
+        stream = io.StringIO()
+        thread1 = LogDriver(1, "Thread-1")
+        thread1.file = 'test/message_definitions/test_logger_tick_batch'
+        thread1.writer.stream = stream
+        thread1.start()
+        thread1.join(5)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(60, len(lines))
+        self.assertEqual(20, len([line for line in lines if line.endswith(
+            " ERROR Unable to connect to server")]))
+        self.assertRegex(lines[0], r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{3} ")
+
+    def test_invalid_output_mode(self):
+        """
+            GIVEN I set LOG_OUTPUT to an unknown value
+            WHEN I create a LogDriver
+            THEN an exception is raised
+        """
+        os.environ["LOG_OUTPUT"] = "sometimes"
+        self.addCleanup(os.environ.pop, "LOG_OUTPUT")
+        with self.assertRaises(Exception) as context:
+            LogDriver(1, "Thread-1")
+        self.assertIn("Invalid value for LOG_OUTPUT", str(context.exception))
+
+
+class StalledStream(io.StringIO):
+    """a stream whose writes wait until it is released, like a pipe
+    nobody is reading"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+        self.writing = threading.Event()
+
+    def write(self, data):
+        self.writing.set()
+        self.released.wait(5)
+        return super().write(data)
+
+
+class QueuedLogWriterTest(unittest.TestCase):
+    """test suite for the QueuedLogWriter in log_writer.py"""
+
+    def fill(self, policy: str, **options) -> tuple:
+        """stalls the writer thread on its first line, then writes 10
+        numbered lines to a queue of 4, returning the writer and stream
+        once the stream is released"""
+        stream = StalledStream()
+        writer = QueuedLogWriter(stream, 4, policy, **options)
+        writer.write("first\n")
+        stream.writing.wait(5)
+        writer.write_lines([str(index) + "\n" for index in range(10)])
+        stream.released.set()
+        writer.close()
+        return writer, stream
+
+    def test_drop_newest(self):
+        """
+            GIVEN a QueuedLogWriter of 4 lines whose stream has stalled
+            WHEN I write 10 lines with the drop-newest policy
+            THEN the first 4 are written and the rest are counted as dropped
+        """
+        writer, stream = self.fill("drop-newest")
+        self.assertEqual("first\n0\n1\n2\n3\n", stream.getvalue())
+        self.assertEqual(6, writer.dropped_lines)
+        self.assertEqual(5, writer.written_lines)
+        self.assertEqual(4, writer.high_water)
+
+    def test_drop_oldest(self):
+        """
+            GIVEN a QueuedLogWriter of 4 lines whose stream has stalled
+            WHEN I write 10 lines with the drop-oldest policy
+            THEN the last 4 are written and the rest are counted as dropped
+        """
+        writer, stream = self.fill("drop-oldest")
+        self.assertEqual("first\n6\n7\n8\n9\n", stream.getvalue())
+        self.assertEqual(6, writer.dropped_lines)
+        self.assertEqual("Output queue : 5 lines written, 6 lines " +
+                         "dropped, 0 lines delayed, at most 4 lines queued",
+                         writer.report())
+
+    def test_sample(self):
+        """
+            GIVEN a QueuedLogWriter of 4 lines whose stream has stalled
+            WHEN I write 10 lines with the sample policy, keeping 1 in 3
+            THEN once the queue is half full 1 line in 3 is queued
+        """
+        writer, stream = self.fill("sample", sample_every=3)
+        self.assertEqual("first\n0\n1\n2\n5\n", stream.getvalue())
+        self.assertEqual(6, writer.dropped_lines)
+
+    def test_block(self):
+        """
+            GIVEN a QueuedLogWriter of 4 lines whose stream has stalled
+            WHEN I write 10 lines with the block policy
+            THEN the write waits until the stream is released
+            AND every line is written with the lines that waited counted
+        """
+        stream = StalledStream()
+        writer = QueuedLogWriter(stream, 4, "block")
+        writer.write("first\n")
+        stream.writing.wait(5)
+        writing = threading.Thread(target=writer.write_lines, args=(
+            [str(index) + "\n" for index in range(10)],))
+        writing.start()
+        writing.join(0.2)
+        self.assertTrue(writing.is_alive())
+        stream.released.set()
+        writing.join(5)
+        writer.close()
+        self.assertEqual("first\n" + "".join(
+            str(index) + "\n" for index in range(10)), stream.getvalue())
+        self.assertEqual(0, writer.dropped_lines)
+        self.assertEqual(6, writer.delayed_lines)
+        self.assertIsNone(QueuedLogWriter(io.StringIO(), 4).report())
+
+    def test_logger_queued_output(self):
+        """
+            GIVEN I set LOG_OUTPUT to queued with a queue of 10 lines
+            AND the output stream has stalled
+            WHEN I run the logging thread
+            THEN every message is generated without waiting for the stream
+            AND the lines that did not fit are reported as dropped
+        """
+        settings = {"LOG_OUTPUT": "queued", "LOG_QUEUE_SIZE": "10",
+                    "LOG_QUEUE_POLICY": "drop-newest", "LOG_TICK": "0.05"}
+        os.environ.update(settings)
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            for name in settings:
+                os.environ.pop(name)
+        stream = StalledStream()
+        writer = thread1.writer
+        writer.stream = stream
+        thread1.file = 'test/message_definitions/test_logger_tick_batch'
+        with self.assertLogs('main application', 'WARNING') as logs:
+            thread1.start()
+            deadline = time.monotonic() + 3
+            while writer.dropped_lines + len(writer.queue) +\
+                    writer.writing < 60 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertFalse(stream.released.is_set())
+            stream.released.set()
+            thread1.join(5)
+        self.assertEqual(60, writer.written_lines + writer.dropped_lines)
+        self.assertGreater(writer.dropped_lines, 0)
+        self.assertEqual(writer.written_lines,
+                         len(stream.getvalue().splitlines()))
+        self.assertIn("lines dropped", logs.output[0])
+
+    def test_close_timeout(self):
+        """
+            GIVEN a QueuedLogWriter whose stream has stalled
+            WHEN I close it with a timeout
+            THEN it gives up after the timeout, counting the queued lines
+            as dropped
+        """
+        stream = StalledStream()
+        writer = QueuedLogWriter(stream, 4, "block")
+        writer.write_lines(["first\n"])
+        stream.writing.wait(5)
+        writer.write_lines(["0\n", "1\n"])
+        writer.close(0.1)
+        self.assertEqual(2, writer.dropped_lines)
+        stream.released.set()
+
+    def test_broken_stream(self):
+        """
+            GIVEN a QueuedLogWriter of 4 lines whose stream raises
+            BrokenPipeError
+            WHEN I write 10 lines with the block policy
+            THEN the writer does not hang and the lines are counted as
+            dropped
+        """
+        class BrokenStream(io.StringIO):
+            def write(self, data):
+                raise BrokenPipeError()
+
+        writer = QueuedLogWriter(BrokenStream(), 4, "block")
+        writing = threading.Thread(target=writer.write_lines, args=(
+            ["x\n"] * 10,))
+        writing.start()
+        writing.join(3)
+        self.assertFalse(writing.is_alive())
+        writer.close()
+        self.assertFalse(writer.thread.is_alive())
+        self.assertEqual(10, writer.dropped_lines)
+        self.assertEqual(0, writer.written_lines)
+
+    def test_block_without_writer(self):
+        """
+            GIVEN a QueuedLogWriter of 4 lines whose writer thread has
+            stopped
+            WHEN I write 10 lines with the block policy
+            THEN the lines that do not fit are dropped rather than waiting
+            for ever
+        """
+        writer = QueuedLogWriter(io.StringIO(), 4, "block")
+        writer.close()
+        writer.write_lines(["x\n"] * 10)
+        self.assertEqual(6, writer.dropped_lines)
+        self.assertEqual(0, writer.delayed_lines)
+
+    def test_invalid_queue_settings(self):
+        """
+            GIVEN I set LOG_QUEUE_SIZE, LOG_QUEUE_POLICY or LOG_QUEUE_SAMPLE
+            to an invalid value
+            WHEN I create a LogDriver with queued output
+            THEN an exception is raised
+        """
+        os.environ["LOG_OUTPUT"] = "queued"
+        self.addCleanup(os.environ.pop, "LOG_OUTPUT")
+        for name, value in (("LOG_QUEUE_SIZE", "0"),
+                            ("LOG_QUEUE_POLICY", "drop-all"),
+                            ("LOG_QUEUE_SAMPLE", "x")):
+            os.environ[name] = value
+            try:
+                with self.assertRaises(Exception) as context:
+                    LogDriver(1, "Thread-1")
+            finally:
+                os.environ.pop(name)
+            self.assertIn("Invalid value for " + name,
+                          str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,8 @@ from testfixtures import LogCapture
 from logger.log_generator import LogDriver
 import logger.log_message as log_message
 import collections
+import datetime
+import hashlib
 from unittest import mock
 
 
@@ -159,6 +161,40 @@ class LoggerTest(unittest.TestCase):
         self.assertTrue(collections.Counter(firstrun)
                         == collections.Counter(secondrun))
 
+    def test_logger_tick_batch(self):
+        """
+            GIVEN I specify a CONNECTION message every 0.01 seconds
+            AND a CONNECTION message at 200/s
+            AND I set LOG_TICK to 0.05 seconds
+            WHEN I start the logging thread
+            THEN all 60 messages will be generated
+            AND they will be written in batches, one per tick
+        """
+        testname = "test_logger_tick_batch"
+        os.environ["LOG_TICK"] = "0.05"
+        self.addCleanup(os.environ.pop, "LOG_TICK")
+
+        batches = []
+        with LogCapture() as log:
+            thread1 = LogDriver(1, "Thread-1")
+            thread1.file = 'test/message_definitions/' + testname
+            write_batch = thread1.write_batch
+
+            def record_batch(batch):
+                batches.append(len(batch))
+                write_batch(batch)
+
+            thread1.write_batch = record_batch
+            thread1.start()
+            thread1.join(5)
+
+        self.assertEqual(60, len(log.records),
+                         "Incorrect number of messages written")
+        self.assertEqual(60, sum(batches))
+        self.assertLess(len(batches), 60)
+        self.assertEqual(20, [record.getMessage() for record in log.records]
+                         .count("Unable to connect to server"))
+
     def xtest_logger_queue_depth(self):
         """
             GIVEN I have run the logger and I have set
@@ -252,7 +288,8 @@ class LoggerTest(unittest.TestCase):
             WHEN I supply an invalid value for the "frequency" flag
             value = "X"
             THEN validation will fail and state that:
-            "frequency and max_count must be positive integers"
+            "frequency must be a positive number of seconds or
+            a rate such as 100/s"
         """
         result = None
         with self.assertRaises(Exception) as context:
@@ -260,9 +297,29 @@ class LoggerTest(unittest.TestCase):
                                             "Error Message", "X", "5")
         self.assertIsNone(result)
         self.assertEqual("invalid parameters used to create log entry:" +
-                         " frequency must be a positive integer",
+                         " frequency must be a positive number of seconds" +
+                         " or a rate such as 100/s",
                          str(context.exception))
 
+    def test_logMessage_fractional_and_rate_frequency(self):
+        """
+            GIVEN I instantiate instances of LogMessage
+            WHEN I supply a fractional frequency of 0.25
+            AND a rate frequency of 1000/s
+            THEN the frequency will be held as the interval in seconds
+            AND a zero or negative frequency will fail validation
+        """
+        fractional = log_message.LogMessage("0", "N", "N",
+                                            "Error Message", "0.25", "5")
+        rate = log_message.LogMessage("0", "N", "N",
+                                      "Error Message", "1000/s", "5")
+        self.assertEqual(0.25, fractional.frequency)
+        self.assertEqual(0.001, rate.frequency)
+        for invalid in ("0", "-1", "0/s", "/s", "nan"):
+            with self.assertRaises(Exception):
+                log_message.LogMessage("0", "N", "N",
+                                       "Error Message", invalid, "5")
+
     def test_logMessage_validation_fail_max_count(self):
         """
             GIVEN I instantiate an instance of LogMessage
@@ -355,6 +412,49 @@ class LoggerTest(unittest.TestCase):
         self.assertEqual(
             logger1.output_string(), logger2.output_string())
 
+    def test_logMessage_shared_lookahead(self):
+        """
+            GIVEN I instantiate SHARED LogMessages with and without a seed
+            WHEN I generate more messages than one lookahead block
+            AND I generate with a counter step of 3 and a max count of 10
+            THEN every message matches the MD5 of the day or seed and
+            the counter
+            AND no more than the remaining messages are precomputed
+        """
+        now = time.time()
+        day = time.strftime("%j", time.localtime(now))
+        count = log_message.LogMessage.LOOKAHEAD + 10
+        for unique, prefix in (("Y", day), ("Y:seed1", "SEED1")):
+            message = log_message.LogMessage("1", unique, "Y",
+                                             "Random2 Message", "10", "0")
+            for counter in range(count):
+                self.assertEqual(
+                    "Random2 Message " +
+                    hashlib.md5((prefix + str(counter)).encode()).hexdigest(),
+                    message.output_string(now))
+        message = log_message.LogMessage("1", "Y:seed1", "Y",
+                                         "Random2 Message", "10", "10")
+        message.counter, message.counter_step = 1, 3
+        outputs = [message.output_string() for counter in range(3)]
+        self.assertEqual(["Random2 Message " + hashlib.md5(
+            ("SEED1" + str(counter)).encode()).hexdigest()
+            for counter in (1, 4, 7)], outputs)
+        self.assertEqual(3, len(message.lookahead))
+
+    def test_logMessage_shared_day_change(self):
+        """
+            GIVEN I instantiate a SHARED LogMessage without a seed
+            WHEN the time passes midnight between two messages
+            THEN the second message uses the new day of the year
+        """
+        message = log_message.LogMessage("1", "Y", "Y",
+                                         "Random2 Message", "10", "0")
+        before = datetime.datetime(2020, 3, 1, 23, 59, 59).timestamp()
+        message.output_string(before)
+        self.assertEqual("Random2 Message " +
+                         hashlib.md5(b"0621").hexdigest(),
+                         message.output_string(before + 1))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import io
+import ipaddress
+import os
+import re
+from logger.log_generator import LogDriver
+from logger.log_message import LogMessage
+from logger.message_template import MessageTemplate
+
+
+class MessageTemplateTest(unittest.TestCase):
+    """test suite for message_template.py"""
+
+    def test_plain_text_is_not_compiled(self):
+        """
+            GIVEN a message text without placeholders
+            WHEN I compile it
+            THEN there is no template and the text is written as it is
+        """
+        self.assertIsNone(MessageTemplate.compile("Unable to connect {{x}}"))
+        message = LogMessage('0', 'N', 'N', 'Unable to connect 100%', '1',
+                             '0')
+        self.assertIsNone(message.template)
+        self.assertEqual('Unable to connect 100%', message.output_string())
+
+    def test_every_placeholder(self):
+        """
+            GIVEN a template with every placeholder
+            WHEN I render lines across several blocks
+            THEN every field is filled in with a value of its kind
+            AND the counter follows the counter values
+            AND literal text, braces and % signs are kept
+        """
+        template = MessageTemplate.compile(
+            "{ip} {user_id} {host} {int:5-7} {choice:GET|PUT} {counter} " +
+            "100% {{done}}", seed="test")
+        pattern = re.compile(r"(\S+) user\d{5} host-\d{3} ([5-7]) " +
+                             r"(GET|PUT) (\d+) 100% \{done\}$")
+        ints = set()
+        for counter in range(0, 3 * MessageTemplate.BLOCK, 3):
+            line = template.render(counter, 3)
+            match = pattern.match(line)
+            self.assertIsNotNone(match, line)
+            ipaddress.IPv4Address(match.group(1))
+            self.assertEqual(str(counter), match.group(4))
+            ints.add(match.group(2))
+        self.assertEqual({"5", "6", "7"}, ints)
+
+    def test_blocks_grow(self):
+        """
+            GIVEN a template
+            WHEN I render more lines than the first block
+            THEN each block is twice the size of the last up to BLOCK
+            AND moving the counter refills the block
+        """
+        template = MessageTemplate.compile("{counter}")
+        for counter in range(MessageTemplate.FIRST_BLOCK + 1):
+            self.assertEqual(str(counter), template.render(counter))
+        self.assertEqual(2 * MessageTemplate.FIRST_BLOCK,
+                         len(template.block))
+        self.assertEqual("100", template.render(100))
+
+    def test_same_seed_same_values(self):
+        """
+            GIVEN two templates with the same seed
+            WHEN I render the same lines
+            THEN the random values are the same
+        """
+        first = MessageTemplate.compile("{ip} {int:1-500}", seed="same")
+        second = MessageTemplate.compile("{ip} {int:1-500}", seed="same")
+        self.assertEqual([first.render(counter) for counter in range(100)],
+                         [second.render(counter) for counter in range(100)])
+
+    def test_invalid_placeholders(self):
+        """
+            GIVEN placeholders that are unknown or have invalid arguments
+            WHEN I compile them
+            THEN an Exception is raised naming the placeholder
+        """
+        for placeholder in ("{address}", "{int:9-1}", "{int}", "{choice:}",
+                            "{ip:4}"):
+            with self.assertRaises(Exception) as context:
+                LogMessage('0', 'N', 'N', 'Text ' + placeholder, '1', '0')
+            self.assertTrue(str(context.exception).startswith(
+                "Invalid placeholder in MESSAGE_TEXT, Supplied value is : " +
+                placeholder), str(context.exception))
+
+    def test_shared_hash_ignores_placeholders(self):
+        """
+            GIVEN a SHARED=Y message with a placeholder
+            WHEN I write messages
+            THEN the MD5 is the same as for the same text without it
+        """
+        templated = LogMessage('0', 'Y:seed', 'Y', 'Login {user_id}', '1',
+                               '0')
+        plain = LogMessage('0', 'Y:seed', 'Y', 'Login', '1', '0')
+        for index in range(3):
+            line = templated.output_string()
+            self.assertRegex(line, r"^Login user\d{5} ")
+            self.assertEqual(line.split()[-1],
+                             plain.output_string().split()[-1])
+
+    def test_direct_path_renders_each_line(self):
+        """
+            GIVEN a UNIQUE=N message with a counter placeholder
+            AND I set LOG_EMIT_PATH to direct
+            WHEN I backfill its messages
+            THEN the line is not encoded once at startup
+            AND each line has its own counter value
+        """
+        os.environ["LOG_EMIT_PATH"] = "direct"
+        os.environ["LOG_BACKFILL_START"] = "2020-03-01T00:00:00"
+        os.environ["LOG_BACKFILL_END"] = "2020-03-01T01:00:00"
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            os.environ.pop("LOG_EMIT_PATH")
+            os.environ.pop("LOG_BACKFILL_START")
+            os.environ.pop("LOG_BACKFILL_END")
+        stream = io.BytesIO()
+        thread1.writer.stream = stream
+        thread1.file = 'test/message_definitions/test_logger_template'
+        try:
+            thread1.run()
+        finally:
+            thread1.logger.removeHandler(thread1.fh)
+        self.assertEqual((), thread1.log_messages[0].encoded_lines)
+        lines = stream.getvalue().decode().splitlines()
+        self.assertEqual(5, len(lines))
+        for counter, line in enumerate(lines):
+            self.assertRegex(line, r" ERROR Request " + str(counter) +
+                             r" from host-\d{3}$")
+
+
+if __name__ == '__main__':
+    unittest.main()
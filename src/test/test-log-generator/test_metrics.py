@@ -0,0 +1,155 @@
+import unittest
+import io
+import os
+import re
+import socket
+import urllib.request
+from logger.log_generator import LogDriver
+from logger.metrics import Histogram, MetricsServer
+
+
+class MetricsTest(unittest.TestCase):
+    """test suite for metrics.py"""
+
+    def free_port(self) -> int:
+        with socket.socket() as reserved:
+            reserved.bind(('127.0.0.1', 0))
+            return reserved.getsockname()[1]
+
+    def start_backfill(self, port: int, **settings) -> LogDriver:
+        """creates a driver serving its metrics that backfills an hour of
+        the backfill test definitions"""
+        settings.update(LOG_METRICS_PORT=str(port),
+                        LOG_BACKFILL_START="2020-03-01T00:00:00",
+                        LOG_BACKFILL_END="2020-03-01T01:00:00")
+        os.environ.update(settings)
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            for name in settings:
+                os.environ.pop(name)
+        self.addCleanup(MetricsServer.shared(port).close)
+        thread1.file = 'test/message_definitions/test_logger_backfill'
+        return thread1
+
+    def scrape(self, port: int) -> dict:
+        """returns each sample from the metrics endpoint"""
+        with urllib.request.urlopen('http://127.0.0.1:' + str(port) +
+                                    '/metrics', timeout=5) as response:
+            self.assertEqual('text/plain; version=0.0.4',
+                             response.headers['Content-Type'])
+            text = response.read().decode()
+        samples = {}
+        for line in text.splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_histogram(self):
+        """
+            GIVEN a histogram
+            WHEN I observe values
+            THEN each is counted in the first bucket it fits
+        """
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0, 3.0):
+            histogram.observe(value)
+        self.assertEqual([2, 1, 2], histogram.counts)
+        self.assertAlmostEqual(5.65, histogram.sum)
+
+    def test_timer_event_metrics(self):
+        """
+            GIVEN I set LOG_METRICS_PORT and LOG_EMIT_PATH to direct
+            WHEN I backfill an hour and scrape the endpoint
+            THEN the lines and bytes of each definition are reported
+            AND the target rate of each definition is reported
+            AND every write and timer event is in the histograms
+            AND a second scrape reports the same values
+        """
+        port = self.free_port()
+        thread1 = self.start_backfill(port, LOG_EMIT_PATH="direct",
+                                      LOG_OUTPUT="buffered")
+        stream = io.BytesIO()
+        thread1.writer.stream = stream
+        try:
+            thread1.run()
+        finally:
+            thread1.logger.removeHandler(thread1.fh)
+        samples = self.scrape(port)
+
+        first = ('{driver="Thread-1",definition="1",' +
+                 'message="Shared CONNECTION message"}')
+        second = ('{driver="Thread-1",definition="2",' +
+                  'message="Unable to connect to server"}')
+        self.assertEqual(60, samples['log_generator_lines_total' + first])
+        self.assertEqual(6, samples['log_generator_lines_total' + second])
+        lines = stream.getvalue().splitlines(keepends=True)
+        self.assertEqual(
+            sum(len(line) for line in lines if b'Shared' in line),
+            samples['log_generator_bytes_total' + first])
+        self.assertEqual(len(stream.getvalue()),
+                         samples['log_generator_bytes_total' + first] +
+                         samples['log_generator_bytes_total' + second])
+        self.assertAlmostEqual(1 / 60,
+                               samples['log_generator_target_rate' + first])
+        self.assertEqual(66, samples['log_generator_write_seconds_count'])
+        self.assertEqual(
+            66, samples['log_generator_scheduler_lateness_seconds_bucket' +
+                        '{le="0.001"}'])
+        self.assertEqual(0, samples['log_generator_queue_depth' +
+                                    '{driver="Thread-1"}'])
+        self.assertEqual(samples, self.scrape(port))
+
+    def test_tick_metrics(self):
+        """
+            GIVEN I set LOG_METRICS_PORT and LOG_TICK
+            WHEN I backfill an hour on the logging emit path
+            THEN the lines of each definition are reported
+            AND each tick is one write
+            AND the bytes include the timestamp of each message text
+        """
+        port = self.free_port()
+        thread1 = self.start_backfill(port, LOG_TICK="300",
+                                      LOG_OUTPUT="buffered")
+        stream = io.StringIO()
+        thread1.writer.stream = stream
+        try:
+            thread1.run()
+        finally:
+            thread1.logger.removeHandler(thread1.fh)
+        samples = self.scrape(port)
+
+        totals = {re.search(r'definition="(\d)"', name).group(1): value
+                  for name, value in samples.items()
+                  if name.startswith('log_generator_lines_total')}
+        self.assertEqual({'1': 60, '2': 6}, totals)
+        self.assertEqual(12, samples['log_generator_write_seconds_count'])
+        self.assertEqual(len(stream.getvalue()),
+                         sum(value for name, value in samples.items()
+                             if name.startswith('log_generator_bytes_total')))
+
+    def test_not_found_and_invalid_port(self):
+        """
+            GIVEN a metrics server
+            WHEN I request another path, or set an invalid port
+            THEN the server answers 404 and the port raises an Exception
+        """
+        server = MetricsServer(0, '127.0.0.1')
+        self.addCleanup(server.close)
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen('http://127.0.0.1:' + str(server.port) +
+                                   '/', timeout=5)
+        self.assertEqual(404, context.exception.code)
+        os.environ["LOG_METRICS_PORT"] = "http"
+        try:
+            with self.assertRaises(Exception) as context:
+                LogDriver(1, "Thread-1")
+        finally:
+            os.environ.pop("LOG_METRICS_PORT")
+        self.assertTrue(str(context.exception).startswith(
+            "Invalid value for LOG_METRICS_PORT, Supplied value is : http"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,420 @@
+import unittest
+import errno
+import http.server
+import os
+import re
+import socket
+import socketserver
+import threading
+import time
+from logger.log_generator import LogDriver
+from logger.network_sinks import HttpBulkSink, SyslogFormatter, \
+    SyslogTcpSink, SyslogUdpSink, TcpLineSink, create_sink
+
+LINES = (b"2020-03-01 00:01:00.000 ERROR First message\n" +
+         b"2020-03-01 00:02:00.000 ERROR Unknown error ['  File \"a\"\n" +
+         b"    raise Exception\n']\n" +
+         b"2020-03-01 00:03:00.000 ERROR Third message\n")
+
+
+class TcpServer(socketserver.ThreadingTCPServer):
+    """a local stand-in for a TCP collector that keeps what it receives"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.received = b''
+        self.connections = 0
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), TcpHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class TcpHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            with self.server.lock:
+                self.server.received += data
+
+
+class HttpHandler(http.server.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        if status == 200:
+            self.server.bodies.append((self.path, body))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FailingConnection():
+    """a stand-in for a UDP socket whose send fails with an error once,
+    for the message at a position, keeping what is sent"""
+
+    def __init__(self, sent: list, failures: dict):
+        self.sent = sent
+        self.failures = failures
+
+    def send(self, message: bytes):
+        error = self.failures.pop(len(self.sent), None)
+        if error is not None:
+            raise OSError(error, os.strerror(error))
+        self.sent.append(message)
+
+    def close(self):
+        pass
+
+
+class FailingUdpSink(SyslogUdpSink):
+    """a SyslogUdpSink that sends to FailingConnection"""
+
+    def __init__(self, failures: dict):
+        self.sent = []
+        self.failures = failures
+        super().__init__('127.0.0.1', 514)
+
+    def connect(self):
+        return FailingConnection(self.sent, self.failures)
+
+
+class PartialConnection():
+    """a stand-in for a TCP socket that takes at most chunk bytes a send
+    and fails once it has taken limit bytes, keeping what it takes"""
+
+    def __init__(self, chunk: int, limit: int = None):
+        self.received = b''
+        self.chunk = chunk
+        self.limit = limit
+
+    def send(self, data) -> int:
+        if self.limit is not None and len(self.received) >= self.limit:
+            raise OSError(errno.ECONNRESET, os.strerror(errno.ECONNRESET))
+        taken = bytes(data[:self.chunk])
+        self.received += taken
+        return len(taken)
+
+    def close(self):
+        pass
+
+
+def partial_sink(sink_type, chunk: int, limit: int):
+    """creates a sink of sink_type whose first connection fails once it
+    has taken limit bytes, chunk bytes at a time, keeping each connection
+    in its connections"""
+
+    class PartialSink(sink_type):
+        def connect(self):
+            self.connections.append(PartialConnection(
+                chunk, None if self.connections else limit))
+            return self.connections[-1]
+
+    sink = PartialSink('127.0.0.1', 514)
+    sink.connections = []
+    return sink
+
+
+class NetworkSinksTest(unittest.TestCase):
+    """test suite for network_sinks.py against local stand-in servers"""
+
+    def wait_for(self, condition, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def start_http(self, statuses: list = ()) -> http.server.HTTPServer:
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0),
+                                                 HttpHandler)
+        server.bodies = []
+        server.statuses = list(statuses)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_tcp_lines(self):
+        """
+            GIVEN a TcpLineSink
+            WHEN I write two batches
+            THEN the lines arrive as they are over one connection
+        """
+        server = TcpServer()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        sink = TcpLineSink('127.0.0.1', server.server_address[1])
+        sink.write(LINES)
+        sink.write(LINES.decode())
+        sink.close()
+        self.wait_for(lambda: len(server.received) == 2 * len(LINES))
+        self.assertEqual(2 * LINES, server.received)
+        self.assertEqual(1, server.connections)
+        self.assertEqual(6, sink.sent_lines)
+
+    def test_tcp_resumes_batch(self):
+        """
+            GIVEN a TcpLineSink whose connection fails part way through the
+            second line of a batch
+            WHEN the sink reconnects
+            THEN it sends the batch from the start of the second line
+            AND the first line is not sent again
+        """
+        first = LINES.index(b"2020-03-01 00:02")
+        sink = partial_sink(TcpLineSink, 10, first + 10)
+        sink.write(LINES)
+        sink.close()
+        old, new = sink.connections
+        self.assertEqual(LINES[:60], old.received)
+        self.assertEqual(LINES[first:], new.received)
+        self.assertEqual(3, sink.sent_lines)
+        self.assertEqual(1, sink.reconnects)
+
+    def test_syslog_tcp_resumes_batch(self):
+        """
+            GIVEN a SyslogTcpSink whose connection fails after the first
+            message of a batch
+            WHEN the sink reconnects
+            THEN it sends the second and third messages only
+        """
+        message = SyslogFormatter().messages(LINES)[0]
+        frame = len(str(len(message)) + ' ') + len(message)
+        sink = partial_sink(SyslogTcpSink, frame, frame)
+        sink.write(LINES)
+        sink.close()
+        old, new = sink.connections
+        self.assertEqual(1, old.received.count(b"First message"))
+        self.assertNotIn(b"First message", new.received)
+        second = SyslogFormatter().messages(LINES)[1]
+        self.assertTrue(new.received.startswith(
+            str(len(second)).encode() + b' <11>1 '))
+        self.assertEqual(1, new.received.count(b"Third message"))
+        self.assertEqual(3, sink.sent_lines)
+
+    def test_tcp_reconnects(self):
+        """
+            GIVEN a collector that is not listening yet
+            WHEN I write a batch and the collector then starts listening
+            THEN the sink backs off, reconnects and sends the batch
+        """
+        reserved = socket.socket()
+        reserved.bind(('127.0.0.1', 0))
+        self.addCleanup(reserved.close)
+        sink = TcpLineSink('127.0.0.1', reserved.getsockname()[1])
+        sink.write(LINES)
+        self.wait_for(lambda: sink.reconnects >= 2)
+        reserved.listen()
+        connection, address = reserved.accept()
+        self.addCleanup(connection.close)
+        connection.settimeout(5)
+        received = b''
+        while len(received) < len(LINES):
+            received += connection.recv(65536)
+        sink.close()
+        self.assertEqual(LINES, received)
+        self.assertEqual(0, sink.dropped_lines)
+
+    def test_gives_up_when_closed(self):
+        """
+            GIVEN a collector that never listens
+            WHEN I write a batch and close the sink with a short timeout
+            THEN the close returns and the lines are counted as dropped
+        """
+        reserved = socket.socket()
+        reserved.bind(('127.0.0.1', 0))
+        self.addCleanup(reserved.close)
+        sink = TcpLineSink('127.0.0.1', reserved.getsockname()[1])
+        sink.write(LINES)
+        started = time.monotonic()
+        sink.close(0.3)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(3, sink.dropped_lines)
+
+    def test_syslog_tcp_octet_counting(self):
+        """
+            GIVEN a SyslogTcpSink
+            WHEN I write a batch including a multiline stack trace
+            THEN each line is an octet counted RFC 5424 message
+            AND the stack trace stays in one message
+        """
+        server = TcpServer()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        sink = SyslogTcpSink('127.0.0.1', server.server_address[1])
+        sink.write(LINES)
+        sink.close()
+        self.wait_for(lambda: server.received.count(b'<11>1 ') == 3)
+
+        messages = []
+        data = server.received
+        while data:
+            length, _, data = data.partition(b' ')
+            messages.append(data[:int(length)])
+            data = data[int(length):]
+        self.assertEqual(3, len(messages))
+        header = re.compile(
+            rb'<11>1 2020-03-01T00:0(\d):00\.000[+-]\d\d:\d\d \S+ ' +
+            rb'log-generator \d+ - - (.*)$', re.S)
+        self.assertEqual(b'ERROR First message',
+                         header.match(messages[0]).group(2))
+        self.assertEqual(b"ERROR Unknown error ['  File \"a\"\n" +
+                         b"    raise Exception\n']",
+                         header.match(messages[1]).group(2))
+
+    def test_syslog_udp_datagrams(self):
+        """
+            GIVEN a SyslogUdpSink
+            WHEN I write a batch of three lines
+            THEN three RFC 5424 datagrams arrive
+        """
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(5)
+        self.addCleanup(server.close)
+        sink = SyslogUdpSink('127.0.0.1', server.getsockname()[1])
+        sink.write(LINES)
+        datagrams = [server.recv(65536) for index in range(3)]
+        sink.close()
+        for datagram in datagrams:
+            self.assertTrue(datagram.startswith(b'<11>1 2020-03-01T'))
+        self.assertTrue(datagrams[2].endswith(b' - - ERROR Third message'))
+
+    def test_syslog_udp_oversized_message_dropped(self):
+        """
+            GIVEN a SyslogUdpSink
+            WHEN I write a batch with a message too large for a datagram
+            THEN that message is dropped rather than retried
+            AND the rest of the batch is sent
+        """
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(5)
+        self.addCleanup(server.close)
+        sink = SyslogUdpSink('127.0.0.1', server.getsockname()[1])
+        lines = LINES.split(b'\n')
+        sink.write(lines[0] + b'\n' + lines[1] + b'x' * 70000 + b'\n' +
+                   b'\n'.join(lines[2:]))
+        datagrams = [server.recv(65536) for index in range(2)]
+        started = time.monotonic()
+        sink.close()
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(datagrams[0].endswith(b' - - ERROR First message'))
+        self.assertTrue(datagrams[1].endswith(b' - - ERROR Third message'))
+        self.assertEqual(2, sink.sent_lines)
+        self.assertEqual(1, sink.dropped_lines)
+        self.assertEqual(0, sink.reconnects)
+
+    def test_syslog_udp_resumes_batch(self):
+        """
+            GIVEN a SyslogUdpSink
+            WHEN sending the second message of a batch fails
+            THEN the sink reconnects and sends the rest of the batch
+            AND the first message is not sent again
+        """
+        sink = FailingUdpSink({1: errno.ECONNREFUSED, 2: errno.EMSGSIZE})
+        sink.write(LINES)
+        sink.close()
+        self.assertEqual(2, len(sink.sent))
+        self.assertTrue(sink.sent[0].endswith(b' - - ERROR First message'))
+        self.assertIn(b' - - ERROR Unknown error', sink.sent[1])
+        self.assertEqual(1, sink.reconnects)
+        self.assertEqual(2, sink.sent_lines)
+        self.assertEqual(1, sink.dropped_lines)
+
+    def test_http_bulk(self):
+        """
+            GIVEN an HttpBulkSink
+            WHEN I write two batches, the first answered by a server error
+            THEN each batch is POSTed as one body
+            AND the failed batch is sent again
+        """
+        server = self.start_http([503])
+        sink = HttpBulkSink('127.0.0.1', server.server_address[1],
+                            '/bulk?tag=test')
+        sink.write(LINES)
+        sink.write(LINES)
+        sink.close()
+        self.assertEqual([('/bulk?tag=test', LINES)] * 2, server.bodies)
+        self.assertEqual(6, sink.sent_lines)
+        self.assertEqual(1, sink.reconnects)
+
+    def test_http_rejected_batch_dropped(self):
+        """
+            GIVEN an HttpBulkSink
+            WHEN the server rejects a batch as a client error
+            THEN the batch is dropped rather than sent again
+        """
+        server = self.start_http([400])
+        sink = HttpBulkSink('127.0.0.1', server.server_address[1])
+        sink.write(LINES)
+        sink.write(LINES)
+        sink.close()
+        self.assertEqual([('/', LINES)], server.bodies)
+        self.assertEqual(3, sink.dropped_lines)
+
+    def test_create_sink(self):
+        """
+            GIVEN sink URLs
+            WHEN I create the sinks
+            THEN each has the expected type, port and path
+            AND an invalid URL raises an Exception
+        """
+        for url, sink_type, port in (
+                ("syslog+udp://localhost", SyslogUdpSink, 514),
+                ("syslog+tcp://localhost", SyslogTcpSink, 601),
+                ("tcp://localhost:5170", TcpLineSink, 5170),
+                ("http://localhost/logs", HttpBulkSink, 80)):
+            sink = create_sink(url)
+            sink.close()
+            self.assertIsInstance(sink, sink_type)
+            self.assertEqual(port, sink.port)
+        for url in ("tcp://localhost", "ftp://localhost:21", "localhost"):
+            with self.assertRaises(Exception) as context:
+                create_sink(url)
+            self.assertTrue(str(context.exception).startswith(
+                "Invalid value for LOG_SINK, Supplied value is : " + url))
+
+    def test_driver_sends_to_sink(self):
+        """
+            GIVEN I set LOG_SINK to a local HTTP collector
+            WHEN I backfill an hour of the backfill test definitions
+            THEN all 66 lines are POSTed in batches
+        """
+        server = self.start_http()
+        os.environ["LOG_SINK"] = "http://127.0.0.1:" +\
+            str(server.server_address[1]) + "/bulk"
+        os.environ["LOG_BACKFILL_START"] = "2020-03-01T00:00:00"
+        os.environ["LOG_BACKFILL_END"] = "2020-03-01T01:00:00"
+        try:
+            thread1 = LogDriver(1, "Thread-1")
+        finally:
+            os.environ.pop("LOG_SINK")
+            os.environ.pop("LOG_BACKFILL_START")
+            os.environ.pop("LOG_BACKFILL_END")
+        thread1.file = 'test/message_definitions/test_logger_backfill'
+        try:
+            thread1.run()
+        finally:
+            thread1.logger.removeHandler(thread1.fh)
+        lines = b''.join(body for path, body in server.bodies).splitlines()
+        self.assertEqual(66, len(lines))
+        self.assertEqual(b"2020-03-01 00:01:00.000 ERROR Shared " +
+                         b"CONNECTION message " +
+                         b"c60dffe5e8e83e8819a88d5feb479b13", lines[0])
+        self.assertEqual(66, thread1.sink.sent_lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import collections
+import os
+import tempfile
+from testfixtures import LogCapture
+from logger.log_generator import LogDriver
+
+
+class ReloadingLogDriver(LogDriver):
+    """a LogDriver that allows for the test's own timer event"""
+
+    def get_max_queue_depth(self, list_of_configurations: []):
+        return super().get_max_queue_depth(list_of_configurations) + 1
+
+
+class ReloadTest(unittest.TestCase):
+    """test suite for reloading the message definitions while running"""
+
+    original = ["0,N,N,Unchanged message,60,0",
+                "0,N,N,Removed message,60,0",
+                "0,N,N,Changed message,60,40"]
+    updated = ["0,N,N,Unchanged message,60,0",
+               "0,N,N,Changed message,30,40",
+               "0,N,N,Added message,60,0"]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "definitions")
+        self.write_definitions(self.original)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_definitions(self, lines: list):
+        with open(self.file, "w") as definitions:
+            definitions.write("\n".join(lines))
+
+    def run_reload(self, environment: dict) -> list:
+        """backfills one hour of the original definitions, which are
+        replaced by the updated definitions after 30 simulated minutes,
+        and returns the records"""
+        environment = dict(environment,
+                           LOG_RELOAD_INTERVAL="45",
+                           LOG_BACKFILL_START="2020-03-01T00:00:00",
+                           LOG_BACKFILL_END="2020-03-01T01:00:00")
+        os.environ.update(environment)
+        try:
+            with LogCapture() as log:
+                thread1 = ReloadingLogDriver(1, "Thread-1")
+                thread1.file = self.file
+                thread1.s.enter(30 * 60 + 1, 1, self.write_definitions,
+                                (self.updated,))
+                thread1.run()
+        finally:
+            for name in environment:
+                os.environ.pop(name)
+        return log.records
+
+    def check_counts(self, records: list):
+        counts = collections.Counter(record.getMessage()
+                                     for record in records)
+        self.assertEqual(60, counts["Unchanged message"])
+        # cancelled by the check at 00:30:45
+        self.assertEqual(30, counts["Removed message"])
+        # keeps its counter, 30 at every 60 seconds, then 10 every 30
+        self.assertEqual(40, counts["Changed message"])
+        # first due one frequency after the check at 00:30:45
+        self.assertEqual(29, counts["Added message"])
+
+    def test_reload_events(self):
+        """
+            GIVEN I set LOG_RELOAD_INTERVAL to 45 seconds
+            WHEN the message definitions are changed while running
+            THEN unchanged lines carry on
+            AND removed lines stop
+            AND changed lines keep their counter
+            AND added lines start
+        """
+        self.check_counts(self.run_reload({}))
+
+    def test_reload_ticks(self):
+        """
+            GIVEN I set LOG_RELOAD_INTERVAL to 45 seconds and LOG_TICK to 5
+            WHEN the message definitions are changed while running
+            THEN the same changes are applied to the tick batches
+        """
+        self.check_counts(self.run_reload({"LOG_TICK": "5"}))
+
+    def test_invalid_definitions_not_reloaded(self):
+        """
+            GIVEN I set LOG_RELOAD_INTERVAL to 45 seconds
+            WHEN the message definitions are replaced by an invalid file
+            THEN a warning is logged
+            AND the running messages carry on unchanged
+        """
+        self.updated = ["0,N,N,Unchanged message,sixty,0"]
+        records = self.run_reload({})
+        counts = collections.Counter(record.getMessage()
+                                     for record in records)
+        self.assertEqual(60, counts["Unchanged message"])
+        self.assertEqual(60, counts["Removed message"])
+        self.assertEqual(40, counts["Changed message"])
+        warnings = [record.getMessage() for record in records
+                    if record.levelname == "WARNING"]
+        self.assertEqual(1, len(warnings))
+        self.assertTrue(warnings[0].startswith(
+            "Message definitions not reloaded : "))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import io
+import os
+from unittest import mock
+from logger.log_generator import LogDriver
+from logger.workers import run_workers
+
+
+class ReplicasTest(unittest.TestCase):
+    """test suite for sharing the message definitions between replicas"""
+
+    testfile = 'test/message_definitions/test_logger_workers'
+
+    def set_environment(self, **settings):
+        """sets environment variables, restored after the test"""
+        for name, value in settings.items():
+            self.addCleanup(os.environ.pop, name, None)
+            os.environ[name] = value
+
+    def message_texts(self, output: str) -> list:
+        """strips the timestamps from the output lines"""
+        return [line[24:] for line in output.splitlines()]
+
+    def run_driver(self) -> list:
+        """runs the test definitions in a single LogDriver"""
+        stream = io.StringIO()
+        thread1 = LogDriver(1, "Thread-1")
+        thread1.file = self.testfile
+        thread1.writer.stream = stream
+        thread1.start()
+        thread1.join(10)
+        return self.message_texts(stream.getvalue())
+
+    def test_replicas_share_counters(self):
+        """
+            GIVEN 3 message definitions including SHARED=Y sequences
+            WHEN I run them in 3 replicas, each given its index
+            THEN the lines of the replicas together match a single instance
+            AND no replica repeats a line of another
+        """
+        self.set_environment(LOG_OUTPUT="buffered")
+        single = self.run_driver()
+        self.set_environment(LOG_REPLICA_COUNT="3")
+        replicas = []
+        for index in range(3):
+            os.environ["LOG_REPLICA_INDEX"] = str(index)
+            replicas.append(self.run_driver())
+        self.assertEqual(sorted(single), sorted(sum(replicas, [])))
+        self.assertEqual([9, 7, 6], [len(texts) for texts in replicas])
+        shared = [text for texts in replicas for text in texts
+                  if "Shared" in text]
+        self.assertEqual(7, len(set(shared)))
+
+    def test_replicas_and_workers(self):
+        """
+            GIVEN 2 replicas, each sharing its definitions between 2 worker
+            processes by counter value
+            WHEN I run both replicas
+            THEN their lines together match a single instance
+        """
+        self.set_environment(LOG_OUTPUT="buffered", LOG_FLUSH_INTERVAL="0.05")
+        single = self.run_driver()
+        self.set_environment(LOG_REPLICA_COUNT="2")
+        texts = []
+        for index in range(2):
+            os.environ["LOG_REPLICA_INDEX"] = str(index)
+            stream = io.StringIO()
+            self.assertEqual(0, run_workers(2, 'counter', self.testfile,
+                                            stream))
+            texts.extend(self.message_texts(stream.getvalue()))
+        self.assertEqual(sorted(single), sorted(texts))
+
+    def test_interval(self):
+        """
+            GIVEN 4 replicas
+            WHEN a replica reads the message definitions
+            THEN each message is generated at 4 times its interval
+            starting from the replica's counter value
+        """
+        self.set_environment(LOG_REPLICA_COUNT="4", LOG_REPLICA_INDEX="1")
+        thread1 = LogDriver(1, "Thread-1")
+        thread1.file = self.testfile
+        messages = thread1.partition_log_messages(
+            thread1.setup_log_messages())
+        self.assertEqual([0.04, 0.08, 0.04],
+                         [message.frequency for message in messages])
+        self.assertEqual([1, 1, 1],
+                         [message.counter for message in messages])
+        self.assertEqual([4, 4, 4],
+                         [message.counter_step for message in messages])
+
+    def test_host_name_ordinal(self):
+        """
+            GIVEN LOG_REPLICA_COUNT without LOG_REPLICA_INDEX
+            WHEN the host name is that of a StatefulSet pod
+            THEN the replica index is the ordinal at its end
+            AND a host name without an ordinal is rejected
+        """
+        self.set_environment(LOG_REPLICA_COUNT="3")
+        with mock.patch("socket.gethostname",
+                        return_value="log-generator-2"):
+            self.assertEqual((2, 3), LogDriver(1, "Thread-1").get_replica())
+        with mock.patch("socket.gethostname", return_value="workstation"):
+            with self.assertRaises(Exception) as context:
+                LogDriver(1, "Thread-1")
+        self.assertIn("Invalid value for LOG_REPLICA_INDEX",
+                      str(context.exception))
+
+    def test_invalid_replicas(self):
+        """
+            GIVEN a replica count that is not a whole number greater than
+            0, or an index outside the replicas
+            WHEN I create a LogDriver
+            THEN an exception is raised
+        """
+        for count, index in (("0", "0"), ("two", "0"), ("2", "2"),
+                             ("2", "-1")):
+            os.environ["LOG_REPLICA_COUNT"] = count
+            os.environ["LOG_REPLICA_INDEX"] = index
+            try:
+                with self.assertRaises(Exception) as context:
+                    LogDriver(1, "Thread-1")
+            finally:
+                os.environ.pop("LOG_REPLICA_COUNT")
+                os.environ.pop("LOG_REPLICA_INDEX")
+            self.assertIn("Invalid value for LOG_REPLICA_",
+                          str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import datetime
+import os
+import random
+from testfixtures import LogCapture
+from logger.log_generator import LogDriver
+from logger.scheduler import HeapScheduler, TimingWheelScheduler
+from logger.virtual_clock import VirtualClock
+
+
+class SchedulerTest(unittest.TestCase):
+    """test suite for the heap and timing wheel event schedulers"""
+
+    testfile = 'test/message_definitions/test_logger_backfill'
+
+    def run_events(self, scheduler, clock, times: list) -> list:
+        """schedules an event at each time and returns the simulated times
+        they ran at, in the order they ran"""
+        ran = []
+        for when in times:
+            scheduler.enterabs(when, 1, lambda: ran.append(clock.time()))
+        scheduler.run()
+        return ran
+
+    def test_heap_depth_and_cancel(self):
+        """
+            GIVEN a HeapScheduler
+            WHEN I schedule three events and cancel one
+            THEN the depth counts the pending events
+            AND only the two remaining events run, in order
+        """
+        clock = VirtualClock(0)
+        scheduler = HeapScheduler(clock.time, clock.sleep)
+        ran = []
+        scheduler.enter(2, 1, ran.append, ("second",))
+        cancelled = scheduler.enter(3, 1, ran.append, ("cancelled",))
+        scheduler.enter(1, 1, ran.append, ("first",))
+        self.assertEqual(3, scheduler.depth)
+        scheduler.cancel(cancelled)
+        self.assertEqual(2, scheduler.depth)
+        self.assertEqual(2, len(scheduler.queue))
+        with self.assertRaises(ValueError):
+            scheduler.cancel(cancelled)
+
+        scheduler.run()
+        self.assertEqual(["first", "second"], ran)
+        self.assertEqual(0, scheduler.depth)
+        self.assertTrue(scheduler.empty())
+
+    def test_wheel_runs_in_order_and_never_early(self):
+        """
+            GIVEN a TimingWheelScheduler with a 1ms resolution
+            WHEN I schedule events from now to beyond the last wheel
+            THEN every event runs in order of time
+            AND no event runs before its time or more than a tick late
+        """
+        clock = VirtualClock(1000.0)
+        scheduler = TimingWheelScheduler(clock.time, clock.sleep, 0.001)
+        generator = random.Random(11)
+        times = [1000.0 + generator.uniform(0, 10 ** generator.randint(0, 7))
+                 for index in range(2000)]
+
+        ran = self.run_events(scheduler, clock, times)
+        self.assertEqual(len(times), len(ran))
+        self.assertEqual(sorted(ran), ran)
+        for when, at in zip(sorted(times), ran):
+            self.assertGreaterEqual(at, when - 1e-6)
+            self.assertLess(at, when + 0.001 + 1e-6)
+        self.assertEqual(0, scheduler.depth)
+
+    def test_wheel_depth_and_cancel(self):
+        """
+            GIVEN a TimingWheelScheduler
+            WHEN I schedule events on every wheel and cancel some of them
+            THEN the depth counts the pending events
+            AND the cancelled events do not run
+        """
+        clock = VirtualClock(0)
+        scheduler = TimingWheelScheduler(clock.time, clock.sleep, 0.001)
+        ran = []
+        events = [scheduler.enter(delay, 1, ran.append, (delay,))
+                  for delay in (0.1, 10, 1000, 100000)]
+        self.assertEqual(4, scheduler.depth)
+        scheduler.cancel(events[1])
+        scheduler.cancel(events[3])
+        self.assertEqual(2, scheduler.depth)
+        self.assertEqual([0.1, 1000], [event.argument[0]
+                                       for event in scheduler.queue])
+
+        scheduler.run()
+        self.assertEqual([0.1, 1000], ran)
+
+    def test_backfill_with_wheel(self):
+        """
+            GIVEN I set LOG_SCHEDULER to wheel
+            WHEN I backfill one hour of the backfill test definitions
+            THEN the same 66 messages are generated as with the heap
+        """
+        records = {}
+        for scheduler in ("heap", "wheel"):
+            os.environ["LOG_SCHEDULER"] = scheduler
+            os.environ["LOG_BACKFILL_START"] = "2020-03-01T00:00:00"
+            os.environ["LOG_BACKFILL_END"] = "2020-03-01T01:00:00"
+            try:
+                with LogCapture() as log:
+                    thread1 = LogDriver(1, "Thread-1")
+                    thread1.file = self.testfile
+                    thread1.run()
+            finally:
+                os.environ.pop("LOG_SCHEDULER")
+                os.environ.pop("LOG_BACKFILL_START")
+                os.environ.pop("LOG_BACKFILL_END")
+            records[scheduler] = [(record.created, record.getMessage())
+                                  for record in log.records]
+        self.assertEqual(66, len(records["wheel"]))
+        self.assertEqual(records["heap"], records["wheel"])
+        start = datetime.datetime(2020, 3, 1).timestamp()
+        self.assertEqual(start + 3600, records["wheel"][-1][0])
+
+    def test_invalid_scheduler(self):
+        """
+            GIVEN I set LOG_SCHEDULER to an unknown scheduler
+            WHEN I create a driver
+            THEN an Exception is raised
+        """
+        os.environ["LOG_SCHEDULER"] = "calendar"
+        try:
+            with self.assertRaises(Exception) as context:
+                LogDriver(1, "Thread-1")
+        finally:
+            os.environ.pop("LOG_SCHEDULER")
+        self.assertEqual("Invalid value for LOG_SCHEDULER, Supplied value " +
+                         "is : calendar Expected heap|wheel",
+                         str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
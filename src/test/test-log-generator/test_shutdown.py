@@ -0,0 +1,95 @@
+import unittest
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from logger.graceful_killer import GracefulKiller
+from logger.log_generator import LogDriver
+
+
+class ShutdownTest(unittest.TestCase):
+    """test suite for stopping log-generator on a termination signal"""
+
+    testfile = os.path.abspath('test/message_definitions/test_logger_shutdown')
+
+    def start_generator(self, **settings) -> subprocess.Popen:
+        """runs main.py on the test definitions, waiting until it has
+        started"""
+        environment = dict(os.environ, MESSAGE_DEFINITIONS=self.testfile,
+                           **settings)
+        process = subprocess.Popen([sys.executable, "main.py"],
+                                   stderr=subprocess.PIPE,
+                                   env=environment)
+        self.addCleanup(process.stderr.close)
+        self.addCleanup(process.kill)
+        time.sleep(1.5)
+        return process
+
+    def stop_generator(self, process: subprocess.Popen) -> float:
+        """sends SIGTERM, returning the seconds until the process exits"""
+        started = time.monotonic()
+        process.send_signal(signal.SIGTERM)
+        process.wait(10)
+        return time.monotonic() - started
+
+    def test_time_to_exit(self):
+        """
+            GIVEN a message every 400 seconds and 5 messages held in a
+            buffered output that is only flushed every 60 seconds
+            WHEN I send SIGTERM
+            THEN log-generator exits within 2 seconds with status 99
+            AND the buffered messages are written
+        """
+        process = self.start_generator(LOG_OUTPUT="buffered",
+                                       LOG_FLUSH_INTERVAL="60")
+        elapsed = self.stop_generator(process)
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(99, process.returncode)
+        self.assertEqual(5, process.stderr.read().count(b"Frequent message"))
+
+    def test_time_to_exit_wheel(self):
+        """
+            GIVEN a message every 400 seconds on a timing wheel scheduler
+            WHEN I send SIGTERM
+            THEN log-generator exits within 2 seconds with status 99
+        """
+        process = self.start_generator(LOG_SCHEDULER="wheel")
+        self.assertLess(self.stop_generator(process), 2.0)
+        self.assertEqual(99, process.returncode)
+
+    def test_wait(self):
+        """
+            GIVEN a thread waiting 60 seconds on a GracefulKiller
+            WHEN a termination signal is detected
+            THEN the wait ends straight away and reports it
+        """
+        killer = GracefulKiller(False)
+        self.assertFalse(killer.wait(0.01))
+        timer = threading.Timer(0.1, killer.exit_gracefully, (None, None))
+        timer.start()
+        started = time.monotonic()
+        self.assertTrue(killer.wait(60))
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertTrue(killer.kill_now)
+
+    def test_invalid_shutdown_timeout(self):
+        """
+            GIVEN LOG_SHUTDOWN_TIMEOUT that is not a positive number
+            WHEN I create a LogDriver
+            THEN an exception is raised
+        """
+        for value in ("0", "-1", "soon"):
+            os.environ["LOG_SHUTDOWN_TIMEOUT"] = value
+            try:
+                with self.assertRaises(Exception) as context:
+                    LogDriver(1, "Thread-1")
+            finally:
+                os.environ.pop("LOG_SHUTDOWN_TIMEOUT")
+            self.assertIn("Invalid value for LOG_SHUTDOWN_TIMEOUT",
+                          str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+import io
+import os
+from logger.definitions import definition_files
+from logger.sources import create_sources, source_names
+
+
+class SourcesTest(unittest.TestCase):
+    """test suite for running several definition files in one process"""
+
+    directory = os.path.abspath('test/message_definitions/sources')
+
+    def set_environment(self, **settings):
+        """sets environment variables, restored after the test"""
+        for name, value in settings.items():
+            self.addCleanup(os.environ.pop, name, None)
+            os.environ[name] = value
+
+    def backfill_sources(self, files: list) -> list:
+        """backfills one hour of every source, returning the lines written
+        by each"""
+        self.set_environment(LOG_BACKFILL_START="2020-03-01T00:00:00",
+                             LOG_BACKFILL_END="2020-03-01T01:00:00",
+                             LOG_OUTPUT="buffered")
+        drivers = create_sources(files)
+        streams = []
+        for driver in drivers:
+            streams.append(io.StringIO())
+            driver.writer.stream = streams[-1]
+        for driver in drivers:
+            driver.schedule_log_messages()
+        try:
+            drivers[0].s.run()
+        finally:
+            for driver in drivers:
+                driver.close_output()
+        self.assertTrue(all(driver.s.empty() for driver in drivers))
+        return [stream.getvalue().splitlines() for stream in streams]
+
+    def test_definition_files(self):
+        """
+            GIVEN a directory of definition files and a file starting with _
+            WHEN I name a pattern and a file in MESSAGE_DEFINITIONS
+            THEN the files matching the pattern are taken in order of name
+            AND the file starting with _ is left out
+        """
+        files = definition_files(os.path.join(self.directory, 'app_*') +
+                                 ", default")
+        self.assertEqual([os.path.join(self.directory, 'app_a'),
+                          os.path.join(self.directory, 'app_b'),
+                          'logger/message_definitions/default'], files)
+        self.assertEqual(2, len(definition_files(
+            os.path.join(self.directory, '*'))))
+        self.assertEqual(['logger/message_definitions/default'],
+                         definition_files('default'))
+
+    def test_invalid_definition_files(self):
+        """
+            GIVEN a pattern that matches no file, and no file names
+            WHEN I read the definition files
+            THEN an exception is raised
+        """
+        with self.assertRaises(Exception) as context:
+            definition_files('missing/*')
+        self.assertIn("Invalid value for MESSAGE_DEFINITIONS",
+                      str(context.exception))
+        with self.assertRaises(Exception):
+            definition_files(' , ')
+
+    def test_source_names(self):
+        """
+            GIVEN definition files, two with the same name
+            WHEN I name their sources
+            THEN each is named after its file and the same names are
+            numbered by position
+        """
+        self.assertEqual(['app_a', 'default-2', 'default-3'],
+                         source_names(['a/app_a', 'a/default', 'b/default']))
+
+    def test_sources_share_a_scheduler(self):
+        """
+            GIVEN two definition files, a message every 60 seconds in one
+            and a message every 120 and 300 seconds in the other
+            WHEN I backfill one hour of both in one process
+            THEN each source writes its own lines, each starting with its
+            name after the timestamp, with its own counters
+            AND every event ran on the same scheduler
+        """
+        first, second = self.backfill_sources(definition_files(
+            os.path.join(self.directory, 'app_*')))
+        self.assertEqual(60, len(first))
+        self.assertEqual(42, len(second))
+        self.assertEqual("2020-03-01 00:01:00.000 ERROR " +
+                         "app_a Checkout message", first[0])
+        self.assertTrue(all(" app_a " in line for line in first))
+        self.assertTrue(all(" app_b " in line for line in second))
+        self.assertEqual(12, len([line for line in second
+                                  if "Login message" in line]))
+
+    def test_source_prefix(self):
+        """
+            GIVEN LOG_SOURCE_PREFIX set to [{source}] and a space
+            WHEN I backfill two definition files
+            THEN each line starts with the name of its source in brackets
+        """
+        self.set_environment(LOG_SOURCE_PREFIX="[{source}] ")
+        first, second = self.backfill_sources(definition_files(
+            os.path.join(self.directory, 'app_*')))
+        self.assertEqual("2020-03-01 00:01:00.000 ERROR " +
+                         "[app_a] Checkout message", first[0])
+        self.assertIn("[app_b] Payment error", second[0])
+
+    def test_queue_depth_per_source(self):
+        """
+            GIVEN two sources, each with fewer definitions than the events
+            of both together
+            WHEN I schedule their messages on the shared scheduler
+            THEN each checks only the depth of its own events
+        """
+        drivers = create_sources(definition_files(
+            os.path.join(self.directory, 'app_*')))
+        for driver in drivers:
+            driver.schedule_log_messages()
+        self.assertEqual([1, 2], [driver.s.depth for driver in drivers])
+        self.assertEqual(3, drivers[0].s.scheduler.depth)
+        for driver in drivers:
+            driver.checkDepth()
+            driver.close_output()
+
+    def test_paths_need_source(self):
+        """
+            GIVEN a FileSink or capture file path without {source}
+            WHEN I create several sources
+            THEN an exception is raised, as they would write the same file
+            AND a network sink is accepted
+        """
+        files = definition_files(os.path.join(self.directory, 'app_*'))
+        for name, value in (("LOG_SINK", "file:///tmp/logs"),
+                            ("LOG_RECORD", "/tmp/capture")):
+            os.environ[name] = value
+            try:
+                with self.assertRaises(Exception) as context:
+                    create_sources(files)
+            finally:
+                os.environ.pop(name)
+            self.assertIn("Invalid value for " + name,
+                          str(context.exception))
+        self.set_environment(LOG_SINK="syslog+udp://127.0.0.1:5140")
+        drivers = create_sources(files)
+        for driver in drivers:
+            driver.close_output()
+
+
+if __name__ == "__main__":
+    unittest.main()
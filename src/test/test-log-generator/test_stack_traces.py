@@ -0,0 +1,95 @@
+import unittest
+import logger.log_message as log_message
+from logger.log_generator import LogDriver
+from logger.stack_traces import StackTraceLibrary
+
+
+class StackTraceLibraryTest(unittest.TestCase):
+    """test suite for stack_traces.py"""
+
+    def test_styles_and_depth(self):
+        """
+            GIVEN a StackTraceLibrary
+            WHEN I request each style with a depth of 5
+            THEN the single line styles contain no line breaks
+            AND the multi-line styles contain 5 frames
+        """
+        library = StackTraceLibrary()
+        for style in StackTraceLibrary.STYLES:
+            variants = library.get(style, 5)
+            self.assertEqual(StackTraceLibrary.VARIANTS, len(variants))
+            if style.endswith('_multiline'):
+                self.assertEqual(5, variants[0].count(
+                    '  File "' if style.startswith('python') else '\tat '))
+            else:
+                self.assertNotIn('\n', variants[0])
+        self.assertEqual(5, library.get('java', 5)[0].count('\\tat '))
+
+    def test_rendered_once_and_repeatable(self):
+        """
+            GIVEN two StackTraceLibrary instances
+            WHEN I request the same style and depth
+            THEN both render the same variants
+            AND a second request reuses the rendered variants
+        """
+        library = StackTraceLibrary()
+        variants = library.get('java_multiline', 12)
+        self.assertIs(variants, library.get('java_multiline', 12))
+        self.assertEqual(variants,
+                         StackTraceLibrary().get('java_multiline', 12))
+
+    def test_captured_default(self):
+        """
+            GIVEN a StackTraceLibrary with captured frames
+            WHEN I request the python style with no depth
+            THEN the repr of the captured frames is returned
+        """
+        frames = ['  File "x.py", line 1, in level3\n    raise Exception(\n']
+        library = StackTraceLibrary(frames, 'Exception: boom')
+        self.assertEqual((repr(frames),), library.get('python', 0))
+        self.assertTrue(library.get('python_multiline', 0)[0]
+                        .endswith('Exception: boom'))
+
+    def test_logMessage_trace_validation(self):
+        """
+            GIVEN I instantiate instances of LogMessage
+            WHEN I supply a trace of java:12 or none at all
+            THEN the style and depth are parsed
+            AND an unknown style or a depth of 0 will fail validation
+        """
+        result = log_message.LogMessage("1", "N", "N", "Error Message",
+                                        "10", "5", "JAVA:12")
+        self.assertEqual(('java', 12),
+                         (result.trace_style, result.trace_depth))
+        result = log_message.LogMessage("1", "N", "N", "Error Message",
+                                        "10", "5")
+        self.assertEqual(('python', 0),
+                         (result.trace_style, result.trace_depth))
+        for invalid in ("cobol", "java:0", "java:x"):
+            with self.assertRaises(Exception) as context:
+                log_message.LogMessage("1", "N", "N", "Error Message",
+                                       "10", "5", invalid)
+            self.assertIn("Invalid value for TRACE flag",
+                          str(context.exception))
+
+    def test_driver_uses_definition_trace(self):
+        """
+            GIVEN a definition file with a java_multiline:4 UNKNOWN message
+            AND an UNKNOWN message without a trace
+            WHEN the driver formats each message
+            THEN the first has a 4 frame Java trace
+            AND the second has the captured Python trace
+        """
+        driver = LogDriver(1, "Thread-1")
+        driver.file = 'test/message_definitions/test_logger_java_trace'
+        java, python = driver.setup_log_messages()
+        java_text = driver.format_message(java)
+        self.assertTrue(java_text.startswith("Unknown error generated "))
+        self.assertEqual(4, java_text.count("\n\tat "))
+        python_text = driver.format_message(python)
+        self.assertIn("in level3", python_text)
+        self.assertIn("raise Exception", python_text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import os
+import re
+from testfixtures import LogCapture
+from logger.log_generator import LogDriver
+from logger.unique_tokens import BloomFilter, CounterTokenGenerator
+
+
+class UniqueTokensTest(unittest.TestCase):
+    """test suite for unique_tokens.py"""
+
+    def test_tokens_are_unique(self):
+        """
+            GIVEN two CounterTokenGenerators with different instance ids
+            WHEN I generate 50000 tokens from each
+            THEN every token is 32 hex characters
+            AND no token is repeated
+        """
+        tokens = set()
+        for instance_id in (1, 2):
+            generator = CounterTokenGenerator(instance_id)
+            for count in range(50000):
+                tokens.add(generator.next_token())
+        self.assertEqual(100000, len(tokens))
+        self.assertTrue(all(re.fullmatch('[0-9a-f]{32}', token)
+                            for token in tokens))
+
+    def test_tokens_repeat_for_instance_id(self):
+        """
+            GIVEN two CounterTokenGenerators with the same instance id
+            WHEN I generate tokens from each
+            THEN they generate the same sequence
+        """
+        first = CounterTokenGenerator(42)
+        second = CounterTokenGenerator(42)
+        self.assertEqual([first.next_token() for count in range(5)],
+                         [second.next_token() for count in range(5)])
+
+    def test_bloom_filter(self):
+        """
+            GIVEN a BloomFilter
+            WHEN I add a value twice
+            THEN the second add reports the value as possibly present
+        """
+        bloom_filter = BloomFilter(1000)
+        self.assertFalse(bloom_filter.add(123456789 << 70 | 987654321))
+        self.assertTrue(bloom_filter.add(123456789 << 70 | 987654321))
+
+    def test_verification_counts_collisions(self):
+        """
+            GIVEN two verifying generators sharing a Bloom filter and an
+            instance id
+            WHEN both generate the same tokens
+            THEN every token of the second is a possible collision
+        """
+        bloom_filter = BloomFilter(10000)
+        first = CounterTokenGenerator(7, bloom_filter)
+        second = CounterTokenGenerator(7, bloom_filter)
+        for count in range(1000):
+            first.next_token()
+            second.next_token()
+        self.assertLess(first.possible_collisions, 5)
+        self.assertEqual(1000, second.possible_collisions)
+
+    def test_driver_counter_tokens(self):
+        """
+            GIVEN I set LOG_UNIQUE_TOKENS to counter and LOG_UNIQUE_VERIFY
+            to Y
+            WHEN I create a LogDriver and format a SHARED=N message
+            THEN the message ends with a counter token
+            AND verification is reported when the driver stops
+        """
+        os.environ["LOG_UNIQUE_TOKENS"] = "counter"
+        os.environ["LOG_UNIQUE_VERIFY"] = "Y"
+        self.addCleanup(os.environ.pop, "LOG_UNIQUE_TOKENS")
+        self.addCleanup(os.environ.pop, "LOG_UNIQUE_VERIFY")
+        driver = LogDriver(1, "Thread-1")
+        driver.file = \
+            'test/message_definitions/test_logger_random_unknown_connection'
+        messages = driver.setup_log_messages()
+        text = messages[0].output_string()
+        self.assertRegex(text, "^Unknown error generated [0-9a-f]{32}$")
+        self.assertEqual(1, driver.token_generator.counter)
+        with LogCapture() as log:
+            driver.close_output()
+        self.assertEqual("Unique token verification : 1 tokens generated, " +
+                         "0 possible collisions", log.records[0].getMessage())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import io
+import os
+from logger.log_generator import LogDriver
+from logger.workers import run_workers
+import main
+
+
+class WorkersTest(unittest.TestCase):
+    """test suite for workers.py"""
+
+    testfile = 'test/message_definitions/test_logger_workers'
+
+    def setUp(self):
+        os.environ["LOG_FLUSH_INTERVAL"] = "0.05"
+        self.addCleanup(os.environ.pop, "LOG_FLUSH_INTERVAL")
+
+    def message_texts(self, output: str) -> list:
+        """strips the timestamps from the output lines and sorts them"""
+        return sorted(line[24:] for line in output.splitlines())
+
+    def single_process_texts(self) -> list:
+        """runs the test definitions in a single LogDriver"""
+        os.environ["LOG_OUTPUT"] = "buffered"
+        try:
+            stream = io.StringIO()
+            thread1 = LogDriver(1, "Thread-1")
+            thread1.file = self.testfile
+            thread1.writer.stream = stream
+            thread1.start()
+            thread1.join(10)
+        finally:
+            os.environ.pop("LOG_OUTPUT")
+        return self.message_texts(stream.getvalue())
+
+    def test_split_by_definitions(self):
+        """
+            GIVEN 3 message definitions
+            WHEN I share them between 2 worker processes by definition
+            THEN the merged output matches a single process run
+        """
+        stream = io.StringIO()
+        self.assertEqual(0, run_workers(2, 'definitions', self.testfile,
+                                        stream))
+        texts = self.message_texts(stream.getvalue())
+        self.assertEqual(22, len(texts))
+        self.assertEqual(self.single_process_texts(), texts)
+
+    def test_split_by_counter(self):
+        """
+            GIVEN 3 message definitions including SHARED=Y sequences
+            WHEN I share every definition between 3 worker processes by
+            counter value
+            THEN the merged output matches a single process run
+            AND no SHARED=Y message is repeated
+        """
+        stream = io.StringIO()
+        self.assertEqual(0, run_workers(3, 'counter', self.testfile,
+                                        stream))
+        texts = self.message_texts(stream.getvalue())
+        self.assertEqual(self.single_process_texts(), texts)
+        shared = [text for text in texts if "Shared" in text]
+        self.assertEqual(7, len(set(shared)))
+
+    def test_workers_option(self):
+        """
+            GIVEN the LOG_WORKERS environment variable is set to 4
+            WHEN I parse the command line with and without --workers
+            THEN the option overrides the environment variable
+            AND a LOG_WORKERS that is not a number is only rejected when
+            the workers are used
+        """
+        os.environ["LOG_WORKERS"] = "4"
+        self.addCleanup(os.environ.pop, "LOG_WORKERS")
+        self.assertEqual(4, main.get_workers(main.parse_arguments([])))
+        self.assertEqual(2, main.get_workers(
+            main.parse_arguments(["--workers", "2"])))
+        os.environ["LOG_WORKERS"] = "four"
+        self.assertEqual("replay", main.parse_arguments(
+            ["replay", "run.cap"]).command)
+        with self.assertRaises(Exception) as context:
+            main.get_workers(main.parse_arguments([]))
+        self.assertEqual("Invalid value for LOG_WORKERS, Supplied value " +
+                         "is : four Expected a whole number",
+                         str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()